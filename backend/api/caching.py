@@ -0,0 +1,211 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Max
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from core.cache import get_response_cache, get_tag_versions, get_version
+from core.constants import (
+    AUTHOR_CACHE_TAG,
+    RECIPE_CACHE_TAG,
+    RECIPE_COUNT_VERSION_KEY,
+    RECIPE_LIST_CACHE_TAG,
+    RECIPE_POPULAR_CACHE_TAG,
+    RECIPE_TRENDING_VERSION_KEY,
+    TAG_CACHE_TAG,
+    USER_RECIPE_STATE_VERSION_KEY,
+)
+
+
+def recipe_cache_tags(recipe):
+    yield RECIPE_CACHE_TAG.format(recipe["id"])
+    yield AUTHOR_CACHE_TAG.format(recipe["author"]["id"])
+    for tag in recipe["tags"]:
+        yield TAG_CACHE_TAG.format(tag["id"])
+
+
+class ConditionalGetMixin:
+    conditional_actions = ("list", "retrieve")
+    validators = None
+
+    def get_validator_queryset(self):
+        return self.get_queryset()
+
+    def get_user_state(self):
+        return None
+
+    def get_list_state(self, queryset):
+        return queryset.order_by().aggregate(
+            count=Count("pk"), updated_at=Max("updated_at"))
+
+    def get_validators(self):
+        queryset = self.get_validator_queryset()
+        last_modified = None
+        if self.action == "list":
+            state = self.get_list_state(self.filter_queryset(queryset))
+        else:
+            lookup = self.lookup_url_kwarg or self.lookup_field
+            try:
+                updated_at = queryset.filter(
+                    **{self.lookup_field: self.kwargs[lookup]}
+                ).values_list("updated_at", flat=True).first()
+            except (TypeError, ValueError):
+                return None
+            if updated_at is None:
+                return None
+            state = {"updated_at": updated_at}
+            last_modified = int(updated_at.timestamp())
+
+        user_state = self.get_user_state()
+        if user_state is not None:
+            state["user"] = user_state
+            last_modified = None
+        signature = json.dumps(state, cls=DjangoJSONEncoder, sort_keys=True)
+        return {
+            "etag": quote_etag(hashlib.md5(
+                signature.encode(), usedforsecurity=False).hexdigest()),
+            "last_modified": last_modified,
+        }
+
+    def get_conditional_response(self):
+        if self.validators is None:
+            return None
+        return get_conditional_response(self.request, **self.validators)
+
+    def get_early_response(self):
+        if (
+            self.request.method not in ("GET", "HEAD")
+            or self.action not in self.conditional_actions
+        ):
+            return None
+        self.validators = self.get_validators()
+        return self.get_conditional_response()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs)
+        if self.validators is not None and response.status_code == 200:
+            response["ETag"] = self.validators["etag"]
+            if self.validators["last_modified"] is not None:
+                response["Last-Modified"] = http_date(
+                    self.validators["last_modified"])
+        return response
+
+
+class RecipeConditionalGetMixin(ConditionalGetMixin):
+    def get_list_state(self, queryset):
+        return {
+            "rows": get_version(RECIPE_COUNT_VERSION_KEY),
+            "trending": get_version(RECIPE_TRENDING_VERSION_KEY),
+            **queryset.order_by().aggregate(updated_at=Max("updated_at")),
+        }
+
+    def get_user_state(self):
+        user = self.request.user
+        if not user.is_authenticated:
+            return None
+        return "{}:{}".format(user.pk, get_version(
+            USER_RECIPE_STATE_VERSION_KEY.format(user.pk)))
+
+
+class AnonymousResponseCacheMixin(RecipeConditionalGetMixin):
+    cached_actions = ("list", "retrieve")
+    cached_format = "json"
+
+    def is_response_cacheable(self, request):
+        return (
+            get_response_cache() is not None
+            and request.method == "GET"
+            and self.action in self.cached_actions
+            and not request.user.is_authenticated
+            and request.accepted_renderer.format == self.cached_format
+        )
+
+    def get_response_cache_key(self, request):
+        params = sorted(
+            (key, value)
+            for key, values in request.query_params.lists()
+            for value in values
+        )
+        signature = hashlib.md5(
+            json.dumps([
+                request.build_absolute_uri(request.path),
+                request.accepted_media_type,
+                params,
+            ]).encode(),
+            usedforsecurity=False,
+        ).hexdigest()
+        return f"response:{signature}"
+
+    def get_base_cache_tags(self):
+        if self.action == "list":
+            if self.request.query_params.get("ordering") == "popular":
+                return [RECIPE_LIST_CACHE_TAG, RECIPE_POPULAR_CACHE_TAG]
+            return [RECIPE_LIST_CACHE_TAG]
+        return [RECIPE_CACHE_TAG.format(self.kwargs[self.lookup_field])]
+
+    def get_response_cache_tags(self, data):
+        if self.action != "list":
+            return set(recipe_cache_tags(data))
+        if isinstance(data, dict):
+            data = data["results"]
+        return {tag for recipe in data for tag in recipe_cache_tags(recipe)}
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.response_cache_key = None
+        if self.is_response_cacheable(request):
+            self.response_cache_key = self.get_response_cache_key(request)
+            self.response_cache_tags = get_tag_versions(
+                self.get_base_cache_tags())
+
+    def get_cached_response(self):
+        if not self.response_cache_key:
+            return None
+        entry = get_response_cache().get(self.response_cache_key)
+        if entry is None or get_tag_versions(entry["tags"]) != entry["tags"]:
+            return None
+        self.validators = entry["validators"]
+        not_modified = self.get_conditional_response()
+        if not_modified is not None:
+            return not_modified
+        return HttpResponse(
+            entry["content"], content_type=entry["content_type"])
+
+    def get_early_response(self):
+        cached = self.get_cached_response()
+        if cached is not None:
+            return cached
+        return super().get_early_response()
+
+    def cache_response(self, response):
+        response.render()
+        tags = {
+            **get_tag_versions(self.get_response_cache_tags(response.data)),
+            **self.response_cache_tags,
+        }
+        get_response_cache().set(
+            self.response_cache_key,
+            {
+                "content": response.content,
+                "content_type": response["Content-Type"],
+                "validators": self.validators,
+                "tags": tags,
+            },
+            settings.RESPONSE_CACHE_TIMEOUT,
+        )
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs)
+        if (
+            getattr(self, "response_cache_key", None)
+            and response.status_code == 200
+            and getattr(response, "data", None) is not None
+        ):
+            self.cache_response(response)
+        return response
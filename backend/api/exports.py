@@ -0,0 +1,117 @@
+import csv
+import io
+import json
+from itertools import islice
+
+from django.conf import settings
+from django.db.models import Prefetch, prefetch_related_objects
+
+from api.pdf import stream_pdf
+from recipes.models import Recipe, RecipeIngredient
+
+SHOPPING_LIST_TITLE = "Список покупок"
+RECIPE_EXPORT_CHUNK_SIZE = 500
+
+
+def shopping_list_lines(rows):
+    for name, unit, amount in rows:
+        yield f"{name}: {amount}{unit}"
+
+
+def export_txt(rows):
+    for index, line in enumerate(shopping_list_lines(rows)):
+        yield ("\n" if index else "") + line
+
+
+def export_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(("name", "measurement_unit", "amount"))
+    for row in rows:
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def export_json(rows):
+    yield "["
+    for index, (name, unit, amount) in enumerate(rows):
+        yield ("," if index else "") + json.dumps(
+            {"name": name, "measurement_unit": unit, "amount": amount},
+            ensure_ascii=False,
+        )
+    yield "]"
+
+
+def export_pdf(rows):
+    return stream_pdf(
+        SHOPPING_LIST_TITLE,
+        shopping_list_lines(rows),
+        settings.SHOPPING_LIST_PDF_FONT,
+    )
+
+
+SHOPPING_LIST_EXPORTS = {
+    "txt": ("text/plain; charset=utf-8", export_txt),
+    "csv": ("text/csv; charset=utf-8", export_csv),
+    "json": ("application/json", export_json),
+    "pdf": ("application/pdf", export_pdf),
+}
+
+
+def recipe_record(recipe):
+    return {
+        "id": recipe.id,
+        "name": recipe.name,
+        "text": recipe.text,
+        "cooking_time": recipe.cooking_time,
+        "image": recipe.image.url if recipe.image else None,
+        "author": {
+            "id": recipe.author.id,
+            "username": recipe.author.username,
+        },
+        "tags": [
+            {"id": tag.id, "name": tag.name, "slug": tag.slug}
+            for tag in recipe.tags.all()
+        ],
+        "ingredients": [
+            {
+                "id": item.ingredients.id,
+                "name": item.ingredients.name,
+                "measurement_unit": item.ingredients.measurement_unit,
+                "amount": item.amount,
+            }
+            for item in recipe.recipe_ingredients.all()
+        ],
+    }
+
+
+def iter_recipes(since_id=0, chunk_size=RECIPE_EXPORT_CHUNK_SIZE):
+    recipes = Recipe.objects.filter(id__gt=since_id).select_related(
+        "author").defer("search_vector").order_by("id").iterator(
+            chunk_size=chunk_size)
+    while True:
+        chunk = list(islice(recipes, chunk_size))
+        if not chunk:
+            return
+        prefetch_related_objects(
+            chunk,
+            "tags",
+            Prefetch(
+                "recipe_ingredients",
+                queryset=RecipeIngredient.objects.select_related(
+                    "ingredients").order_by("pk"),
+            ),
+        )
+        yield from chunk
+
+
+def recipe_line(recipe):
+    return json.dumps(recipe_record(recipe), ensure_ascii=False) + "\n"
+
+
+def export_recipes(since_id=0):
+    for recipe in iter_recipes(since_id):
+        yield recipe_line(recipe)
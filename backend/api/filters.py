@@ -1,11 +1,29 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Exists, OuterRef, Q
 from django_filters import rest_framework as filters
-from rest_framework.filters import SearchFilter
 
-from recipes.models import Recipe
+from core.cache import get_version
+from core.constants import COOKING_TIME_BUCKETS, RECIPE_COUNT_VERSION_KEY
+from core.models import Tag
+from recipes.models import Favorite, Recipe, ShoppingCart
+
+RECIPE_ORDERINGS = {
+    "newest": ("-id",),
+    "popular": ("-favorites_count", "-id"),
+    "trending": ("-trending_score", "-id"),
+    "cooking_time": ("cooking_time", "-id"),
+}
+FACET_FILTERS = ("tags", "cooking_time_min", "cooking_time_max")
+USER_FILTERS = ("is_favorited", "is_in_shopping_cart")
 
 
-class IngredientNameFilter(SearchFilter):
-    search_param = 'name'
+def tag_choices():
+    return [(slug, slug) for slug in Tag.objects.cached_slugs()]
 
 
 class RecipeFilter(filters.FilterSet):
@@ -13,24 +31,127 @@ class RecipeFilter(filters.FilterSet):
     is_in_shopping_cart = filters.CharFilter(
         method="filter_is_in_shopping_cart")
     author = filters.NumberFilter(field_name="author__id")
-    tags = filters.AllValuesMultipleFilter(
-        field_name="tags__slug",
-        distinct=True,
+    tags = filters.MultipleChoiceFilter(
+        choices=tag_choices,
+        method="filter_tags",
+    )
+    search = filters.CharFilter(method="filter_search")
+    cooking_time_min = filters.NumberFilter(
+        field_name="cooking_time", lookup_expr="gte")
+    cooking_time_max = filters.NumberFilter(
+        field_name="cooking_time", lookup_expr="lte")
+    ordering = filters.ChoiceFilter(
+        choices=[(name, name) for name in RECIPE_ORDERINGS],
+        method="filter_ordering",
     )
 
     class Meta:
         model = Recipe
-        fields = ("is_favorited", "is_in_shopping_cart", "author", "tags")
+        fields = (
+            "is_favorited",
+            "is_in_shopping_cart",
+            "author",
+            "tags",
+            "search",
+            "cooking_time_min",
+            "cooking_time_max",
+            "ordering",
+        )
 
     def filter_is_favorited(self, queryset, _, value):
         user = self.request.user
 
         if user.is_authenticated and value:
-            return queryset.filter(favorites__user=user)
+            return queryset.filter(Exists(
+                Favorite.objects.filter(user=user, recipe=OuterRef("pk"))
+            ))
         return queryset
 
     def filter_is_in_shopping_cart(self, queryset, _, value):
         user = self.request.user
         if user.is_authenticated and value:
-            return queryset.filter(shopping_cart__user=user).distinct()
+            return queryset.filter(Exists(
+                ShoppingCart.objects.filter(user=user, recipe=OuterRef("pk"))
+            ))
         return queryset
+
+    def filter_tags(self, queryset, _, value):
+        if not value:
+            return queryset
+        return queryset.with_any_tag(value)
+
+    def filter_search(self, queryset, _, value):
+        return queryset.search(value)
+
+    def filter_ordering(self, queryset, _, value):
+        return queryset.order_by(*RECIPE_ORDERINGS[value])
+
+    def cooking_time_condition(self, low, high):
+        condition = Q()
+        if low is not None:
+            condition &= Q(cooking_time__gte=low)
+        if high is not None:
+            condition &= Q(cooking_time__lte=high)
+        return condition
+
+    def get_facet_cache_key(self, slugs):
+        data = self.form.cleaned_data
+        params = sorted(
+            (name, value)
+            for name, value in data.items()
+            if name != "ordering" and value not in (None, "", [])
+        )
+        user = self.request.user
+        owner = user.pk if any(data.get(name) for name in USER_FILTERS) else ""
+        signature = hashlib.md5(
+            json.dumps([params, slugs], cls=DjangoJSONEncoder).encode(),
+            usedforsecurity=False,
+        ).hexdigest()
+        return "facets:{}:{}:{}".format(
+            get_version(RECIPE_COUNT_VERSION_KEY), owner, signature)
+
+    def compute_facets(self, slugs):
+        data = self.form.cleaned_data
+        queryset = self.queryset
+        for name, value in data.items():
+            if name not in FACET_FILTERS:
+                queryset = self.filters[name].filter(queryset, value)
+        if queryset.query.annotations:
+            queryset = self.queryset.filter(
+                pk__in=queryset.order_by().values("pk"))
+
+        tags_condition = Q()
+        if data.get("tags"):
+            tags_condition = Q(queryset.any_tag_condition(data["tags"]))
+        time_condition = self.cooking_time_condition(
+            data.get("cooking_time_min"), data.get("cooking_time_max"))
+        aggregates = {
+            f"tag_{index}": Count("pk", filter=Q(
+                queryset.any_tag_condition([slug])) & time_condition)
+            for index, slug in enumerate(slugs)
+        }
+        for index, bucket in enumerate(COOKING_TIME_BUCKETS):
+            aggregates[f"cooking_time_{index}"] = Count("pk", filter=(
+                self.cooking_time_condition(*bucket) & tags_condition))
+        counts = queryset.order_by().aggregate(**aggregates)
+
+        return {
+            "tags": {
+                slug: counts[f"tag_{index}"]
+                for index, slug in enumerate(slugs)
+            },
+            "cooking_time": [
+                {"min": low, "max": high, "count": counts[
+                    f"cooking_time_{index}"]}
+                for index, (low, high) in enumerate(COOKING_TIME_BUCKETS)
+            ],
+        }
+
+    def get_facets(self):
+        slugs = Tag.objects.cached_slugs()
+        key = self.get_facet_cache_key(slugs)
+        facets = cache.get(key)
+        if facets is None:
+            facets = self.compute_facets(slugs)
+            cache.set(key, facets, settings.FACET_CACHE_TIMEOUT)
+        return facets
@@ -0,0 +1,147 @@
+import json
+from itertools import islice
+
+from django.db import DatabaseError, connection, transaction
+
+from api.serializers import RecipeWriteSerializer
+from core.cache import bump_version, invalidate_tags
+from core.constants import RECIPE_COUNT_VERSION_KEY, RECIPE_LIST_CACHE_TAG
+from core.counters import shift_counter
+from core.models import Ingredient, Tag
+from recipes.models import Recipe, RecipeIngredient, TimelineEntry
+from users.models import User
+
+IMPORT_CHUNK_SIZE = 200
+
+
+def iter_lines(stream):
+    for number, line in enumerate(stream, 1):
+        line = line.strip()
+        if line:
+            yield number, line
+
+
+def parse_line(line):
+    try:
+        payload = json.loads(line)
+    except ValueError as error:
+        return None, {"non_field_errors": [f"Invalid JSON: {error}."]}
+    if not isinstance(payload, dict):
+        return None, {"non_field_errors": ["Expected a JSON object."]}
+    return payload, None
+
+
+def referenced_ids(payloads, key, attr=None):
+    ids = set()
+    for payload in payloads:
+        values = payload.get(key)
+        if not isinstance(values, list):
+            continue
+        for value in values:
+            if attr is not None:
+                value = value.get(attr) if isinstance(value, dict) else None
+            if isinstance(value, int):
+                ids.add(value)
+    return ids
+
+
+def known_ids(model, ids):
+    return set(model.objects.filter(id__in=ids).values_list("id", flat=True))
+
+
+@transaction.atomic
+def save_recipes(user, items):
+    fanned_out = TimelineEntry.objects.fans_out(user)
+    recipes = [
+        Recipe(
+            author=user,
+            fanned_out=fanned_out,
+            **{
+                key: value
+                for key, value in data.items()
+                if key not in ("ingredients", "tags")
+            },
+        )
+        for data in items
+    ]
+    if connection.features.can_return_rows_from_bulk_insert:
+        Recipe.objects.bulk_create(recipes)
+        shift_counter(
+            User.objects.filter(pk=user.pk), "recipes_count", len(recipes))
+    else:
+        for recipe in recipes:
+            recipe.save()
+
+    Recipe.tags.through.objects.bulk_create(
+        Recipe.tags.through(recipe_id=recipe.pk, tag_id=tag_id)
+        for recipe, data in zip(recipes, items)
+        for tag_id in data["tags"]
+    )
+    RecipeIngredient.objects.bulk_create(
+        RecipeIngredient(
+            recipe_id=recipe.pk,
+            ingredients_id=item["id"],
+            amount=item["amount"],
+        )
+        for recipe, data in zip(recipes, items)
+        for item in data["ingredients"]
+    )
+    created = Recipe.objects.filter(pk__in=[recipe.pk for recipe in recipes])
+    created.update_search_vector()
+    created.update_tag_slugs()
+    TimelineEntry.objects.fan_out([recipe.pk for recipe in recipes])
+    bump_version(RECIPE_COUNT_VERSION_KEY)
+    invalidate_tags(RECIPE_LIST_CACHE_TAG)
+    return recipes
+
+
+def import_chunk(chunk, context):
+    results, valid = {}, []
+    parsed = []
+    for number, line in chunk:
+        payload, errors = parse_line(line)
+        if errors:
+            results[number] = {"line": number, "errors": errors}
+        else:
+            parsed.append((number, payload))
+
+    payloads = [payload for _, payload in parsed]
+    context = {
+        **context,
+        "known_ids": {
+            Ingredient: known_ids(
+                Ingredient, referenced_ids(payloads, "ingredients", "id")),
+            Tag: known_ids(Tag, referenced_ids(payloads, "tags")),
+        },
+    }
+    for number, payload in parsed:
+        serializer = RecipeWriteSerializer(data=payload, context=context)
+        if serializer.is_valid():
+            valid.append((number, serializer.validated_data))
+        else:
+            results[number] = {"line": number, "errors": serializer.errors}
+
+    if valid:
+        try:
+            recipes = save_recipes(
+                context["request"].user, [data for _, data in valid])
+        except DatabaseError as error:
+            for number, _ in valid:
+                results[number] = {
+                    "line": number,
+                    "errors": {"non_field_errors": [str(error)]},
+                }
+        else:
+            for (number, _), recipe in zip(valid, recipes):
+                results[number] = {"line": number, "id": recipe.pk}
+    return [results[number] for number, _ in chunk]
+
+
+def import_recipes(stream, context):
+    lines = iter_lines(stream)
+    while True:
+        chunk = list(islice(lines, IMPORT_CHUNK_SIZE))
+        if not chunk:
+            return
+        for result in import_chunk(chunk, context):
+            yield json.dumps(result, ensure_ascii=False) + "\n"
@@ -1,6 +1,266 @@
-from rest_framework.pagination import PageNumberPagination
+import hashlib
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from core.cache import get_version
+from core.constants import RECIPE_COUNT_VERSION_KEY
+from recipes.models import TimelineEntry
 
 
 class PageNumberLimitPagination(PageNumberPagination):
     page_size = 10
     page_size_query_param = 'limit'
+
+
+class CachedCountPaginator(Paginator):
+    def __init__(self, *args, cache_key, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cache_key = cache_key
+        self.count_exact = True
+
+    @cached_property
+    def count(self):
+        cached = cache.get(self.cache_key)
+        if cached is None:
+            cached = self.compute_count()
+            cache.set(
+                self.cache_key,
+                cached,
+                settings.PAGINATION_COUNT_CACHE_TIMEOUT,
+            )
+        count, self.count_exact = cached
+        return count
+
+    def compute_count(self):
+        threshold = settings.PAGINATION_ESTIMATE_THRESHOLD
+        if threshold:
+            estimate = self.estimate_count()
+            if estimate is not None and estimate > threshold:
+                return estimate, False
+        return self.object_list.count(), True
+
+    def estimate_count(self):
+        queryset = self.object_list.order_by()
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return None
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return plan[0]['Plan']['Plan Rows']
+
+
+class CachedCountPagination(PageNumberLimitPagination):
+    count_version_key = None
+    signature_ignored_params = (
+        'page', 'limit', 'cursor', 'pagination', 'facets')
+
+    def get_count_cache_key(self, request):
+        params = sorted(
+            (key, value)
+            for key, values in request.query_params.lists()
+            if key not in self.signature_ignored_params
+            for value in values
+        )
+        signature = hashlib.md5(
+            json.dumps(params).encode(), usedforsecurity=False
+        ).hexdigest()
+        return 'count:{}:{}:{}:{}'.format(
+            self.count_version_key,
+            get_version(self.count_version_key),
+            request.user.pk,
+            signature,
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.django_paginator_class = partial(
+            CachedCountPaginator,
+            cache_key=self.get_count_cache_key(request),
+        )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        response.data['count_exact'] = self.page.paginator.count_exact
+        return response
+
+
+class KeysetPagination(BasePagination):
+    page_size = 10
+    page_size_query_param = 'limit'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_ordering(self, queryset):
+        ordering = [
+            (field.lstrip('-'), field.startswith('-'))
+            for field in queryset.query.order_by
+        ]
+        if not ordering:
+            ordering = [('pk', False)]
+        if ordering[-1][0] not in ('pk', 'id'):
+            ordering.append(('pk', ordering[0][1]))
+        return ordering
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return page_size if page_size > 0 else self.page_size
+
+    def get_field(self, queryset, name):
+        model = queryset.model
+        if name == 'pk':
+            return model._meta.pk
+        try:
+            for part in name.split('__'):
+                field = model._meta.get_field(part)
+                model = field.related_model
+        except FieldDoesNotExist:
+            return queryset.query.annotations[name].output_field
+        return field.target_field if field.is_relation else field
+
+    def decode_cursor(self, request, queryset):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            values = json.loads(urlsafe_b64decode(encoded.encode()))
+        except (BinasciiError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        try:
+            values = [
+                self.get_field(queryset, field).to_python(value)
+                for (field, _), value in zip(self.ordering, values)
+            ]
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        if None in values:
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    def encode_cursor(self, obj):
+        values = []
+        for field, _ in self.ordering:
+            if isinstance(obj, dict):
+                values.append(obj['id' if field == 'pk' else field])
+                continue
+            value = obj
+            for part in field.split('__'):
+                value = getattr(value, part)
+            values.append(value)
+        return urlsafe_b64encode(
+            json.dumps(values, cls=DjangoJSONEncoder).encode()
+        ).decode()
+
+    def after(self, values):
+        condition = Q()
+        equal = {}
+        for (field, descending), value in zip(self.ordering, values):
+            lookup = f'{field}__{"lt" if descending else "gt"}'
+            condition |= Q(**equal, **{lookup: value})
+            equal[field] = value
+        return condition
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.ordering = self.get_ordering(queryset)
+        page_size = self.get_page_size(request)
+        values = self.decode_cursor(request, queryset)
+
+        queryset = queryset.order_by(*(
+            f'{"-" if descending else ""}{field}'
+            for field, descending in self.ordering
+        ))
+        if values is not None:
+            queryset = queryset.filter(self.after(values))
+
+        page = list(queryset[:page_size + 1])
+        self.has_next = len(page) > page_size
+        self.page = page[:page_size]
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.encode_cursor(self.page[-1]),
+        )
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': None,
+            'results': data,
+        })
+
+
+class FeedPagination(KeysetPagination):
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.ordering = [('pk', True)]
+        page_size = self.get_page_size(request)
+        values = self.decode_cursor(request, queryset)
+        ids = TimelineEntry.objects.feed(
+            request.user.pk, page_size + 1, values and values[0])
+        self.has_next = len(ids) > page_size
+        self.last_id = ids[page_size - 1] if self.has_next else None
+        self.page = list(queryset.filter(pk__in=ids[:page_size]).order_by(
+            '-id'))
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.encode_cursor({'id': self.last_id}),
+        )
+
+
+class CursorOptInPagination(PageNumberLimitPagination):
+    mode_query_param = 'pagination'
+    cursor_mode = 'cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if (
+            request.query_params.get(self.mode_query_param) == self.cursor_mode
+            or KeysetPagination.cursor_query_param in request.query_params
+        ):
+            self.keyset = KeysetPagination()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+class RecipePagination(CursorOptInPagination, CachedCountPagination):
+    count_version_key = RECIPE_COUNT_VERSION_KEY
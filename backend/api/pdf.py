@@ -0,0 +1,393 @@
+import re
+import struct
+import zlib
+from functools import lru_cache
+from pathlib import Path
+
+PAGE_WIDTH = 595
+PAGE_HEIGHT = 842
+MARGIN = 50
+FONT_SIZE = 11
+TITLE_SIZE = 16
+LEADING = 15
+SUBSET_TABLES = (
+    "cvt ", "fpgm", "glyf", "head", "hhea", "hmtx", "loca", "maxp", "prep")
+REQUIRED_TABLES = ("cmap", "glyf", "head", "hhea", "hmtx", "loca", "maxp")
+UNICODE_CMAPS = (((3, 10), 12), ((3, 1), 4), ((0, 3), 4))
+ARG_WORDS, HAS_SCALE, MORE_COMPONENTS, HAS_XY_SCALE, HAS_2X2 = (
+    0x1, 0x8, 0x20, 0x40, 0x80)
+
+
+class TrueTypeFont:
+    def __init__(self, path):
+        self.path = Path(path)
+        self.name = re.sub(r"[^A-Za-z0-9-]", "", self.path.stem) or "Font"
+        with self.path.open("rb") as file:
+            data = file.read()
+        try:
+            self.parse(data)
+        except struct.error as error:
+            raise ValueError(f"Font {self.path} is malformed.") from error
+
+    def parse(self, data):
+        self.tables = tables = {}
+        (count,) = struct.unpack_from(">H", data, 4)
+        for index in range(count):
+            tag, _, offset, length = struct.unpack_from(
+                ">4sIII", data, 12 + index * 16)
+            tables[tag.decode("latin-1")] = (offset, length)
+        missing = [tag for tag in REQUIRED_TABLES if tag not in tables]
+        if missing:
+            raise ValueError(
+                f"Font {self.path} has no {', '.join(missing)} table.")
+
+        head = tables["head"][0]
+        (self.units_per_em,) = struct.unpack_from(">H", data, head + 18)
+        self.bbox = [
+            self.scale(value)
+            for value in struct.unpack_from(">hhhh", data, head + 36)
+        ]
+        hhea = tables["hhea"][0]
+        ascent, descent = struct.unpack_from(">hh", data, hhea + 4)
+        self.ascent = self.scale(ascent)
+        self.descent = self.scale(descent)
+        (metrics,) = struct.unpack_from(">H", data, hhea + 34)
+        hmtx = tables["hmtx"][0]
+        self.advances = [
+            struct.unpack_from(">H", data, hmtx + index * 4)[0]
+            for index in range(metrics)
+        ]
+        self.cmap = self.read_cmap(data, tables["cmap"][0])
+
+    def scale(self, value):
+        return round(value * 1000 / self.units_per_em)
+
+    @staticmethod
+    def read_cmap(data, cmap):
+        (count,) = struct.unpack_from(">H", data, cmap + 2)
+        subtables = {}
+        for index in range(count):
+            platform, encoding, offset = struct.unpack_from(
+                ">HHI", data, cmap + 4 + index * 8)
+            subtables[(platform, encoding)] = cmap + offset
+
+        for key, supported in UNICODE_CMAPS:
+            if key in subtables and struct.unpack_from(
+                ">H", data, subtables[key]
+            )[0] == supported:
+                offset = subtables[key]
+                break
+        else:
+            raise ValueError("Font has no supported Unicode cmap.")
+
+        mapping = {}
+        if supported == 12:
+            (groups,) = struct.unpack_from(">I", data, offset + 12)
+            for index in range(groups):
+                start, end, glyph = struct.unpack_from(
+                    ">III", data, offset + 16 + index * 12)
+                for code in range(start, end + 1):
+                    mapping[code] = glyph + code - start
+            return mapping
+
+        (segments,) = struct.unpack_from(">H", data, offset + 6)
+        segments //= 2
+        ends = offset + 14
+        starts = ends + segments * 2 + 2
+        deltas = starts + segments * 2
+        ranges = deltas + segments * 2
+        for index in range(segments):
+            (end,) = struct.unpack_from(">H", data, ends + index * 2)
+            (start,) = struct.unpack_from(">H", data, starts + index * 2)
+            (delta,) = struct.unpack_from(">h", data, deltas + index * 2)
+            range_at = ranges + index * 2
+            (range_offset,) = struct.unpack_from(">H", data, range_at)
+            for code in range(start, min(end, 0xFFFE) + 1):
+                if range_offset:
+                    glyph_at = range_at + range_offset + (code - start) * 2
+                    (glyph,) = struct.unpack_from(">H", data, glyph_at)
+                    if glyph:
+                        glyph = (glyph + delta) % 65536
+                else:
+                    glyph = (code + delta) % 65536
+                if glyph:
+                    mapping[code] = glyph
+        return mapping
+
+    def glyph(self, char):
+        return self.cmap.get(ord(char), 0)
+
+    def width(self, glyph):
+        return self.scale(self.advances[min(glyph, len(self.advances) - 1)])
+
+    def text_width(self, text, size):
+        return sum(
+            self.width(self.glyph(char)) for char in text) * size / 1000
+
+    def read_tables(self):
+        tables = {}
+        with self.path.open("rb") as file:
+            for tag in SUBSET_TABLES:
+                if tag in self.tables:
+                    offset, length = self.tables[tag]
+                    file.seek(offset)
+                    tables[tag] = file.read(length)
+        return tables
+
+    @staticmethod
+    def components(glyph):
+        if len(glyph) < 10 or struct.unpack_from(">h", glyph)[0] >= 0:
+            return
+        offset = 10
+        flags = MORE_COMPONENTS
+        while flags & MORE_COMPONENTS:
+            flags, component = struct.unpack_from(">HH", glyph, offset)
+            yield component
+            offset += 8 if flags & ARG_WORDS else 6
+            if flags & HAS_SCALE:
+                offset += 2
+            elif flags & HAS_XY_SCALE:
+                offset += 4
+            elif flags & HAS_2X2:
+                offset += 8
+
+    @staticmethod
+    def checksum(data):
+        data += b"\0" * (-len(data) % 4)
+        return sum(struct.unpack(f">{len(data) // 4}I", data)) & 0xFFFFFFFF
+
+    def subset(self, glyphs):
+        tables = self.read_tables()
+        head = bytearray(tables["head"])
+        (long_loca,) = struct.unpack_from(">h", head, 50)
+        (count,) = struct.unpack_from(">H", tables["maxp"], 4)
+        loca = struct.unpack(
+            f">{count + 1}{'I' if long_loca else 'H'}", tables["loca"])
+        if not long_loca:
+            loca = [offset * 2 for offset in loca]
+        glyf = tables["glyf"]
+
+        keep = set()
+        pending = [0, *glyphs]
+        while pending:
+            glyph = pending.pop()
+            if glyph in keep or glyph >= count:
+                continue
+            keep.add(glyph)
+            pending.extend(
+                self.components(glyf[loca[glyph]:loca[glyph + 1]]))
+
+        parts, offsets, position = [], [], 0
+        for glyph in range(count):
+            offsets.append(position)
+            if glyph in keep:
+                data = glyf[loca[glyph]:loca[glyph + 1]]
+                data += b"\0" * (-len(data) % 4)
+                parts.append(data)
+                position += len(data)
+        offsets.append(position)
+        tables["glyf"] = b"".join(parts)
+        tables["loca"] = struct.pack(f">{count + 1}I", *offsets)
+        struct.pack_into(">I", head, 8, 0)
+        struct.pack_into(">h", head, 50, 1)
+        tables["head"] = bytes(head)
+
+        tags = sorted(tables)
+        shift = 2 ** (len(tags).bit_length() - 1)
+        header = struct.pack(
+            ">IHHHH", 0x00010000, len(tags), shift * 16,
+            shift.bit_length() - 1, (len(tags) - shift) * 16)
+        offset = len(header) + len(tags) * 16
+        directory, body, positions = [], [], {}
+        for tag in tags:
+            data = tables[tag]
+            directory.append(struct.pack(
+                ">4sIII", tag.encode("latin-1"), self.checksum(data),
+                offset, len(data)))
+            body.append(data + b"\0" * (-len(data) % 4))
+            positions[tag] = offset
+            offset += len(body[-1])
+        font = bytearray(header + b"".join(directory) + b"".join(body))
+        struct.pack_into(
+            ">I", font, positions["head"] + 8,
+            (0xB1B0AFBA - self.checksum(bytes(font))) & 0xFFFFFFFF)
+        return bytes(font)
+
+
+class PDFStreamWriter:
+    CATALOG, PAGES, FONT, CID_FONT, DESCRIPTOR, FONT_FILE, TO_UNICODE = (
+        range(1, 8))
+
+    def __init__(self, font):
+        self.font = font
+        self.offsets = {}
+        self.position = 0
+        self.next_object = 8
+        self.pages = []
+        self.used = {}
+
+    def emit(self, data):
+        if isinstance(data, str):
+            data = data.encode("latin-1")
+        self.position += len(data)
+        return data
+
+    def begin_object(self, number):
+        self.offsets[number] = self.position
+        return self.emit(f"{number} 0 obj\n")
+
+    def write_object(self, number, body):
+        return self.begin_object(number) + self.emit(f"{body}\nendobj\n")
+
+    def write_stream(self, number, content, extra=""):
+        content = zlib.compress(content)
+        return (
+            self.begin_object(number)
+            + self.emit(
+                f"<< /Length {len(content)} {extra}/Filter /FlateDecode >>"
+                "\nstream\n")
+            + self.emit(content)
+            + self.emit("\nendstream\nendobj\n")
+        )
+
+    def allocate(self):
+        number = self.next_object
+        self.next_object += 1
+        return number
+
+    def encode(self, text):
+        glyphs = []
+        for char in text:
+            glyph = self.font.glyph(char)
+            self.used.setdefault(glyph, char)
+            glyphs.append(f"{glyph:04X}")
+        return f"<{''.join(glyphs)}>"
+
+    def wrap(self, text, size):
+        limit = PAGE_WIDTH - 2 * MARGIN
+        line = ""
+        for word in text.split(" "):
+            candidate = f"{line} {word}" if line else word
+            if line and self.font.text_width(candidate, size) > limit:
+                yield line
+                line = word
+            else:
+                line = candidate
+        yield line
+
+    def write_page(self, commands):
+        content = "\n".join(commands).encode("latin-1")
+        contents, page = self.allocate(), self.allocate()
+        self.pages.append(page)
+        return self.write_stream(contents, content) + self.write_object(
+            page,
+            f"<< /Type /Page /Parent {self.PAGES} 0 R "
+            f"/MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+            f"/Resources << /Font << /F1 {self.FONT} 0 R >> >> "
+            f"/Contents {contents} 0 R >>",
+        )
+
+    def iter_pages(self, title, lines):
+        per_page = (PAGE_HEIGHT - 2 * MARGIN) // LEADING
+        commands = [
+            "BT",
+            f"/F1 {TITLE_SIZE} Tf {LEADING} TL",
+            f"{MARGIN} {PAGE_HEIGHT - MARGIN} Td",
+            f"{self.encode(title)} Tj T* T*",
+            f"/F1 {FONT_SIZE} Tf",
+        ]
+        used = 2
+        for line in lines:
+            for part in self.wrap(line, FONT_SIZE):
+                if used == per_page:
+                    yield self.write_page(commands + ["ET"])
+                    commands = [
+                        "BT",
+                        f"/F1 {FONT_SIZE} Tf {LEADING} TL",
+                        f"{MARGIN} {PAGE_HEIGHT - MARGIN} Td",
+                    ]
+                    used = 0
+                commands.append(f"{self.encode(part)} Tj T*")
+                used += 1
+        yield self.write_page(commands + ["ET"])
+
+    def write_fonts(self):
+        font = self.font
+        widths = " ".join(
+            f"{glyph} [{font.width(glyph)}]" for glyph in sorted(self.used))
+        yield self.write_object(
+            self.FONT,
+            f"<< /Type /Font /Subtype /Type0 /BaseFont /{font.name} "
+            f"/Encoding /Identity-H /DescendantFonts [{self.CID_FONT} 0 R] "
+            f"/ToUnicode {self.TO_UNICODE} 0 R >>",
+        )
+        yield self.write_object(
+            self.CID_FONT,
+            f"<< /Type /Font /Subtype /CIDFontType2 /BaseFont /{font.name} "
+            "/CIDSystemInfo << /Registry (Adobe) /Ordering (Identity) "
+            "/Supplement 0 >> "
+            f"/FontDescriptor {self.DESCRIPTOR} 0 R "
+            f"/CIDToGIDMap /Identity /W [{widths}] >>",
+        )
+        yield self.write_object(
+            self.DESCRIPTOR,
+            f"<< /Type /FontDescriptor /FontName /{font.name} /Flags 32 "
+            f"/FontBBox [{' '.join(map(str, font.bbox))}] /ItalicAngle 0 "
+            f"/Ascent {font.ascent} /Descent {font.descent} "
+            f"/CapHeight {font.ascent} /StemV 80 "
+            f"/FontFile2 {self.FONT_FILE} 0 R >>",
+        )
+        font_file = font.subset(self.used)
+        yield self.write_stream(
+            self.FONT_FILE, font_file, f"/Length1 {len(font_file)} ")
+
+        mappings = [
+            f"<{glyph:04X}> <{char.encode('utf-16-be').hex().upper()}>"
+            for glyph, char in sorted(self.used.items())
+        ]
+        cmap = (
+            "/CIDInit /ProcSet findresource begin\n12 dict begin\n"
+            "begincmap\n/CIDSystemInfo << /Registry (Adobe) "
+            "/Ordering (UCS) /Supplement 0 >> def\n"
+            "/CMapName /Adobe-Identity-UCS def\n/CMapType 2 def\n"
+            "1 begincodespacerange\n<0000> <FFFF>\nendcodespacerange\n"
+        )
+        for start in range(0, len(mappings), 100):
+            chunk = mappings[start:start + 100]
+            cmap += f"{len(chunk)} beginbfchar\n"
+            cmap += "\n".join(chunk) + "\nendbfchar\n"
+        cmap += "endcmap\nCMapName currentdict /CMap defineresource pop\n"
+        cmap += "end\nend"
+        yield self.write_stream(self.TO_UNICODE, cmap.encode("latin-1"))
+
+    def iter_document(self, title, lines):
+        yield self.emit(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        yield self.write_object(
+            self.CATALOG, f"<< /Type /Catalog /Pages {self.PAGES} 0 R >>")
+        yield from self.iter_pages(title, lines)
+        kids = " ".join(f"{page} 0 R" for page in self.pages)
+        yield self.write_object(
+            self.PAGES,
+            f"<< /Type /Pages /Kids [{kids}] /Count {len(self.pages)} >>",
+        )
+        yield from self.write_fonts()
+
+        xref = self.position
+        entries = "".join(
+            f"{self.offsets[number]:010} 00000 n \n"
+            for number in range(1, self.next_object)
+        )
+        yield self.emit(
+            f"xref\n0 {self.next_object}\n0000000000 65535 f \n{entries}"
+            f"trailer\n<< /Size {self.next_object} "
+            f"/Root {self.CATALOG} 0 R >>\nstartxref\n{xref}\n%%EOF\n"
+        )
+
+
+@lru_cache(maxsize=None)
+def load_font(path):
+    return TrueTypeFont(path)
+
+
+def stream_pdf(title, lines, font_path):
+    return PDFStreamWriter(load_font(font_path)).iter_document(title, lines)
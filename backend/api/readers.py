@@ -0,0 +1,104 @@
+from collections import defaultdict
+
+from api.resolvers import get_subscription_resolver
+from recipes.models import Recipe, RecipeIngredient
+from users.models import User
+
+RECIPE_FIELDS = (
+    "id",
+    "name",
+    "text",
+    "image",
+    "cooking_time",
+    "favorites_count",
+    "shopping_cart_count",
+)
+AUTHOR_FIELDS = ("id", "email", "username", "first_name", "last_name")
+
+
+class RecipeReader:
+    def __init__(self, request):
+        self.request = request
+        self.recipe_storage = Recipe._meta.get_field("image").storage
+        self.avatar_storage = User._meta.get_field("avatar").storage
+
+    def rows(self, queryset):
+        ordering = {field.lstrip("-") for field in queryset.query.order_by}
+        return queryset.prefetch_related(None).values(
+            *RECIPE_FIELDS,
+            *(f"author__{field}" for field in AUTHOR_FIELDS),
+            "author__avatar",
+            *queryset.query.annotations,
+            *(ordering - {"pk", *RECIPE_FIELDS, *queryset.query.annotations}),
+        )
+
+    def file_url(self, storage, name):
+        if not name:
+            return None
+        return self.request.build_absolute_uri(storage.url(name))
+
+    def load_tags(self, recipe_ids):
+        tags = defaultdict(list)
+        rows = Recipe.tags.through.objects.filter(
+            recipe_id__in=recipe_ids
+        ).order_by("tag__name").values_list(
+            "recipe_id", "tag_id", "tag__name", "tag__slug")
+        for recipe_id, tag_id, name, slug in rows:
+            tags[recipe_id].append({"id": tag_id, "name": name, "slug": slug})
+        return tags
+
+    def load_ingredients(self, recipe_ids):
+        ingredients = defaultdict(list)
+        for recipe_id, ingredient_id, name, unit, amount in (
+            RecipeIngredient.objects.filter(recipe_id__in=recipe_ids)
+            .order_by("pk")
+            .values_list(
+                "recipe_id",
+                "ingredients_id",
+                "ingredients__name",
+                "ingredients__measurement_unit",
+                "amount",
+            )
+        ):
+            ingredients[recipe_id].append({
+                "id": ingredient_id,
+                "name": name,
+                "measurement_unit": unit,
+                "amount": amount,
+            })
+        return ingredients
+
+    def render(self, rows):
+        rows = list(rows)
+        recipe_ids = [row["id"] for row in rows]
+        tags = self.load_tags(recipe_ids)
+        ingredients = self.load_ingredients(recipe_ids)
+        resolver = get_subscription_resolver(self.request)
+        resolver.prime(row["author__id"] for row in rows)
+
+        return [
+            {
+                "id": row["id"],
+                "name": row["name"],
+                "text": row["text"],
+                "image": self.file_url(self.recipe_storage, row["image"]),
+                "tags": tags[row["id"]],
+                "ingredients": ingredients[row["id"]],
+                "author": {
+                    **{
+                        field: row[f"author__{field}"]
+                        for field in AUTHOR_FIELDS
+                    },
+                    "is_subscribed": resolver.is_subscribed(
+                        row["author__id"]),
+                    "avatar": self.file_url(
+                        self.avatar_storage, row["author__avatar"]),
+                },
+                "cooking_time": row["cooking_time"],
+                "is_favorited": bool(row["is_favorited"]),
+                "is_in_shopping_cart": bool(row["is_in_shopping_cart"]),
+                "favorites_count": row["favorites_count"],
+                "shopping_cart_count": row["shopping_cart_count"],
+            }
+            for row in rows
+        ]
@@ -0,0 +1,40 @@
+from users.models import Subscription
+
+
+class SubscriptionResolver:
+    def __init__(self, user):
+        self.user = user
+        self.loaded = set()
+        self.followed = set()
+
+    def prime(self, author_ids):
+        if self.user.is_anonymous:
+            return
+        missing = set(author_ids) - self.loaded
+        if not missing:
+            return
+        self.followed.update(
+            Subscription.objects.filter(
+                user=self.user, subscription_id__in=missing
+            ).values_list("subscription_id", flat=True)
+        )
+        self.loaded |= missing
+
+    def mark_subscribed(self, author_ids):
+        author_ids = set(author_ids)
+        self.loaded |= author_ids
+        self.followed |= author_ids
+
+    def is_subscribed(self, author_id):
+        if self.user.is_anonymous:
+            return False
+        self.prime([author_id])
+        return author_id in self.followed
+
+
+def get_subscription_resolver(request):
+    resolver = getattr(request, "subscription_resolver", None)
+    if resolver is None:
+        resolver = SubscriptionResolver(request.user)
+        request.subscription_resolver = resolver
+    return resolver
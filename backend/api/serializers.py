@@ -1,14 +1,21 @@
 import base64
 
 from django.core.files.base import ContentFile
+from django.db import models, transaction
 from djoser.serializers import UserCreateSerializer
 from rest_framework import serializers
 from rest_framework.exceptions import NotAuthenticated
 
 from api.mixins import ImageMixin
-from core.constants import MAX_VALUE_MODEL, MIN_VALUE_MODEL
+from api.resolvers import get_subscription_resolver
+from core.constants import MAX_BATCH_SIZE, MAX_VALUE_MODEL, MIN_VALUE_MODEL
 from core.models import Ingredient, Tag
-from recipes.models import Recipe, RecipeIngredient
+from recipes.models import (
+    Recipe,
+    RecipeIngredient,
+    ShoppingListItem,
+    TimelineEntry,
+)
 from users.models import Subscription, User
 
 
@@ -21,20 +28,52 @@ class Base64ImageField(serializers.ImageField):
         return super().to_internal_value(data)
 
 
+class SubscribedListSerializer(serializers.ListSerializer):
+    user_id_field = "id"
+
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.Manager) else data
+        get_subscription_resolver(self.context["request"]).prime(
+            getattr(item, self.user_id_field) for item in iterable
+        )
+        return super().to_representation(iterable)
+
+
+class RecipeListSerializer(SubscribedListSerializer):
+    user_id_field = "author_id"
+
+
 class TagSerializer(serializers.ModelSerializer):
     class Meta:
         model = Tag
-        fields = "__all__"
+        fields = ("id", "name", "slug")
 
 
 class IngredientSerializer(serializers.ModelSerializer):
     class Meta:
         model = Ingredient
-        fields = "__all__"
+        fields = ("id", "name", "measurement_unit")
+
+
+class IngredientSearchSerializer(serializers.Serializer):
+    name = serializers.CharField(required=False, allow_blank=True)
+    limit = serializers.IntegerField(
+        min_value=MIN_VALUE_MODEL,
+        max_value=MAX_VALUE_MODEL,
+        required=False,
+    )
+
+
+class CatalogSinceSerializer(serializers.Serializer):
+    since = serializers.IntegerField(min_value=0, required=False)
+
+
+class RecipeExportSerializer(serializers.Serializer):
+    since_id = serializers.IntegerField(min_value=0, required=False)
 
 
 class IngredientInRecipeSerializer(serializers.Serializer):
-    id = serializers.PrimaryKeyRelatedField(queryset=Ingredient.objects.all())
+    id = serializers.IntegerField(min_value=1)
     amount = serializers.IntegerField(
         min_value=MIN_VALUE_MODEL,
         max_value=MAX_VALUE_MODEL
@@ -64,6 +103,25 @@ class RecipeSubscriptionSerializer(serializers.ModelSerializer):
         )
 
 
+class RecipeIdsSerializer(serializers.Serializer):
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=MAX_BATCH_SIZE,
+    )
+
+    def validate_recipes(self, value):
+        recipe_ids = list(dict.fromkeys(value))
+        found = set(Recipe.objects.filter(
+            id__in=recipe_ids).values_list("id", flat=True))
+        missing = [
+            recipe_id for recipe_id in recipe_ids if recipe_id not in found]
+        if missing:
+            raise serializers.ValidationError(
+                f"Recipes do not exist: {missing}.")
+        return recipe_ids
+
+
 class AvatarSerializer(serializers.ModelSerializer):
     avatar = Base64ImageField(required=True)
 
@@ -91,19 +149,24 @@ class UserSerializer(UserCreateSerializer):
 
     class Meta(UserCreateSerializer.Meta):
         fields = UserCreateSerializer.Meta.fields + ("is_subscribed", "avatar")
+        list_serializer_class = SubscribedListSerializer
 
     def get_is_subscribed(self, obj):
-        user = self.context["request"].user
-        if user.is_anonymous:
-            return False
-        return obj.subscribed_to.filter(user=user).exists()
+        return get_subscription_resolver(
+            self.context["request"]).is_subscribed(obj.id)
+
+
+class RecipesLimitSerializer(serializers.Serializer):
+    recipes_limit = serializers.IntegerField(
+        min_value=0,
+        max_value=MAX_VALUE_MODEL,
+        required=False,
+    )
 
 
 class SubscriptionSerializer(serializers.ModelSerializer):
     is_subscribed = serializers.SerializerMethodField()
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.IntegerField(
-        source="recipes.count", read_only=True)
 
     class Meta:
         model = User
@@ -117,7 +180,9 @@ class SubscriptionSerializer(serializers.ModelSerializer):
             "avatar",
             "recipes",
             "recipes_count",
+            "subscribers_count",
         )
+        list_serializer_class = SubscribedListSerializer
         validators = [
             serializers.UniqueTogetherValidator(
                 queryset=Subscription.objects.all(),
@@ -126,30 +191,22 @@ class SubscriptionSerializer(serializers.ModelSerializer):
         ]
 
     def get_recipes(self, obj):
-        request = self.context.get("request")
-        limit = request.query_params.get("recipes_limit")
-        if limit:
-            limit = int(limit)
-
-        queryset = obj.recipes.all()[:limit]
+        queryset = getattr(obj, "limited_recipes", None)
+        if queryset is None:
+            queryset = obj.recipes.all()[:self.context.get("recipes_limit")]
 
         return RecipeSubscriptionSerializer(
             queryset, many=True, context=self.context
         ).data
 
     def get_is_subscribed(self, obj):
-        user = self.context["request"].user
-        if user.is_anonymous:
-            return False
-        return obj.subscribed_to.filter(user=user).exists()
+        return get_subscription_resolver(
+            self.context["request"]).is_subscribed(obj.id)
 
 
 class RecipeWriteSerializer(serializers.ModelSerializer, ImageMixin):
     ingredients = IngredientInRecipeSerializer(many=True)
-    tags = serializers.PrimaryKeyRelatedField(
-        many=True,
-        queryset=Tag.objects.all(),
-    )
+    tags = serializers.ListField(child=serializers.IntegerField(min_value=1))
     cooking_time = serializers.IntegerField(
         min_value=MIN_VALUE_MODEL,
         max_value=MAX_VALUE_MODEL)
@@ -170,18 +227,45 @@ class RecipeWriteSerializer(serializers.ModelSerializer, ImageMixin):
         )
         read_only_fields = ("id", "author")
 
-    def _save_ingredients(self, recipe, ingredients):
-        recipe.recipe_ingredients.all().delete()
-        RecipeIngredient.objects.bulk_create(
-            [
-                RecipeIngredient(
-                    recipe=recipe,
-                    ingredients=item["id"],
-                    amount=item["amount"],
+    def _save_ingredients(self, recipe, ingredients, created=False):
+        existing = {} if created else {
+            item.ingredients_id: item
+            for item in RecipeIngredient.objects.filter(
+                recipe=recipe).order_by()
+        }
+        to_create, to_update = [], []
+        for item in ingredients:
+            row = existing.pop(item["id"], None)
+            if row is None:
+                to_create.append(
+                    RecipeIngredient(
+                        recipe=recipe,
+                        ingredients_id=item["id"],
+                        amount=item["amount"],
+                    )
                 )
-                for item in ingredients
-            ]
-        )
+            elif row.amount != item["amount"]:
+                row.amount = item["amount"]
+                to_update.append(row)
+        if not (to_create or to_update or existing):
+            return
+
+        if not created:
+            ShoppingListItem.objects.apply_recipe(recipe.id, -1)
+        if existing:
+            RecipeIngredient.objects.filter(
+                pk__in=[row.pk for row in existing.values()]).delete()
+        RecipeIngredient.objects.bulk_update(to_update, ["amount"])
+        RecipeIngredient.objects.bulk_create(to_create)
+        if not created:
+            ShoppingListItem.objects.apply_recipe(recipe.id, 1)
+
+    def _missing(self, model, ids):
+        found = self.context.get("known_ids", {}).get(model)
+        if found is None:
+            found = set(model.objects.filter(
+                id__in=ids).values_list("id", flat=True))
+        return [pk for pk in ids if pk not in found]
 
     def validate(self, data):
         if (
@@ -210,6 +294,12 @@ class RecipeWriteSerializer(serializers.ModelSerializer, ImageMixin):
                     )
                 vaild_ingredients[ingredient] = True
 
+            missing = self._missing(Ingredient, list(vaild_ingredients))
+            if missing:
+                raise serializers.ValidationError(
+                    {"ingredients": f"Ingredients do not exist: {missing}."}
+                )
+
         tags = data.get("tags")
         if tags is not None:
             if not tags:
@@ -225,8 +315,15 @@ class RecipeWriteSerializer(serializers.ModelSerializer, ImageMixin):
                     )
                 valid_tags[tag] = True
 
+            missing = self._missing(Tag, list(valid_tags))
+            if missing:
+                raise serializers.ValidationError(
+                    {"tags": f"Tags do not exist: {missing}."}
+                )
+
         return data
 
+    @transaction.atomic
     def create(self, validated_data):
         request = self.context.get("request")
         ingredients = validated_data.pop("ingredients")
@@ -234,14 +331,20 @@ class RecipeWriteSerializer(serializers.ModelSerializer, ImageMixin):
         validated_data["author"] = self.context["request"].user
 
         if request.user.is_authenticated:
-            recipe = Recipe.objects.create(**validated_data)
+            recipe = Recipe.objects.create(
+                **validated_data,
+                fanned_out=TimelineEntry.objects.fans_out(request.user),
+            )
             recipe.tags.set(tags)
 
-            self._save_ingredients(recipe, ingredients)
+            self._save_ingredients(recipe, ingredients, created=True)
+            Recipe.objects.filter(pk=recipe.pk).update_search_vector()
+            TimelineEntry.objects.fan_out([recipe.pk])
 
             return recipe
         raise NotAuthenticated("Authentication credentials were not provided.")
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         ingredients = validated_data.pop("ingredients", None)
         tags = validated_data.pop("tags", None)
@@ -267,8 +370,8 @@ class RecipeReadSerializer(serializers.ModelSerializer, ImageMixin):
     tags = TagSerializer(many=True)
     author = UserSerializer(read_only=True)
     cooking_time = serializers.IntegerField(min_value=1)
-    is_favorited = serializers.SerializerMethodField()
-    is_in_shopping_cart = serializers.SerializerMethodField()
+    is_favorited = serializers.BooleanField(read_only=True)
+    is_in_shopping_cart = serializers.BooleanField(read_only=True)
 
     class Meta:
         model = Recipe
@@ -283,16 +386,7 @@ class RecipeReadSerializer(serializers.ModelSerializer, ImageMixin):
             "cooking_time",
             "is_favorited",
             "is_in_shopping_cart",
+            "favorites_count",
+            "shopping_cart_count",
         )
-
-    def get_is_favorited(self, obj):
-        user = self.context["request"].user
-        if user.is_authenticated:
-            return obj.favorited_by.filter(user=user).exists()
-        return False
-
-    def get_is_in_shopping_cart(self, obj):
-        user = self.context["request"].user
-        if user.is_authenticated:
-            return obj.in_shopping_carts.filter(user=user).exists()
-        return False
+        list_serializer_class = RecipeListSerializer
@@ -1,29 +1,62 @@
-from django.db.models import Sum
-from django.http import HttpResponse
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Max
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.urls import reverse
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet
 from rest_framework import generics, mixins, status, viewsets
 from rest_framework.decorators import action
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
-
-from api.filters import IngredientNameFilter, RecipeFilter
+from rest_framework.views import APIView
+
+from api.caching import AnonymousResponseCacheMixin, ConditionalGetMixin
+from api.exports import SHOPPING_LIST_EXPORTS, export_recipes
+from api.filters import RecipeFilter
+from api.imports import import_recipes
+from api.pagination import (
+    CursorOptInPagination,
+    FeedPagination,
+    RecipePagination,
+)
+from api.pdf import load_font
 from api.permissions import IsAuthorOrReadOnly
+from api.readers import RecipeReader
+from api.renderers import (
+    CSVExportRenderer,
+    ExportContentNegotiation,
+    FastJSONRenderer,
+    PDFExportRenderer,
+    TextExportRenderer,
+)
+from api.resolvers import get_subscription_resolver
 from api.serializers import (
     AvatarSerializer,
+    CatalogSinceSerializer,
+    IngredientSearchSerializer,
     IngredientSerializer,
+    RecipeExportSerializer,
+    RecipeIdsSerializer,
     RecipeReadSerializer,
+    RecipesLimitSerializer,
     RecipeSubscriptionSerializer,
     RecipeWriteSerializer,
     SubscriptionSerializer,
     TagSerializer,
 )
-from core.models import Ingredient, Tag
-from recipes.models import Favorite, Recipe, RecipeIngredient, ShoppingCart
+from core.models import CatalogChange, Ingredient, Tag
+from core.search import get_index_version, ingredient_index
+from recipes.models import Favorite, Recipe, ShoppingCart, ShoppingListItem
 from users.models import Subscription, User
 
+EXPORT_CHUNK_SIZE = 2000
+FACETS_QUERY_PARAM = "facets"
+FACETS_ENABLED = ("1", "true")
+
 
 class BaseViewSet(
     mixins.CreateModelMixin, mixins.DestroyModelMixin, viewsets.GenericViewSet
@@ -36,56 +69,155 @@ class BaseViewSet(
         return self.model.objects.filter(user=self.request.user)
 
     def create(self, request, *_, **kwargs):
-        recipe_id = kwargs.get("id")
-        recipe = get_object_or_404(Recipe, id=recipe_id)
-        obj = self.model.objects.filter(user=request.user, recipe=recipe)
+        recipe = get_object_or_404(Recipe, id=kwargs.get("id"))
 
-        if obj.exists():
+        if not self.model.objects.add(request.user.id, [recipe.id]):
             return Response(
                 {"detail": self.error_add}, status=status.HTTP_400_BAD_REQUEST
             )
 
-        self.model.objects.create(user=request.user, recipe=recipe)
         serializer = RecipeSubscriptionSerializer(
             recipe, context={"request": request})
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     def destroy(self, request, *_, **kwargs):
         recipe_id = kwargs.get("id")
-        recipe = get_object_or_404(Recipe, id=recipe_id)
-        obj = self.model.objects.filter(user=request.user, recipe=recipe)
 
-        if not obj.exists():
+        if not self.model.objects.remove(request.user.id, [recipe_id]):
+            get_object_or_404(Recipe, id=recipe_id)
             return Response(
                 {"detail": self.error_delete},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        obj.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    def get_recipe_ids(self, request):
+        serializer = RecipeIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data["recipes"]
+
+    def batch_create(self, request, *_, **__):
+        added = self.model.objects.add(
+            request.user.id, self.get_recipe_ids(request))
+        return Response({"added": added}, status=status.HTTP_200_OK)
+
+    def batch_destroy(self, request, *_, **__):
+        removed = self.model.objects.remove(
+            request.user.id, self.get_recipe_ids(request))
+        return Response({"removed": removed}, status=status.HTTP_200_OK)
+
 
 class TagViewSet(
-    viewsets.GenericViewSet, mixins.ListModelMixin, mixins.RetrieveModelMixin
+    ConditionalGetMixin,
+    viewsets.GenericViewSet,
+    mixins.ListModelMixin,
+    mixins.RetrieveModelMixin,
 ):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     pagination_class = None
 
+    def list(self, request, *args, **kwargs):
+        response = self.get_early_response()
+        if response is not None:
+            return response
+        return super().list(request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        response = self.get_early_response()
+        if response is not None:
+            return response
+        return super().retrieve(request, *args, **kwargs)
+
 
 class IngredientViewSet(
-    viewsets.GenericViewSet, mixins.ListModelMixin, mixins.RetrieveModelMixin
+    ConditionalGetMixin,
+    viewsets.GenericViewSet,
+    mixins.ListModelMixin,
+    mixins.RetrieveModelMixin,
 ):
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     pagination_class = None
-    filter_backends = [IngredientNameFilter]
-    search_fields = ["^name"]
+    filter_backends = []
+
+    def get_list_state(self, queryset):
+        return {"version": get_index_version()}
+
+    def list(self, request, *args, **kwargs):
+        params = IngredientSearchSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        response = self.get_early_response()
+        if response is not None:
+            return response
+        name = params.validated_data.get("name", "").strip()
+        if not name:
+            return super().list(request, *args, **kwargs)
+        return Response(ingredient_index.search(
+            name, params.validated_data.get("limit")))
+
+    def retrieve(self, request, *args, **kwargs):
+        response = self.get_early_response()
+        if response is not None:
+            return response
+        return super().retrieve(request, *args, **kwargs)
+
+
+class CatalogView(APIView):
+    permission_classes = [AllowAny]
+    catalog = {
+        CatalogChange.TAG: ("tags", Tag, TagSerializer),
+        CatalogChange.INGREDIENT: (
+            "ingredients", Ingredient, IngredientSerializer),
+    }
 
+    def get_changes(self, since, version):
+        if not since or since > version:
+            return dict.fromkeys(self.catalog)
+        changes = {model: {} for model in self.catalog}
+        for model, object_id, deleted in CatalogChange.objects.filter(
+            id__gt=since, id__lte=version
+        ).values_list("model", "object_id", "deleted"):
+            if object_id is None:
+                changes[model] = None
+            elif changes[model] is not None:
+                changes[model][object_id] = deleted
+        return changes
+
+    def get(self, request):
+        params = CatalogSinceSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        version = CatalogChange.objects.aggregate(
+            version=Max("id"))["version"] or 0
+        changed = self.get_changes(
+            params.validated_data.get("since", 0), version)
+
+        data = {"version": version, "full": {}, "deleted": {}}
+        for model, (key, model_class, serializer) in self.catalog.items():
+            queryset = model_class.objects.all()
+            data["full"][key] = changed[model] is None
+            if data["full"][key]:
+                data[key] = serializer(queryset, many=True).data
+                data["deleted"][key] = []
+                continue
+            data[key] = serializer(queryset.filter(id__in=[
+                object_id
+                for object_id, deleted in changed[model].items()
+                if not deleted
+            ]), many=True).data
+            present = {item["id"] for item in data[key]}
+            data["deleted"][key] = sorted(
+                object_id for object_id in changed[model]
+                if object_id not in present
+            )
+        return Response(data)
 
-class RecipeViewSet(viewsets.ModelViewSet):
-    queryset = Recipe.objects.all().order_by("-id")
+
+class RecipeViewSet(AnonymousResponseCacheMixin, viewsets.ModelViewSet):
+    lookup_value_regex = r"\d+"
     permission_classes = [IsAuthorOrReadOnly]
+    pagination_class = RecipePagination
     filter_backends = [DjangoFilterBackend]
     filterset_class = RecipeFilter
     serializer_classes = {
@@ -93,8 +225,16 @@ class RecipeViewSet(viewsets.ModelViewSet):
         "update": RecipeWriteSerializer,
         "partial_update": RecipeWriteSerializer,
     }
+    fast_read = True
+
+    def get_queryset(self):
+        if self.action in ("update", "partial_update", "destroy"):
+            return Recipe.objects.defer("search_vector")
+        return Recipe.objects.for_read(self.request.user).order_by("-id")
 
     def build_response(self, instance, status_code):
+        instance = Recipe.objects.for_read(
+            self.request.user).get(pk=instance.pk)
         serializer = RecipeReadSerializer(
             instance, context=self.get_serializer_context()
         )
@@ -107,6 +247,43 @@ class RecipeViewSet(viewsets.ModelViewSet):
     def get_serializer_class(self):
         return self.serializer_classes.get(self.action, RecipeReadSerializer)
 
+    def get_validator_queryset(self):
+        return Recipe.objects.all()
+
+    def list(self, request, *args, **kwargs):
+        response = self.get_early_response()
+        if response is not None:
+            return response
+        if not self.fast_read:
+            response = super().list(request, *args, **kwargs)
+        else:
+            reader = RecipeReader(request)
+            queryset = reader.rows(self.filter_queryset(self.get_queryset()))
+            page = self.paginate_queryset(queryset)
+            if page is None:
+                return Response(reader.render(queryset))
+            response = self.get_paginated_response(reader.render(page))
+        if request.query_params.get(FACETS_QUERY_PARAM) in FACETS_ENABLED:
+            response.data["facets"] = self.get_facets()
+        return response
+
+    def get_facets(self):
+        filterset = DjangoFilterBackend().get_filterset(
+            self.request, Recipe.objects.all(), self)
+        filterset.is_valid()
+        return filterset.get_facets()
+
+    def retrieve(self, request, *args, **kwargs):
+        response = self.get_early_response()
+        if response is not None:
+            return response
+        return super().retrieve(request, *args, **kwargs)
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        ShoppingListItem.objects.apply_recipe(instance.id, -1)
+        instance.delete()
+
     def create(self, request, *_, **__):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -122,6 +299,37 @@ class RecipeViewSet(viewsets.ModelViewSet):
         self.perform_update(serializer)
         return self.build_response(serializer.instance, status.HTTP_200_OK)
 
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="feed",
+        permission_classes=[IsAuthenticated],
+    )
+    def feed(self, request):
+        reader = RecipeReader(request)
+        paginator = FeedPagination()
+        page = paginator.paginate_queryset(
+            reader.rows(self.get_queryset()), request, self)
+        return paginator.get_paginated_response(reader.render(page))
+
+    @action(
+        detail=True,
+        methods=["get"],
+        url_path="similar",
+        permission_classes=[AllowAny],
+    )
+    def similar(self, request, pk):
+        recipes = list(Recipe.objects.filter(
+            similar_to__recipe_id=pk
+        ).annotate(
+            score=F("similar_to__score")
+        ).order_by("-score", "id"))
+        if not recipes:
+            get_object_or_404(Recipe, pk=pk)
+        serializer = RecipeSubscriptionSerializer(
+            recipes, many=True, context=self.get_serializer_context())
+        return Response(serializer.data)
+
     @action(
         detail=True,
         methods=["get"],
@@ -132,33 +340,70 @@ class RecipeViewSet(viewsets.ModelViewSet):
         path = reverse("recipes-detail", args=[pk])
         return Response({"short-link": request.build_absolute_uri(path)})
 
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="export",
+        permission_classes=[IsAdminUser],
+    )
+    def export(self, request):
+        serializer = RecipeExportSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        return StreamingHttpResponse(
+            export_recipes(serializer.validated_data.get("since_id", 0)),
+            content_type="application/x-ndjson",
+        )
+
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="import",
+        permission_classes=[IsAuthenticated],
+    )
+    def bulk_import(self, request):
+        return StreamingHttpResponse(
+            import_recipes(
+                request.stream or [], self.get_serializer_context()),
+            content_type="application/x-ndjson",
+        )
+
     @action(
         detail=False,
         methods=["get"],
         url_path="download_shopping_cart",
         permission_classes=[IsAuthenticated],
+        renderer_classes=[
+            TextExportRenderer,
+            CSVExportRenderer,
+            FastJSONRenderer,
+            PDFExportRenderer,
+        ],
+        content_negotiation_class=ExportContentNegotiation,
     )
     def download_shopping_cart(self, request):
+        export_format = request.accepted_renderer.format
+        content_type, export = SHOPPING_LIST_EXPORTS[export_format]
+        if export_format == "pdf":
+            try:
+                load_font(settings.SHOPPING_LIST_PDF_FONT)
+            except (OSError, ValueError):
+                return Response(
+                    {"detail": "PDF export is not available."},
+                    status=status.HTTP_406_NOT_ACCEPTABLE,
+                )
+
         ingredients = (
-            RecipeIngredient.objects.filter(
-                recipe__shopping_cart__user=request.user)
-            .values("ingredients__name", "ingredients__measurement_unit")
-            .annotate(total_amount=Sum("amount"))
+            ShoppingListItem.objects.filter(user=request.user)
+            .values_list(
+                "ingredient__name", "ingredient__measurement_unit", "amount")
+            .order_by("ingredient__name")
+            .iterator(chunk_size=EXPORT_CHUNK_SIZE)
         )
 
-        text = []
-        for ingredient in ingredients:
-            name = ingredient["ingredients__name"]
-            unit = ingredient["ingredients__measurement_unit"]
-            amount = ingredient["total_amount"]
-            text.append(f"{name}: {amount}{unit}")
-
-        text_result = "\n".join(text)
-        filename = "shopping_cart.txt"
-
-        response = HttpResponse(text_result, content_type="text/plain")
-        response["Content-Disposition"] = f'attachment; filename="{filename}"'
-
+        response = StreamingHttpResponse(
+            export(ingredients), content_type=content_type)
+        response["Content-Disposition"] = (
+            f'attachment; filename="shopping_cart.{export_format}"')
         return response
 
 
@@ -188,6 +433,20 @@ shopping_cart_view = ShoppingCartViewSet.as_view(
     }
 )
 
+favorite_batch_view = FavoriteViewSet.as_view(
+    {
+        "post": "batch_create",
+        "delete": "batch_destroy",
+    }
+)
+
+shopping_cart_batch_view = ShoppingCartViewSet.as_view(
+    {
+        "post": "batch_create",
+        "delete": "batch_destroy",
+    }
+)
+
 
 class CustomUserViewSet(UserViewSet):
     def get_permissions(self):
@@ -210,26 +469,51 @@ class AvatarView(generics.UpdateAPIView, generics.DestroyAPIView):
 
 class SubscriptionViewSet(viewsets.GenericViewSet):
     serializer_class = SubscriptionSerializer
+    pagination_class = CursorOptInPagination
 
     def get_author(self):
         return get_object_or_404(User, id=self.kwargs.get("pk"))
 
     def get_queryset(self):
-        return User.objects.filter(subscribed_to__user=self.request.user)
+        return User.objects.filter(
+            subscribed_to__user=self.request.user
+        ).order_by("username")
+
+    def get_recipes_limit(self):
+        serializer = RecipesLimitSerializer(data=self.request.query_params)
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data.get("recipes_limit")
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["recipes_limit"] = self.get_recipes_limit()
+        return context
+
+    def prepare_authors(self, authors, limit):
+        get_subscription_resolver(self.request).mark_subscribed(
+            author.id for author in authors
+        )
+        recipes = defaultdict(list)
+        for recipe in Recipe.objects.first_per_author(
+            [author.id for author in authors], limit
+        ):
+            recipes[recipe.author_id].append(recipe)
+        for author in authors:
+            author.limited_recipes = recipes[author.id]
+        return authors
 
     def list(self, request, *_, **__):
+        limit = self.get_recipes_limit()
         queryset = self.get_queryset()
         page = self.paginate_queryset(queryset)
 
         if page is not None:
             serializer = self.get_serializer(
-                page, many=True, context={"request": request}
-            )
+                self.prepare_authors(page, limit), many=True)
             return self.get_paginated_response(serializer.data)
 
         serializer = self.get_serializer(
-            queryset, many=True, context={"request": request}
-        )
+            self.prepare_authors(list(queryset), limit), many=True)
         return Response(serializer.data)
 
     def create(self, request, *_, **__):
@@ -250,10 +534,12 @@ class SubscriptionViewSet(viewsets.GenericViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
+        limit = self.get_recipes_limit()
         Subscription.objects.create(user=request.user, subscription=author)
 
-        serializer = SubscriptionSerializer(
-            author, context={"request": request})
+        author = self.get_queryset().get(pk=author.pk)
+        serializer = self.get_serializer(
+            self.prepare_authors([author], limit)[0])
 
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
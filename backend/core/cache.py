@@ -0,0 +1,51 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.db import transaction
+
+
+def get_version(key):
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(key):
+    cache.set(key, time.time_ns(), None)
+
+
+def get_response_cache():
+    if settings.RESPONSE_CACHE_ALIAS is None:
+        return None
+    return caches[settings.RESPONSE_CACHE_ALIAS]
+
+
+def tag_key(tag):
+    return f"cache_tag:{tag}"
+
+
+def get_tag_versions(tags):
+    backend = get_response_cache()
+    keys = {tag_key(tag): tag for tag in tags}
+    versions = backend.get_many(keys)
+    for key in keys.keys() - versions.keys():
+        backend.add(key, time.time_ns(), None)
+        versions[key] = backend.get(key)
+    return {keys[key]: version for key, version in versions.items()}
+
+
+def invalidate_tags(*tags):
+    backend = get_response_cache()
+    if backend is None or not tags:
+        return
+
+    def bump():
+        version = time.time_ns()
+        backend.set_many({tag_key(tag): version for tag in tags}, None)
+
+    bump()
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(bump)
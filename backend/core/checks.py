@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+
+PER_PROCESS_CACHES = ("django.core.cache.backends.locmem.LocMemCache",)
+
+
+@register()
+def shared_caches(app_configs, **kwargs):
+    if settings.WEB_CONCURRENCY <= 1:
+        return []
+    aliases = ["default"]
+    if settings.RESPONSE_CACHE_ALIAS is not None:
+        aliases.append(settings.RESPONSE_CACHE_ALIAS)
+    return [
+        Warning(
+            f"Cache '{alias}' is local to each process, but "
+            f"WEB_CONCURRENCY is {settings.WEB_CONCURRENCY}.",
+            hint="Invalidations will not reach other workers; use a shared "
+            "backend such as FileBasedCache or memcached.",
+            id="core.W001",
+        )
+        for alias in aliases
+        if settings.CACHES[alias]["BACKEND"] in PER_PROCESS_CACHES
+    ]
@@ -1,3 +1,20 @@
 MIN_VALUE_MODEL = 1
 MAX_VALUE_MODEL = 32000
 TITLE_STR_MAX_LENGTH = 30
+RECIPE_COUNT_VERSION_KEY = "recipe_count_version"
+USER_RECIPE_STATE_VERSION_KEY = "user_recipe_state_version:{}"
+SEARCH_CONFIG = "russian"
+TAG_SLUGS_CACHE_KEY = "tag_slugs"
+TAG_SLUGS_CACHE_TIMEOUT = 300
+MAX_BATCH_SIZE = 100
+RECIPE_LIST_CACHE_TAG = "recipes"
+RECIPE_POPULAR_CACHE_TAG = "recipes:popular"
+RECIPE_CACHE_TAG = "recipe:{}"
+AUTHOR_CACHE_TAG = "author:{}"
+TAG_CACHE_TAG = "tag:{}"
+RECIPE_TRENDING_VERSION_KEY = "recipe_trending_version"
+TRENDING_WINDOW_DAYS = 7
+TRENDING_FAVORITE_WEIGHT = 2
+TRENDING_CART_WEIGHT = 1
+COOKING_TIME_BUCKETS = ((None, 15), (16, 30), (31, 60), (61, None))
+CATALOG_CHANGE_LOCK_ID = 7316001
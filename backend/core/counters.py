@@ -0,0 +1,27 @@
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+
+class CounterFieldsMixin:
+    counter_fields = ()
+
+    def save(self, *args, **kwargs):
+        if (
+            kwargs.get("update_fields") is None
+            and not kwargs.get("force_insert")
+            and not self._state.adding
+        ):
+            deferred = self.get_deferred_fields()
+            kwargs["update_fields"] = [
+                field.attname
+                for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.counter_fields
+                and field.attname not in deferred
+            ]
+        super().save(*args, **kwargs)
+
+
+def shift_counter(queryset, field, delta, **fields):
+    return queryset.update(
+        **{field: Greatest(F(field) + delta, 0)}, **fields)
@@ -0,0 +1,198 @@
+import csv
+import io
+import json
+import time
+from itertools import islice
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from core.cache import invalidate_tags
+from core.constants import RECIPE_CACHE_TAG, RECIPE_LIST_CACHE_TAG
+from core.models import CatalogChange, Ingredient
+from core.search import bump_index_version
+from recipes.models import Recipe, RecipeIngredient
+
+DEFAULT_PATH = settings.BASE_DIR.parent / "data" / "ingredients.csv"
+CHUNK_SIZE = 64 * 1024
+
+
+def iter_csv(file, skip):
+    reader = csv.reader(file)
+    for row in reader:
+        if not row:
+            continue
+        if len(row) < 2 or not row[0] or not row[1]:
+            skip(f"line {reader.line_num}")
+            continue
+        yield row[0], row[1]
+
+
+def iter_json(file, skip):
+    decoder = json.JSONDecoder()
+    buffer = file.read(CHUNK_SIZE).lstrip()
+    if not buffer.startswith("["):
+        raise CommandError("JSON catalog must be an array of objects.")
+    position = 1
+    index = 0
+    while True:
+        while position < len(buffer) and buffer[position] in " \t\r\n,":
+            position += 1
+        if buffer.startswith("]", position):
+            return
+        try:
+            item, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            chunk = file.read(CHUNK_SIZE)
+            if not chunk:
+                raise CommandError("Unexpected end of JSON catalog.")
+            buffer = buffer[position:] + chunk
+            position = 0
+            continue
+        position = end
+        index += 1
+        if (
+            isinstance(item, dict)
+            and item.get("name")
+            and item.get("measurement_unit")
+        ):
+            yield item["name"], item["measurement_unit"]
+        else:
+            skip(f"item {index}")
+
+
+READERS = {
+    ".csv": iter_csv,
+    ".json": iter_json,
+}
+
+
+def batched(rows, size):
+    rows = iter(rows)
+    while True:
+        batch = dict(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+class Command(BaseCommand):
+    help = "Load the ingredient catalog from a CSV or JSON file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", nargs="?", default=str(DEFAULT_PATH))
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--no-copy",
+            action="store_true",
+            help="Use bulk_create even on PostgreSQL.",
+        )
+
+    def handle(self, *args, **options):
+        path = Path(options["path"])
+        reader = READERS.get(path.suffix.lower())
+        if reader is None:
+            raise CommandError(f"Unsupported catalog format: {path.suffix}")
+        if not path.exists():
+            raise CommandError(f"File not found: {path}")
+
+        use_copy = (
+            connection.vendor == "postgresql" and not options["no_copy"]
+        )
+        upsert = self.upsert_copy if use_copy else self.upsert_bulk
+
+        total = 0
+        skipped = []
+        started = time.monotonic()
+        with path.open(encoding="utf-8", newline="") as file:
+            with transaction.atomic():
+                if use_copy:
+                    self.create_staging_table()
+                touched = 0
+                for batch in batched(
+                    reader(file, skipped.append), options["batch_size"]
+                ):
+                    total += len(batch)
+                    touched += self.touch_recipes(upsert(batch))
+                if touched:
+                    invalidate_tags(RECIPE_LIST_CACHE_TAG)
+                CatalogChange.objects.record(CatalogChange.INGREDIENT)
+        elapsed = time.monotonic() - started
+        bump_index_version()
+
+        for location in skipped:
+            self.stderr.write(self.style.WARNING(
+                f"Skipped malformed {location}."))
+        self.stdout.write(self.style.SUCCESS(
+            f"Loaded {total} ingredients in {elapsed:.2f}s "
+            f"({total / elapsed if elapsed else total:.0f} rows/s, "
+            f"{'COPY' if use_copy else 'bulk_create'})."
+        ))
+
+    def create_staging_table(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS ingredient_import "
+                "(name varchar(100), measurement_unit varchar(20)) "
+                "ON COMMIT DROP"
+            )
+
+    def upsert_copy(self, batch):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(batch.items())
+        buffer.seek(0)
+        table = Ingredient._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                "COPY ingredient_import (name, measurement_unit) "
+                "FROM STDIN WITH (FORMAT csv)",
+                buffer,
+            )
+            cursor.execute(
+                f"INSERT INTO {table} (name, measurement_unit, updated_at) "
+                "SELECT name, measurement_unit, now() FROM ingredient_import "
+                "ON CONFLICT (name) DO UPDATE "
+                "SET measurement_unit = EXCLUDED.measurement_unit, "
+                "updated_at = now() "
+                f"WHERE {table}.measurement_unit "
+                "IS DISTINCT FROM EXCLUDED.measurement_unit "
+                "RETURNING id"
+            )
+            changed = [row[0] for row in cursor.fetchall()]
+            cursor.execute("TRUNCATE ingredient_import")
+        return changed
+
+    def upsert_bulk(self, batch):
+        existing = Ingredient.objects.filter(name__in=batch).only(
+            "id", "name", "measurement_unit", "updated_at"
+        )
+        changed = []
+        now = timezone.now()
+        for ingredient in existing:
+            unit = batch.pop(ingredient.name)
+            if ingredient.measurement_unit != unit:
+                ingredient.measurement_unit = unit
+                ingredient.updated_at = now
+                changed.append(ingredient)
+        Ingredient.objects.bulk_update(
+            changed, ["measurement_unit", "updated_at"])
+        Ingredient.objects.bulk_create(
+            Ingredient(name=name, measurement_unit=unit)
+            for name, unit in batch.items()
+        )
+        return [ingredient.pk for ingredient in changed]
+
+    def touch_recipes(self, ingredient_ids):
+        if not ingredient_ids:
+            return 0
+        recipe_ids = set(RecipeIngredient.objects.filter(
+            ingredients_id__in=ingredient_ids
+        ).values_list("recipe_id", flat=True))
+        if recipe_ids:
+            Recipe.objects.filter(pk__in=recipe_ids).touch()
+            invalidate_tags(
+                *(RECIPE_CACHE_TAG.format(pk) for pk in recipe_ids))
+        return len(recipe_ids)
@@ -0,0 +1,111 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.regex_helper import _lazy_re_compile
+from django.utils.text import compress_sequence, compress_string
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ENCODING_PREFERENCE = ("br", "gzip")
+STRONG_ETAG = _lazy_re_compile(r'^"[^"]*"$')
+
+
+def parse_accept_encoding(header):
+    accepted = {}
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if coding:
+            accepted[coding.strip().lower()] = quality
+    return accepted
+
+
+def choose_encoding(header):
+    accepted = parse_accept_encoding(header)
+    available = [
+        coding for coding in ENCODING_PREFERENCE
+        if coding != "br" or brotli is not None
+    ]
+    best, best_quality = None, 0.0
+    for coding in available:
+        quality = accepted.get(coding, accepted.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+def brotli_sequence(sequence):
+    compressor = brotli.Compressor(quality=settings.BROTLI_QUALITY)
+    for item in sequence:
+        data = compressor.process(item) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+def compress(content, encoding):
+    if encoding == "br":
+        return brotli.compress(content, quality=settings.BROTLI_QUALITY)
+    return compress_string(content)
+
+
+def compress_cached(content, encoding):
+    if len(content) < settings.COMPRESSION_CACHE_MIN_SIZE:
+        return compress(content, encoding)
+    key = "compressed:{}:{}".format(
+        encoding, hashlib.blake2b(content, digest_size=16).hexdigest())
+    compressed = cache.get(key)
+    if compressed is None:
+        compressed = compress(content, encoding)
+        cache.set(key, compressed, settings.COMPRESSION_CACHE_TIMEOUT)
+    return compressed
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    def process_response(self, request, response):
+        if response.has_header("Content-Encoding"):
+            return response
+        if (
+            not response.streaming
+            and len(response.content) < settings.COMPRESSION_MIN_SIZE
+        ):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = choose_encoding(
+            request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            if encoding == "br":
+                response.streaming_content = brotli_sequence(
+                    response.streaming_content)
+            else:
+                response.streaming_content = compress_sequence(
+                    response.streaming_content)
+            del response["Content-Length"]
+        else:
+            compressed = compress_cached(response.content, encoding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response["Content-Length"] = str(len(compressed))
+
+        etag = response.get("ETag")
+        if etag and STRONG_ETAG.match(etag):
+            response["ETag"] = "W/" + etag
+        response["Content-Encoding"] = encoding
+        return response
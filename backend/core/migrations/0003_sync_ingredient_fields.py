@@ -0,0 +1,31 @@
+# Generated by Django 3.2.3 on 2026-10-18 17:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_rename_unit_measurement_ingredient_measurement_unit'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='ingredient',
+            options={'ordering': ['name'], 'verbose_name': 'Ингредиент', 'verbose_name_plural': 'Ингредиенты'},
+        ),
+        migrations.AlterModelOptions(
+            name='tag',
+            options={'ordering': ['name'], 'verbose_name': 'Тег', 'verbose_name_plural': 'Теги'},
+        ),
+        migrations.AlterField(
+            model_name='ingredient',
+            name='measurement_unit',
+            field=models.CharField(choices=[('грамм', 'г'), ('килограмм', 'кг'), ('миллилитры', 'мл'), ('штуки', 'шт'), ('столовые ложки', 'сл'), ('щепотки', 'щп'), ('по вкусу', 'пв')], max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='ingredient',
+            name='name',
+            field=models.CharField(max_length=100, unique=True, verbose_name='Название'),
+        ),
+    ]
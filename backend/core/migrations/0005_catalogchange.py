@@ -0,0 +1,27 @@
+# Generated by Django 3.2.3 on 2026-10-18 17:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_ingredient_name_prefix_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(choices=[('tag', 'Тег'), ('ingredient', 'Ингредиент')], max_length=20)),
+                ('object_id', models.BigIntegerField(blank=True, help_text='Пусто, если изменился весь справочник.', null=True)),
+                ('deleted', models.BooleanField(default=False)),
+            ],
+            options={
+                'verbose_name': 'Изменение каталога',
+                'verbose_name_plural': 'Изменения каталога',
+                'ordering': ['id'],
+            },
+        ),
+    ]
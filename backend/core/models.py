@@ -1,4 +1,23 @@
-from django.db import models
+from django.core.cache import cache
+from django.db import connections, models, transaction
+
+from core.constants import (
+    CATALOG_CHANGE_LOCK_ID,
+    TAG_SLUGS_CACHE_KEY,
+    TAG_SLUGS_CACHE_TIMEOUT,
+)
+
+
+class TagManager(models.Manager):
+    def cached_slugs(self):
+        slugs = cache.get(TAG_SLUGS_CACHE_KEY)
+        if slugs is None:
+            slugs = sorted(self.values_list("slug", flat=True))
+            cache.set(TAG_SLUGS_CACHE_KEY, slugs, TAG_SLUGS_CACHE_TIMEOUT)
+        return slugs
+
+    def clear_cached_slugs(self):
+        cache.delete(TAG_SLUGS_CACHE_KEY)
 
 
 class Tag(models.Model):
@@ -8,6 +27,10 @@ class Tag(models.Model):
         unique=True,
         verbose_name="Идентификатор",
     )
+    updated_at = models.DateTimeField(
+        verbose_name="Дата изменения", auto_now=True)
+
+    objects = TagManager()
 
     class Meta:
         ordering = ["name"]
@@ -32,6 +55,8 @@ class Ingredient(models.Model):
     name = models.CharField(
         verbose_name="Название", unique=True, max_length=100)
     measurement_unit = models.CharField(max_length=20, choices=UNITS)
+    updated_at = models.DateTimeField(
+        verbose_name="Дата изменения", auto_now=True)
 
     class Meta:
         ordering = ["name"]
@@ -40,3 +65,47 @@ class Ingredient(models.Model):
 
     def __str__(self):
         return self.name
+
+
+class CatalogChangeManager(models.Manager):
+    def record(self, model, object_id=None, deleted=False):
+        # Versions are ids, so they must become visible in id order: hold a
+        # lock until commit, otherwise a client synced past a later id would
+        # never see an earlier one committed after it.
+        with transaction.atomic(using=self.db):
+            connection = connections[self.db]
+            if connection.vendor == "postgresql":
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        "SELECT pg_advisory_xact_lock(%s)",
+                        [CATALOG_CHANGE_LOCK_ID],
+                    )
+            return self.create(
+                model=model, object_id=object_id, deleted=deleted)
+
+
+class CatalogChange(models.Model):
+    TAG = "tag"
+    INGREDIENT = "ingredient"
+    MODELS = [
+        (TAG, "Тег"),
+        (INGREDIENT, "Ингредиент"),
+    ]
+
+    model = models.CharField(max_length=20, choices=MODELS)
+    object_id = models.BigIntegerField(
+        null=True,
+        blank=True,
+        help_text="Пусто, если изменился весь справочник.",
+    )
+    deleted = models.BooleanField(default=False)
+
+    objects = CatalogChangeManager()
+
+    class Meta:
+        ordering = ["id"]
+        verbose_name = "Изменение каталога"
+        verbose_name_plural = "Изменения каталога"
+
+    def __str__(self):
+        return f"{self.model} #{self.object_id} (версия {self.id})"
@@ -0,0 +1,123 @@
+import threading
+from bisect import bisect_left
+
+from django.db import close_old_connections
+from django.db.models import Case, IntegerField, Value, When
+
+from core.cache import bump_version, get_version
+from core.models import Ingredient
+
+INDEX_VERSION_KEY = "ingredient_index_version"
+MAX_CHAR = chr(0x10FFFF)
+GRAM_SIZE = 3
+
+
+def get_index_version():
+    return get_version(INDEX_VERSION_KEY)
+
+
+def bump_index_version():
+    bump_version(INDEX_VERSION_KEY)
+
+
+def normalize(value):
+    return value.strip().casefold()
+
+
+def ngrams(value):
+    return {
+        value[start:start + size]
+        for size in range(1, GRAM_SIZE + 1)
+        for start in range(len(value) - size + 1)
+    }
+
+
+class IngredientIndex:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.building = False
+        self.version = None
+        self.entries = None
+
+    @property
+    def is_cold(self):
+        return self.entries is None
+
+    def rebuild(self, version=None):
+        version = get_index_version() if version is None else version
+        rows = sorted(
+            (normalize(name), pk, {
+                "id": pk,
+                "name": name,
+                "measurement_unit": measurement_unit,
+            })
+            for pk, name, measurement_unit in Ingredient.objects.order_by(
+            ).values_list("id", "name", "measurement_unit").iterator()
+        )
+        keys = [key for key, _, _ in rows]
+        grams = {}
+        for position, key in enumerate(keys):
+            for gram in ngrams(key):
+                grams.setdefault(gram, []).append(position)
+        with self.lock:
+            self.entries = (keys, [row for _, _, row in rows], grams)
+            self.version = version
+
+    def schedule_rebuild(self):
+        with self.lock:
+            if self.building:
+                return
+            self.building = True
+        threading.Thread(target=self._build_in_background, daemon=True).start()
+
+    def _build_in_background(self):
+        try:
+            self.rebuild()
+        finally:
+            self.building = False
+            close_old_connections()
+
+    def search(self, query, limit=None):
+        version = get_index_version()
+        if self.is_cold:
+            self.schedule_rebuild()
+            return self.search_database(query, limit)
+        if self.version != version:
+            self.schedule_rebuild()
+        return self.search_index(query, limit)
+
+    def search_index(self, query, limit=None):
+        query = normalize(query)
+        keys, rows, grams = self.entries
+        start = bisect_left(keys, query)
+        end = bisect_left(keys, query + MAX_CHAR, start)
+        results = rows[start:end]
+        if limit is not None and len(results) >= limit:
+            return results[:limit]
+        candidates = min((
+            grams.get(query[start:start + GRAM_SIZE], [])
+            for start in range(max(len(query) - GRAM_SIZE, 0) + 1)
+        ), key=len)
+        for position in candidates:
+            key = keys[position]
+            if query in key and not key.startswith(query):
+                results.append(rows[position])
+                if len(results) == limit:
+                    break
+        return results
+
+    def search_database(self, query, limit=None):
+        query = query.strip()
+        queryset = Ingredient.objects.filter(
+            name__istartswith=query
+        ).annotate(
+            exact=Case(
+                When(name__iexact=query, then=Value(0)),
+                default=Value(1),
+                output_field=IntegerField(),
+            )
+        ).order_by("exact", "name").values("id", "name", "measurement_unit")
+        return list(queryset[:limit])
+
+
+ingredient_index = IngredientIndex()
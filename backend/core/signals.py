@@ -0,0 +1,35 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.models import CatalogChange, Ingredient, Tag
+from core.search import bump_index_version
+
+CATALOG_MODELS = {
+    Tag: CatalogChange.TAG,
+    Ingredient: CatalogChange.INGREDIENT,
+}
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def ingredient_changed(**kwargs):
+    bump_index_version()
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def tag_changed(**kwargs):
+    Tag.objects.clear_cached_slugs()
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+def catalog_saved(sender, instance, **kwargs):
+    CatalogChange.objects.record(CATALOG_MODELS[sender], instance.id)
+
+
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def catalog_deleted(sender, instance, **kwargs):
+    CatalogChange.objects.record(
+        CATALOG_MODELS[sender], instance.id, deleted=True)
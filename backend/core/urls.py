@@ -1,12 +1,13 @@
 from django.urls import include, path
 from rest_framework import routers
 
-from api.views import IngredientViewSet, TagViewSet
+from api.views import CatalogView, IngredientViewSet, TagViewSet
 
 router = routers.DefaultRouter()
 router.register("tags", TagViewSet, basename="tag")
 router.register("ingredients", IngredientViewSet, basename="Ingredient")
 
 urlpatterns = [
+    path("catalog/", CatalogView.as_view(), name="catalog"),
     path("", include(router.urls)),
 ]
@@ -32,6 +32,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "core.middleware.CompressionMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -63,17 +64,45 @@ WSGI_APPLICATION = "foodgram_backend.wsgi.application"
 
 # Database
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.postgresql",
-        "NAME": os.getenv("POSTGRES_DB", "django"),
-        "USER": os.getenv("POSTGRES_USER", "django"),
-        "PASSWORD": os.getenv("POSTGRES_PASSWORD", ""),
-        "HOST": os.getenv("DB_HOST", ""),
-        "PORT": os.getenv("DB_PORT", 5432),
+if os.getenv("USE_SQLITE", "False") == "True":
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": BASE_DIR / "db.sqlite3",
+        }
+    }
+else:
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": os.getenv("POSTGRES_DB", "django"),
+            "USER": os.getenv("POSTGRES_USER", "django"),
+            "PASSWORD": os.getenv("POSTGRES_PASSWORD", ""),
+            "HOST": os.getenv("DB_HOST", ""),
+            "PORT": os.getenv("DB_PORT", 5432),
+        }
     }
+
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", ""),
+    },
+    "responses": {
+        "BACKEND": os.getenv(
+            "RESPONSE_CACHE_BACKEND",
+            "django.core.cache.backends.locmem.LocMemCache",
+        ),
+        "LOCATION": os.getenv("RESPONSE_CACHE_LOCATION", "responses"),
+    },
 }
 
+RESPONSE_CACHE_ALIAS = os.getenv("RESPONSE_CACHE_ALIAS", "responses") or None
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", 1))
+RESPONSE_CACHE_TIMEOUT = int(os.getenv("RESPONSE_CACHE_TIMEOUT", 300))
+
 # Password validation
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -126,8 +155,37 @@ REST_FRAMEWORK = {
         "django_filters.rest_framework.DjangoFilterBackend",
     ],
     "DEFAULT_PAGINATION_CLASS": "api.pagination.PageNumberLimitPagination",
+    "DEFAULT_RENDERER_CLASSES": [
+        "api.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
 }
 
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", 1024))
+COMPRESSION_CACHE_MIN_SIZE = int(
+    os.getenv("COMPRESSION_CACHE_MIN_SIZE", 16384))
+COMPRESSION_CACHE_TIMEOUT = int(os.getenv("COMPRESSION_CACHE_TIMEOUT", 300))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", 5))
+
+PAGINATION_COUNT_CACHE_TIMEOUT = int(
+    os.getenv("PAGINATION_COUNT_CACHE_TIMEOUT", 60))
+PAGINATION_ESTIMATE_THRESHOLD = int(
+    os.getenv("PAGINATION_ESTIMATE_THRESHOLD", 100000))
+FACET_CACHE_TIMEOUT = int(os.getenv("FACET_CACHE_TIMEOUT", 60))
+
+FEED_FANOUT_THRESHOLD = int(os.getenv("FEED_FANOUT_THRESHOLD", 1000))
+FEED_BATCH_SIZE = int(os.getenv("FEED_BATCH_SIZE", 1000))
+
+SIMILAR_RECIPES_TOP_K = int(os.getenv("SIMILAR_RECIPES_TOP_K", 10))
+SIMILAR_RECIPES_METRIC = os.getenv("SIMILAR_RECIPES_METRIC", "jaccard")
+SIMILAR_RECIPES_CHUNK_PAIRS = int(
+    os.getenv("SIMILAR_RECIPES_CHUNK_PAIRS", 2000000))
+
+SHOPPING_LIST_PDF_FONT = os.getenv(
+    "SHOPPING_LIST_PDF_FONT",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+)
+
 DJOSER = {
     "LOGIN_FIELD": "email",
     "SERIALIZERS": {
@@ -14,11 +14,24 @@ class RecipeIngredientInline(admin.TabularInline):
 @admin.register(Recipe)
 class RecipeAdmin(admin.ModelAdmin):
     list_display = (
-        "id", "name", "text", "author", "get_tags", "get_ingredients")
+        "id",
+        "name",
+        "text",
+        "author",
+        "get_tags",
+        "get_ingredients",
+        "favorites_count",
+    )
     search_fields = ("name", "author__username")
     list_filter = ("tags",)
     inlines = [RecipeIngredientInline]
 
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        recipe = Recipe.objects.filter(pk=form.instance.pk)
+        recipe.update_search_vector()
+        recipe.touch()
+
     def get_tags(self, obj):
         return ", ".join(i.name for i in obj.tags.all())
 
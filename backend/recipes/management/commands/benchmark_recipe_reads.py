@@ -0,0 +1,70 @@
+from time import perf_counter
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.readers import RecipeReader
+from api.serializers import RecipeReadSerializer
+from recipes.models import Recipe
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = "Compare the serializer and dict read paths for recipe lists."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=100)
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument(
+            "--user", help="Username to render the list for.")
+
+    def make_request(self, username):
+        request = Request(APIRequestFactory().get(
+            "/api/recipes/", HTTP_HOST=settings.ALLOWED_HOSTS[0]))
+        if username is None:
+            request.user = AnonymousUser()
+        else:
+            request.user = User.objects.get(username=username)
+        return request
+
+    def serializer_path(self, request, limit):
+        recipes = Recipe.objects.for_read(request.user).order_by(
+            "-id")[:limit]
+        return RecipeReadSerializer(
+            recipes, many=True, context={"request": request}).data
+
+    def reader_path(self, request, limit):
+        reader = RecipeReader(request)
+        queryset = Recipe.objects.for_read(request.user).order_by("-id")
+        return reader.render(reader.rows(queryset)[:limit])
+
+    def measure(self, path, options):
+        renderer, timings, body = JSONRenderer(), [], None
+        for _ in range(options["repeat"]):
+            request = self.make_request(options["user"])
+            started = perf_counter()
+            body = renderer.render(path(request, options["limit"]))
+            timings.append(perf_counter() - started)
+        timings.sort()
+        return body, timings[len(timings) // 2] * 1000, timings[0] * 1000
+
+    def handle(self, *args, **options):
+        results = {}
+        for name, path in (
+            ("serializer", self.serializer_path),
+            ("reader", self.reader_path),
+        ):
+            results[name] = self.measure(path, options)
+            _, median, best = results[name]
+            self.stdout.write(
+                f"{name:<10} median {median:8.2f} ms, best {best:8.2f} ms")
+
+        if results["serializer"][0] != results["reader"][0]:
+            raise CommandError("The two paths rendered different output.")
+        self.stdout.write(
+            "Speedup: {:.1f}x, output identical.".format(
+                results["serializer"][1] / results["reader"][1]))
@@ -0,0 +1,56 @@
+import gzip
+import sys
+
+from django.core.management.base import BaseCommand
+
+from api.exports import RECIPE_EXPORT_CHUNK_SIZE, iter_recipes, recipe_line
+
+
+class Command(BaseCommand):
+    help = "Stream all recipes as NDJSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            help="File to write to, stdout by default.",
+        )
+        parser.add_argument(
+            "--gzip",
+            action="store_true",
+            help="Compress the output with gzip.",
+        )
+        parser.add_argument(
+            "--since-id",
+            type=int,
+            default=0,
+            help="Export only recipes with a greater id and append them.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=RECIPE_EXPORT_CHUNK_SIZE,
+        )
+
+    def write(self, output, options):
+        count, last_id = 0, options["since_id"]
+        if options["gzip"]:
+            output = gzip.GzipFile(fileobj=output, mode="wb")
+        try:
+            for recipe in iter_recipes(last_id, options["chunk_size"]):
+                output.write(recipe_line(recipe).encode())
+                count += 1
+                last_id = recipe.id
+        finally:
+            if options["gzip"]:
+                output.close()
+            self.stderr.write(
+                f"Exported {count} recipes, last id {last_id}.")
+
+    def handle(self, *args, **options):
+        if options["output"]:
+            mode = "ab" if options["since_id"] else "wb"
+            with open(options["output"], mode) as output:
+                self.write(output, options)
+        else:
+            self.write(sys.stdout.buffer, options)
+            sys.stdout.flush()
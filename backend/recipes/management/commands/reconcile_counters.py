@@ -0,0 +1,84 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from core.cache import invalidate_tags
+from core.constants import RECIPE_CACHE_TAG, RECIPE_POPULAR_CACHE_TAG
+from recipes.models import Favorite, Recipe, ShoppingCart
+from users.models import Subscription, User
+
+COUNTERS = {
+    Recipe: {
+        "favorites_count": (Favorite, "recipe"),
+        "shopping_cart_count": (ShoppingCart, "recipe"),
+    },
+    User: {
+        "recipes_count": (Recipe, "author"),
+        "subscribers_count": (Subscription, "subscription"),
+    },
+}
+
+
+def count_of(model, field):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{field: OuterRef("pk")})
+            .order_by()
+            .values(field)
+            .annotate(total=Count("pk"))
+            .values("total")
+        ),
+        0,
+    )
+
+
+class Command(BaseCommand):
+    help = "Recount favorite, cart, recipe and subscriber counters."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    @transaction.atomic
+    def reconcile_batch(self, model, ids):
+        counters = COUNTERS[model]
+        actual = {
+            field: count_of(*source) for field, source in counters.items()
+        }
+        drifted = list(
+            model.objects.filter(pk__in=ids)
+            .annotate(**{f"actual_{field}": value
+                         for field, value in actual.items()})
+            .exclude(**{field: F(f"actual_{field}") for field in counters})
+            .values_list("pk", flat=True)
+        )
+        if not drifted:
+            return 0
+        if model is Recipe:
+            actual["updated_at"] = timezone.now()
+            invalidate_tags(
+                RECIPE_POPULAR_CACHE_TAG,
+                *(RECIPE_CACHE_TAG.format(pk) for pk in drifted),
+            )
+        model.objects.filter(pk__in=drifted).update(**actual)
+        return len(drifted)
+
+    def reconcile(self, model, batch_size):
+        fixed, last_id = 0, 0
+        while True:
+            ids = list(
+                model.objects.filter(pk__gt=last_id)
+                .order_by("pk")
+                .values_list("pk", flat=True)[:batch_size]
+            )
+            if not ids:
+                return fixed
+            fixed += self.reconcile_batch(model, ids)
+            last_id = ids[-1]
+
+    def handle(self, *args, **options):
+        for model in COUNTERS:
+            fixed = self.reconcile(model, options["batch_size"])
+            self.stdout.write(
+                f"{model._meta.verbose_name_plural}: fixed {fixed}.")
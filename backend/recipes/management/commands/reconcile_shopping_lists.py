@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Sum
+
+from recipes.models import RecipeIngredient, ShoppingListItem
+
+CHUNK_SIZE = 5000
+
+
+class Command(BaseCommand):
+    help = "Rebuild precomputed shopping lists and report drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report drift, do not rebuild.",
+        )
+
+    def iter_expected(self):
+        return RecipeIngredient.objects.filter(
+            recipe__in_shopping_carts__isnull=False
+        ).values_list(
+            "recipe__in_shopping_carts__user", "ingredients"
+        ).annotate(total=Sum("amount")).order_by(
+            "recipe__in_shopping_carts__user", "ingredients"
+        ).iterator(chunk_size=CHUNK_SIZE)
+
+    def iter_stored(self):
+        return ShoppingListItem.objects.values_list(
+            "user", "ingredient", "amount"
+        ).order_by("user", "ingredient").iterator(chunk_size=CHUNK_SIZE)
+
+    def compare(self):
+        drift = {"missing": 0, "extra": 0, "wrong": 0}
+        expected, stored = self.iter_expected(), self.iter_stored()
+        want, have = next(expected, None), next(stored, None)
+        while want is not None or have is not None:
+            if have is None or (want is not None and want[:2] < have[:2]):
+                drift["missing"] += 1
+                want = next(expected, None)
+            elif want is None or have[:2] < want[:2]:
+                drift["extra"] += 1
+                have = next(stored, None)
+            else:
+                drift["wrong"] += want[2] != have[2]
+                want, have = next(expected, None), next(stored, None)
+        return drift
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            drift = self.compare()
+            if not options["dry_run"]:
+                ShoppingListItem.objects.rebuild()
+
+        self.stdout.write(
+            "Drift: {missing} missing, {extra} extra, "
+            "{wrong} with a wrong amount.".format(**drift)
+        )
+        if options["dry_run"]:
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {ShoppingListItem.objects.count()} rows."))
@@ -0,0 +1,115 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, Exists, Min, OuterRef
+from django.utils import timezone
+
+from recipes.models import (
+    Recipe,
+    RecipeIngredient,
+    SimilarityCheckpoint,
+    SimilarRecipe,
+)
+from recipes.similarity import IngredientMatrix, np, top_k
+
+OVERLAP = timedelta(minutes=5)
+
+
+class Command(BaseCommand):
+    help = "Update precomputed similar recipes."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Recompute every recipe instead of the changed ones.",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def batches(self, values):
+        for start in range(0, len(values), self.batch_size):
+            yield values[start:start + self.batch_size]
+
+    def add_reverse(self, sources, targets, scores, changed, recomputed):
+        mask = np.isin(sources, changed) & ~np.isin(targets, recomputed)
+        targets, sources, scores = top_k(
+            targets[mask], sources[mask], scores[mask], self.top_k)
+        current = {}
+        for batch in self.batches(np.unique(targets).tolist()):
+            current.update(
+                (row["recipe"], (row["total"], row["lowest"]))
+                for row in SimilarRecipe.objects.filter(
+                    recipe_id__in=batch
+                ).values("recipe").annotate(
+                    total=Count("pk"), lowest=Min("score"))
+            )
+        rows = [
+            SimilarRecipe(recipe_id=target, similar_id=source, score=score)
+            for target, source, score in zip(
+                targets.tolist(), sources.tolist(), scores.tolist())
+            if target not in current
+            or current[target][0] < self.top_k
+            or score > current[target][1]
+        ]
+        SimilarRecipe.objects.bulk_create(
+            rows, batch_size=self.batch_size, ignore_conflicts=True)
+        for batch in self.batches(sorted({row.recipe_id for row in rows})):
+            SimilarRecipe.objects.trim(batch, self.top_k)
+
+    def update(self, matrix, rows, changed=None, recomputed=None):
+        for chunk in matrix.chunks(rows):
+            sources, targets, scores = matrix.scores(chunk)
+            SimilarRecipe.objects.replace(
+                matrix.ids[chunk].tolist(),
+                zip(*(
+                    values.tolist()
+                    for values in top_k(sources, targets, scores, self.top_k)
+                )),
+                self.batch_size,
+            )
+            if changed is not None:
+                self.add_reverse(
+                    sources, targets, scores, changed, recomputed)
+
+    def handle(self, *args, **options):
+        if np is None:
+            raise CommandError("numpy and scipy are required.")
+        self.top_k = settings.SIMILAR_RECIPES_TOP_K
+        self.batch_size = options["batch_size"]
+        now = timezone.now()
+        try:
+            matrix = IngredientMatrix(settings.SIMILAR_RECIPES_METRIC)
+        except ValueError as error:
+            raise CommandError(error)
+
+        checkpoint = SimilarityCheckpoint.objects.first()
+        if options["full"] or checkpoint is None:
+            SimilarRecipe.objects.filter(~Exists(
+                RecipeIngredient.objects.filter(recipe=OuterRef("recipe_id"))
+            )).delete()
+            rows = np.arange(len(matrix.ids))
+            self.update(matrix, rows)
+        else:
+            changed = list(Recipe.objects.filter(
+                updated_at__gt=checkpoint.computed_at - OVERLAP
+            ).order_by("pk").values_list("pk", flat=True))
+            recomputed = set(changed)
+            for batch in self.batches(changed):
+                recomputed.update(SimilarRecipe.objects.filter(
+                    similar_id__in=batch
+                ).values_list("recipe_id", flat=True))
+            recomputed = sorted(recomputed)
+            for batch in self.batches(recomputed):
+                SimilarRecipe.objects.filter(recipe_id__in=batch).delete()
+            rows = matrix.positions(recomputed)
+            self.update(
+                matrix,
+                rows,
+                np.asarray(changed, dtype=np.int64),
+                np.asarray(recomputed, dtype=np.int64),
+            )
+
+        SimilarityCheckpoint.objects.update_or_create(
+            pk=1, defaults={"computed_at": now})
+        self.stdout.write(f"Updated similar recipes for {len(rows)} recipes.")
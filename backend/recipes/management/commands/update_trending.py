@@ -0,0 +1,68 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from core.cache import bump_version, invalidate_tags
+from core.constants import (
+    RECIPE_LIST_CACHE_TAG,
+    RECIPE_TRENDING_VERSION_KEY,
+    TRENDING_WINDOW_DAYS,
+)
+from recipes.models import Favorite, Recipe, ShoppingCart, TrendingCheckpoint
+
+OVERLAP = timedelta(minutes=5)
+
+
+class Command(BaseCommand):
+    help = "Update sliding-window trending scores of recipes."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Recompute every recipe instead of the changed ones.",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def changed_recipe_ids(self, since, now, window):
+        ids = set(Recipe.objects.filter(
+            updated_at__gt=since).values_list("pk", flat=True))
+        for model in (Favorite, ShoppingCart):
+            expired = Q(
+                created_at__gt=since - window, created_at__lte=now - window)
+            ids.update(model.objects.filter(
+                Q(created_at__gt=since) | expired
+            ).values_list("recipe_id", flat=True).distinct())
+        return sorted(ids)
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        window = timedelta(days=TRENDING_WINDOW_DAYS)
+        checkpoint = TrendingCheckpoint.objects.first()
+        if (
+            options["full"]
+            or checkpoint is None
+            or now - checkpoint.computed_at > window
+        ):
+            ids = list(Recipe.objects.order_by("pk").values_list(
+                "pk", flat=True))
+        else:
+            ids = self.changed_recipe_ids(
+                checkpoint.computed_at - OVERLAP, now, window)
+
+        changed = 0
+        batch_size = options["batch_size"]
+        for start in range(0, len(ids), batch_size):
+            changed += Recipe.objects.filter(
+                pk__in=ids[start:start + batch_size]
+            ).update_trending_scores(now - window)
+
+        TrendingCheckpoint.objects.update_or_create(
+            pk=1, defaults={"computed_at": now})
+        if changed:
+            bump_version(RECIPE_TRENDING_VERSION_KEY)
+            invalidate_tags(RECIPE_LIST_CACHE_TAG)
+        self.stdout.write(
+            f"Checked {len(ids)} recipes, updated {changed} scores.")
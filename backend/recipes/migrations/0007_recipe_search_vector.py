@@ -0,0 +1,48 @@
+# Generated by Django 3.2.3 on 2026-10-18 18:07
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+INDEX_NAME = "recipes_recipe_search_vector_gin"
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        f"CREATE INDEX IF NOT EXISTS {INDEX_NAME} ON recipes_recipe "
+        "USING GIN (search_vector)"
+    )
+    schema_editor.execute(
+        "UPDATE recipes_recipe recipe SET search_vector = "
+        "setweight(to_tsvector('russian', COALESCE(recipe.name, '')), 'A')"
+        " || setweight(to_tsvector('russian', COALESCE(recipe.text, '')), "
+        "'B') || setweight(to_tsvector('russian', COALESCE(("
+        "SELECT string_agg(ingredient.name, ' ') "
+        "FROM recipes_recipeingredient item "
+        "JOIN core_ingredient ingredient "
+        "ON ingredient.id = item.ingredients_id "
+        "WHERE item.recipe_id = recipe.id), '')), 'C')"
+    )
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(f"DROP INDEX IF EXISTS {INDEX_NAME}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_shoppinglistitem'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='Поисковый вектор'),
+        ),
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,40 @@
+from django.db import migrations
+
+INDEX_NAME = "recipes_recipe_tag_slugs_gin"
+
+
+def add_tag_slugs(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        "ALTER TABLE recipes_recipe ADD COLUMN IF NOT EXISTS "
+        "tag_slugs text[] NOT NULL DEFAULT '{}'"
+    )
+    schema_editor.execute(
+        f"CREATE INDEX IF NOT EXISTS {INDEX_NAME} ON recipes_recipe "
+        "USING GIN (tag_slugs)"
+    )
+    schema_editor.execute(
+        "UPDATE recipes_recipe recipe SET tag_slugs = ARRAY("
+        "SELECT tag.slug FROM recipes_recipe_tags item "
+        "JOIN core_tag tag ON tag.id = item.tag_id "
+        "WHERE item.recipe_id = recipe.id ORDER BY tag.slug)"
+    )
+
+
+def drop_tag_slugs(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        "ALTER TABLE recipes_recipe DROP COLUMN IF EXISTS tag_slugs")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_recipe_search_vector'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_tag_slugs, drop_tag_slugs),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 3.2.3 on 2026-10-18 18:12
+
+from django.db import migrations, models
+
+
+def remove_duplicates(apps, schema_editor):
+    for table in ("recipes_favorite", "recipes_shoppingcart"):
+        schema_editor.execute(
+            f"DELETE FROM {table} WHERE id NOT IN ("
+            f"SELECT MIN(id) FROM {table} GROUP BY user_id, recipe_id)"
+        )
+    schema_editor.execute("DELETE FROM recipes_shoppinglistitem")
+    schema_editor.execute(
+        "INSERT INTO recipes_shoppinglistitem "
+        "(user_id, ingredient_id, amount) "
+        "SELECT cart.user_id, item.ingredients_id, SUM(item.amount) "
+        "FROM recipes_shoppingcart cart "
+        "JOIN recipes_recipeingredient item "
+        "ON item.recipe_id = cart.recipe_id "
+        "GROUP BY cart.user_id, item.ingredients_id"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_recipe_tag_slugs'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='favorite',
+            constraint=models.UniqueConstraint(fields=('user', 'recipe'), name='unique_favorite'),
+        ),
+        migrations.AddConstraint(
+            model_name='shoppingcart',
+            constraint=models.UniqueConstraint(fields=('user', 'recipe'), name='unique_shopping_cart'),
+        ),
+    ]
@@ -0,0 +1,88 @@
+# Generated by Django 3.2.3 on 2026-10-18 18:50
+
+from collections import defaultdict
+from itertools import islice
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fan_out_existing(apps, schema_editor):
+    Recipe = apps.get_model("recipes", "Recipe")
+    TimelineEntry = apps.get_model("recipes", "TimelineEntry")
+    Subscription = apps.get_model("users", "Subscription")
+    Recipe.objects.filter(
+        author__subscribers_count__lte=settings.FEED_FANOUT_THRESHOLD
+    ).update(fanned_out=True)
+    recipes = defaultdict(list)
+    for recipe_id, author_id in Recipe.objects.filter(
+        fanned_out=True
+    ).values_list("id", "author_id"):
+        recipes[author_id].append(recipe_id)
+    entries = (
+        TimelineEntry(user_id=user_id, recipe_id=recipe_id, author_id=author)
+        for user_id, author in Subscription.objects.values_list(
+            "user_id", "subscription_id").distinct()
+        for recipe_id in recipes[author]
+    )
+    while True:
+        batch = list(islice(entries, settings.FEED_BATCH_SIZE))
+        if not batch:
+            return
+        TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0012_trending'),
+        ('users', '0002_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimelineEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+            ],
+            options={
+                'verbose_name': 'Запись ленты',
+                'verbose_name_plural': 'Лента подписок',
+            },
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='fanned_out',
+            field=models.BooleanField(default=False, editable=False, verbose_name='В лентах подписчиков'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(condition=models.Q(('fanned_out', False)), fields=['author', '-id'], name='recipe_fan_in_idx'),
+        ),
+        migrations.AddField(
+            model_name='timelineentry',
+            name='author',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Автор'),
+        ),
+        migrations.AddField(
+            model_name='timelineentry',
+            name='recipe',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_entries', to='recipes.recipe', verbose_name='Рецепт'),
+        ),
+        migrations.AddField(
+            model_name='timelineentry',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline', to=settings.AUTH_USER_MODEL, verbose_name='Подписчик'),
+        ),
+        migrations.AddIndex(
+            model_name='timelineentry',
+            index=models.Index(fields=['user', 'author'], name='timeline_user_author_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='timelineentry',
+            constraint=models.UniqueConstraint(fields=('user', 'recipe'), name='unique_timeline_entry'),
+        ),
+        migrations.RunPython(fan_out_existing, migrations.RunPython.noop),
+    ]
@@ -1,12 +1,226 @@
+import heapq
+from collections import defaultdict
+from itertools import islice
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+    SearchVectorField,
+)
+from django.db import connection, models, transaction
+from django.db.models import (
+    BooleanField,
+    Case,
+    Count,
+    Exists,
+    F,
+    Func,
+    IntegerField,
+    OuterRef,
+    Prefetch,
+    Q,
+    Subquery,
+    Value,
+    When,
+    Window,
+)
+from django.db.models.expressions import Col, Expression, RawSQL
+from django.db.models.functions import RowNumber
+from django.utils import timezone
 
+from core.cache import bump_version, invalidate_tags
+from core.constants import (
+    RECIPE_CACHE_TAG,
+    RECIPE_COUNT_VERSION_KEY,
+    RECIPE_POPULAR_CACHE_TAG,
+    SEARCH_CONFIG,
+    TRENDING_CART_WEIGHT,
+    TRENDING_FAVORITE_WEIGHT,
+    USER_RECIPE_STATE_VERSION_KEY,
+)
+from core.counters import CounterFieldsMixin, shift_counter
 from core.models import Ingredient, Tag
+from users.models import Subscription
 
 User = get_user_model()
 
 
-class Recipe(models.Model):
+class TagSlugs(Expression):
+    # The column is added by a PostgreSQL-only migration and is not part of
+    # the model state, so it is resolved to a Col against the query's own
+    # alias; that keeps it correct when the queryset is nested.
+    target = ArrayField(models.TextField())
+    target.set_attributes_from_name("tag_slugs")
+
+    def resolve_expression(self, query=None, *args, **kwargs):
+        return Col(query.get_initial_alias(), self.target)
+
+
+class RecipeQuerySet(models.QuerySet):
+    def with_user_flags(self, user):
+        if user.is_anonymous:
+            return self.annotate(
+                is_favorited=Value(False, output_field=BooleanField()),
+                is_in_shopping_cart=Value(False, output_field=BooleanField()),
+            )
+        return self.annotate(
+            is_favorited=Exists(
+                Favorite.objects.filter(user=user, recipe=OuterRef("pk"))
+            ),
+            is_in_shopping_cart=Exists(
+                ShoppingCart.objects.filter(user=user, recipe=OuterRef("pk"))
+            ),
+        )
+
+    def for_read(self, user):
+        return self.with_user_flags(user).select_related(
+            "author"
+        ).defer("search_vector").prefetch_related(
+            "tags",
+            Prefetch(
+                "recipe_ingredients",
+                queryset=RecipeIngredient.objects.select_related(
+                    "ingredients").order_by("pk"),
+            ),
+        )
+
+    def first_per_author(self, author_ids, limit=None):
+        queryset = self.filter(author_id__in=author_ids)
+        if not author_ids:
+            return queryset.none()
+        if limit is None:
+            return queryset.order_by("author_id", "name", "id")
+        sql, params = queryset.annotate(
+            row_number=Window(
+                expression=RowNumber(),
+                partition_by=[F("author_id")],
+                order_by=[F("name").asc(), F("id").asc()],
+            )
+        ).query.sql_with_params()
+        return self.raw(
+            f"SELECT * FROM ({sql}) AS ranked "
+            "WHERE ranked.row_number <= %s "
+            "ORDER BY ranked.author_id, ranked.row_number",
+            (*params, limit),
+        )
+
+    def update_search_vector(self):
+        if connection.vendor != "postgresql":
+            return 0
+        ingredient_names = RecipeIngredient.objects.filter(
+            recipe=OuterRef("pk")
+        ).order_by().values("recipe").annotate(
+            names=StringAgg("ingredients__name", " ")
+        ).values("names")
+        return self.update(
+            search_vector=(
+                SearchVector("name", weight="A", config=SEARCH_CONFIG)
+                + SearchVector("text", weight="B", config=SEARCH_CONFIG)
+                + SearchVector(
+                    Subquery(ingredient_names),
+                    weight="C",
+                    config=SEARCH_CONFIG,
+                )
+            )
+        )
+
+    def touch(self):
+        return self.update(updated_at=timezone.now())
+
+    def update_trending_scores(self, since):
+        scores = defaultdict(int)
+        for model, weight in (
+            (Favorite, TRENDING_FAVORITE_WEIGHT),
+            (ShoppingCart, TRENDING_CART_WEIGHT),
+        ):
+            for recipe_id, total in model.objects.filter(
+                recipe__in=self, created_at__gt=since
+            ).order_by().values("recipe").annotate(
+                total=Count("pk")
+            ).values_list("recipe", "total"):
+                scores[recipe_id] += total * weight
+        changed = [
+            self.model(pk=pk, trending_score=scores[pk])
+            for pk, score in self.values_list("pk", "trending_score")
+            if score != scores[pk]
+        ]
+        self.model.objects.bulk_update(changed, ["trending_score"])
+        return len(changed)
+
+    def shift_counter(self, field, delta):
+        return shift_counter(self, field, delta, updated_at=timezone.now())
+
+    def update_tag_slugs(self, touch=False):
+        if connection.vendor != "postgresql":
+            if touch:
+                self.touch()
+            return
+        table = self.model._meta.db_table
+        ids, params = self.order_by().values("pk").query.sql_with_params()
+        touched = ", updated_at = %s" if touch else ""
+        if touch:
+            params = (timezone.now(), *params)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {table} SET tag_slugs = ARRAY("
+                "SELECT tag.slug "
+                f"FROM {self.model.tags.through._meta.db_table} item "
+                f"JOIN {Tag._meta.db_table} tag ON tag.id = item.tag_id "
+                f"WHERE item.recipe_id = {table}.id ORDER BY tag.slug)"
+                f"{touched} WHERE id IN ({ids})",
+                params,
+            )
+
+    def any_tag_condition(self, slugs):
+        if connection.vendor == "postgresql":
+            return Func(
+                TagSlugs(),
+                RawSQL("%s::text[]", (list(slugs),)),
+                template="%(expressions)s",
+                arg_joiner=" && ",
+                output_field=BooleanField(),
+            )
+        return Exists(
+            self.model.tags.through.objects.filter(
+                recipe=OuterRef("pk"), tag__slug__in=slugs
+            )
+        )
+
+    def with_any_tag(self, slugs):
+        return self.filter(self.any_tag_condition(slugs))
+
+    def search(self, text):
+        if connection.vendor == "postgresql":
+            query = SearchQuery(
+                text, config=SEARCH_CONFIG, search_type="websearch")
+            return self.filter(search_vector=query).annotate(
+                rank=SearchRank(F("search_vector"), query)
+            ).order_by("-rank", "-id")
+        return self.annotate(
+            rank=Case(
+                When(name__icontains=text, then=Value(3)),
+                When(text__icontains=text, then=Value(2)),
+                When(
+                    Exists(
+                        RecipeIngredient.objects.filter(
+                            recipe=OuterRef("pk"),
+                            ingredients__name__icontains=text,
+                        )
+                    ),
+                    then=Value(1),
+                ),
+                default=Value(0),
+                output_field=IntegerField(),
+            )
+        ).filter(rank__gt=0).order_by("-rank", "-id")
+
+
+class Recipe(CounterFieldsMixin, models.Model):
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -30,11 +244,51 @@ class Recipe(models.Model):
     cooking_time = models.PositiveSmallIntegerField(
         verbose_name="Время приготовления"
     )
+    search_vector = SearchVectorField(
+        verbose_name="Поисковый вектор", null=True, editable=False
+    )
+    updated_at = models.DateTimeField(
+        verbose_name="Дата изменения", auto_now=True)
+    favorites_count = models.PositiveIntegerField(
+        verbose_name="В избранном", default=0, editable=False)
+    shopping_cart_count = models.PositiveIntegerField(
+        verbose_name="В списках покупок", default=0, editable=False)
+    trending_score = models.PositiveIntegerField(
+        verbose_name="Популярность за неделю", default=0, editable=False)
+    fanned_out = models.BooleanField(
+        verbose_name="В лентах подписчиков", default=False, editable=False)
+
+    counter_fields = (
+        "favorites_count",
+        "shopping_cart_count",
+        "trending_score",
+    )
+
+    objects = RecipeQuerySet.as_manager()
 
     class Meta:
         ordering = ["name"]
         verbose_name = "Рецепт"
         verbose_name_plural = "Рецепты"
+        indexes = [
+            models.Index(
+                fields=["-trending_score", "-id"],
+                name="recipe_trending_idx",
+            ),
+            models.Index(
+                fields=["-favorites_count", "-id"],
+                name="recipe_popular_idx",
+            ),
+            models.Index(
+                fields=["cooking_time", "-id"],
+                name="recipe_cooking_time_idx",
+            ),
+            models.Index(
+                fields=["author", "-id"],
+                condition=Q(fanned_out=False),
+                name="recipe_fan_in_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.name} (автор: {self.author})"
@@ -61,6 +315,84 @@ class RecipeIngredient(models.Model):
         return f"{self.ingredients.name} в рецепте {self.recipe.name}"
 
 
+class UserRecipeManager(models.Manager):
+    def add(self, user_id, recipe_ids):
+        if not recipe_ids:
+            return []
+        placeholders = ", ".join(["%s"] * len(recipe_ids))
+        added = self.write(
+            f"INSERT INTO {self.model._meta.db_table} "
+            "(user_id, recipe_id, created_at) "
+            f"SELECT %s, id, %s FROM {Recipe._meta.db_table} "
+            f"WHERE id IN ({placeholders}) "
+            "ON CONFLICT (user_id, recipe_id) DO NOTHING "
+            "RETURNING recipe_id",
+            [user_id, timezone.now(), *recipe_ids],
+            1,
+        )
+        if added:
+            self.changed(user_id, added, 1)
+        return added
+
+    def remove(self, user_id, recipe_ids):
+        if not recipe_ids:
+            return []
+        placeholders = ", ".join(["%s"] * len(recipe_ids))
+        removed = self.write(
+            f"DELETE FROM {self.model._meta.db_table} "
+            f"WHERE user_id = %s AND recipe_id IN ({placeholders}) "
+            "RETURNING recipe_id",
+            [user_id, *recipe_ids],
+            -1,
+        )
+        if removed:
+            self.changed(user_id, removed, -1)
+        return removed
+
+    def write(self, statement, params, delta):
+        field = self.model.counter_field
+        if connection.vendor == "postgresql":
+            table = Recipe._meta.db_table
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"WITH changed AS ({statement}) "
+                    f"UPDATE {table} SET {field} = GREATEST({field} + %s, 0), "
+                    "updated_at = %s "
+                    "WHERE id IN (SELECT recipe_id FROM changed) "
+                    "RETURNING id",
+                    [*params, delta, timezone.now()],
+                )
+                return [row[0] for row in cursor.fetchall()]
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(statement, params)
+                changed = [row[0] for row in cursor.fetchall()]
+            Recipe.objects.filter(pk__in=changed).shift_counter(field, delta)
+        return changed
+
+    def changed(self, user_id, recipe_ids, delta):
+        invalidate_tags(
+            *self.model.counter_cache_tags,
+            *(RECIPE_CACHE_TAG.format(pk) for pk in recipe_ids),
+        )
+        bump_version(RECIPE_COUNT_VERSION_KEY)
+        bump_version(USER_RECIPE_STATE_VERSION_KEY.format(user_id))
+
+
+class ShoppingCartManager(UserRecipeManager):
+    @transaction.atomic
+    def add(self, user_id, recipe_ids):
+        return super().add(user_id, recipe_ids)
+
+    @transaction.atomic
+    def remove(self, user_id, recipe_ids):
+        return super().remove(user_id, recipe_ids)
+
+    def changed(self, user_id, recipe_ids, delta):
+        super().changed(user_id, recipe_ids, delta)
+        ShoppingListItem.objects.apply_user_recipes(user_id, recipe_ids, delta)
+
+
 class Favorite(models.Model):
     recipe = models.ForeignKey(
         Recipe,
@@ -75,10 +407,24 @@ class Favorite(models.Model):
         verbose_name="Пользователь",
     )
 
+    created_at = models.DateTimeField(
+        verbose_name="Дата добавления", auto_now_add=True, db_index=True)
+
+    counter_field = "favorites_count"
+    counter_cache_tags = (RECIPE_POPULAR_CACHE_TAG,)
+
+    objects = UserRecipeManager()
+
     class Meta:
         ordering = ["recipe__name"]
         verbose_name = "Избранное"
         verbose_name_plural = "Избранные"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "recipe"],
+                name="unique_favorite",
+            )
+        ]
 
     def __str__(self):
         return f"Избранное: {self.recipe.name} у {self.user}"
@@ -98,10 +444,325 @@ class ShoppingCart(models.Model):
         verbose_name="Пользователь"
     )
 
+    created_at = models.DateTimeField(
+        verbose_name="Дата добавления", auto_now_add=True, db_index=True)
+
+    counter_field = "shopping_cart_count"
+    counter_cache_tags = ()
+
+    objects = ShoppingCartManager()
+
     class Meta:
         ordering = ["recipe__name"]
         verbose_name = "Карта покупок"
         verbose_name_plural = "Карты покупок"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "recipe"],
+                name="unique_shopping_cart",
+            )
+        ]
 
     def __str__(self):
         return f"{self.recipe.name} в списке у {self.user}"
+
+
+class ShoppingListItemManager(models.Manager):
+    def apply_recipe(self, recipe_id, sign, user_id=None):
+        table = self.model._meta.db_table
+        carts = ShoppingCart.objects.filter(recipe_id=recipe_id)
+        user_filter = ""
+        params = [sign, recipe_id]
+        if user_id is not None:
+            carts = carts.filter(user_id=user_id)
+            user_filter = "AND cart.user_id = %s "
+            params.append(user_id)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} (user_id, ingredient_id, amount) "
+                "SELECT cart.user_id, item.ingredients_id, "
+                "SUM(item.amount) * %s "
+                f"FROM {ShoppingCart._meta.db_table} cart "
+                f"JOIN {RecipeIngredient._meta.db_table} item "
+                "ON item.recipe_id = cart.recipe_id "
+                f"WHERE cart.recipe_id = %s {user_filter}"
+                "GROUP BY cart.user_id, item.ingredients_id "
+                "ON CONFLICT (user_id, ingredient_id) DO UPDATE "
+                f"SET amount = {table}.amount + EXCLUDED.amount",
+                params,
+            )
+        if sign < 0:
+            self.filter(
+                user__in=carts.values("user_id"), amount__lte=0
+            ).delete()
+
+    def apply_user_recipes(self, user_id, recipe_ids, sign):
+        if not recipe_ids:
+            return
+        table = self.model._meta.db_table
+        placeholders = ", ".join(["%s"] * len(recipe_ids))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} (user_id, ingredient_id, amount) "
+                "SELECT %s, item.ingredients_id, SUM(item.amount) * %s "
+                f"FROM {RecipeIngredient._meta.db_table} item "
+                f"WHERE item.recipe_id IN ({placeholders}) "
+                "GROUP BY item.ingredients_id "
+                "ON CONFLICT (user_id, ingredient_id) DO UPDATE "
+                f"SET amount = {table}.amount + EXCLUDED.amount",
+                [user_id, sign, *recipe_ids],
+            )
+        if sign < 0:
+            self.filter(user_id=user_id, amount__lte=0).delete()
+
+    def rebuild(self):
+        table = self.model._meta.db_table
+        self.all().delete()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} (user_id, ingredient_id, amount) "
+                "SELECT cart.user_id, item.ingredients_id, SUM(item.amount) "
+                f"FROM {ShoppingCart._meta.db_table} cart "
+                f"JOIN {RecipeIngredient._meta.db_table} item "
+                "ON item.recipe_id = cart.recipe_id "
+                "GROUP BY cart.user_id, item.ingredients_id"
+            )
+
+
+class ShoppingListItem(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="shopping_list",
+        verbose_name="Пользователь",
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        related_name="+",
+        verbose_name="Ингредиент",
+    )
+    amount = models.IntegerField(verbose_name="Количество")
+
+    objects = ShoppingListItemManager()
+
+    class Meta:
+        ordering = ["ingredient__name"]
+        verbose_name = "Строка списка покупок"
+        verbose_name_plural = "Список покупок"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "ingredient"],
+                name="unique_shopping_list_item",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.ingredient.name}: {self.amount} у {self.user}"
+
+
+class TrendingCheckpoint(models.Model):
+    computed_at = models.DateTimeField(verbose_name="Время расчёта")
+
+    class Meta:
+        verbose_name = "Расчёт популярности"
+        verbose_name_plural = "Расчёты популярности"
+
+    def __str__(self):
+        return f"Популярность на {self.computed_at:%d.%m.%Y %H:%M}"
+
+
+class TimelineManager(models.Manager):
+    def fans_out(self, author):
+        return author.subscribers_count <= settings.FEED_FANOUT_THRESHOLD
+
+    def insert(self, recipes, user_id=None):
+        sql, params = recipes.order_by().values(
+            "id", "author_id").query.sql_with_params()
+        follower = ""
+        if user_id is not None:
+            follower = "AND subscription.user_id = %s "
+            params = (*params, user_id)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {self.model._meta.db_table} "
+                "(user_id, recipe_id, author_id) "
+                "SELECT subscription.user_id, recipe.id, recipe.author_id "
+                f"FROM ({sql}) recipe, {Subscription._meta.db_table} "
+                "subscription "
+                "WHERE subscription.subscription_id = recipe.author_id "
+                f"{follower}"
+                "ON CONFLICT (user_id, recipe_id) DO NOTHING",
+                params,
+            )
+            return cursor.rowcount
+
+    def fan_out(self, recipe_ids):
+        return self.insert(
+            Recipe.objects.filter(pk__in=recipe_ids, fanned_out=True))
+
+    def backfill(self, user_id, author_id):
+        batch_size = settings.FEED_BATCH_SIZE
+        recipes = Recipe.objects.filter(
+            author_id=author_id, fanned_out=True).order_by("-id")
+        while True:
+            ids = list(recipes.values_list("id", flat=True)[:batch_size])
+            if not ids:
+                return
+            self.insert(Recipe.objects.filter(pk__in=ids), user_id)
+            if len(ids) < batch_size:
+                return
+            recipes = recipes.filter(id__lt=ids[-1])
+
+    def prune(self, user_id, author_id):
+        batch_size = settings.FEED_BATCH_SIZE
+        entries = self.filter(user_id=user_id, author_id=author_id)
+        while True:
+            ids = list(entries.values_list("pk", flat=True)[:batch_size])
+            if not ids:
+                return
+            self.filter(pk__in=ids).delete()
+            if len(ids) < batch_size:
+                return
+
+    def feed(self, user_id, limit, before=None):
+        entries = self.filter(user_id=user_id)
+        recipes = Recipe.objects.filter(fanned_out=False)
+        if before is not None:
+            entries = entries.filter(recipe_id__lt=before)
+            recipes = recipes.filter(id__lt=before)
+        authors = Subscription.objects.filter(user_id=user_id).filter(
+            Exists(recipes.filter(author_id=OuterRef("subscription_id")))
+        ).values_list("subscription_id", flat=True).distinct()
+        streams = [
+            entries.order_by("-recipe_id").values_list(
+                "recipe_id", flat=True)[:limit],
+            *(
+                recipes.filter(author_id=author_id).order_by(
+                    "-id").values_list("id", flat=True)[:limit]
+                for author_id in authors
+            ),
+        ]
+        return list(islice(heapq.merge(*streams, reverse=True), limit))
+
+
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="timeline",
+        verbose_name="Подписчик",
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name="timeline_entries",
+        verbose_name="Рецепт",
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="+",
+        verbose_name="Автор",
+    )
+
+    objects = TimelineManager()
+
+    class Meta:
+        verbose_name = "Запись ленты"
+        verbose_name_plural = "Лента подписок"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "recipe"],
+                name="unique_timeline_entry",
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["user", "author"],
+                name="timeline_user_author_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.recipe} в ленте {self.user}"
+
+
+class SimilarRecipeManager(models.Manager):
+    def replace(self, recipe_ids, rows, batch_size=None):
+        with transaction.atomic():
+            self.filter(recipe_id__in=recipe_ids).delete()
+            self.bulk_create(
+                (
+                    self.model(recipe_id=recipe_id, similar_id=similar_id,
+                               score=score)
+                    for recipe_id, similar_id, score in rows
+                ),
+                batch_size=batch_size,
+            )
+
+    def trim(self, recipe_ids, limit):
+        if not recipe_ids:
+            return 0
+        table = self.model._meta.db_table
+        placeholders = ", ".join(["%s"] * len(recipe_ids))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {table} WHERE id IN ("
+                "SELECT id FROM ("
+                "SELECT id, ROW_NUMBER() OVER ("
+                "PARTITION BY recipe_id ORDER BY score DESC, similar_id"
+                f") AS position FROM {table} "
+                f"WHERE recipe_id IN ({placeholders})"
+                ") ranked WHERE position > %s)",
+                [*recipe_ids, limit],
+            )
+            return cursor.rowcount
+
+
+class SimilarRecipe(models.Model):
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name="similar_recipes",
+        verbose_name="Рецепт",
+    )
+    similar = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name="similar_to",
+        verbose_name="Похожий рецепт",
+    )
+    score = models.FloatField(verbose_name="Сходство")
+
+    objects = SimilarRecipeManager()
+
+    class Meta:
+        verbose_name = "Похожий рецепт"
+        verbose_name_plural = "Похожие рецепты"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["recipe", "similar"],
+                name="unique_similar_recipe",
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["recipe", "-score"],
+                name="similar_recipe_score_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.similar} похож на {self.recipe}"
+
+
+class SimilarityCheckpoint(models.Model):
+    computed_at = models.DateTimeField(verbose_name="Время расчёта")
+
+    class Meta:
+        verbose_name = "Расчёт похожих рецептов"
+        verbose_name_plural = "Расчёты похожих рецептов"
+
+    def __str__(self):
+        return f"Похожие рецепты на {self.computed_at:%d.%m.%Y %H:%M}"
@@ -0,0 +1,199 @@
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+)
+from django.dispatch import receiver
+
+from core.cache import bump_version, invalidate_tags
+from core.constants import (
+    AUTHOR_CACHE_TAG,
+    RECIPE_CACHE_TAG,
+    RECIPE_COUNT_VERSION_KEY,
+    RECIPE_LIST_CACHE_TAG,
+    TAG_CACHE_TAG,
+    USER_RECIPE_STATE_VERSION_KEY,
+)
+from core.counters import shift_counter
+from core.models import Ingredient, Tag
+from recipes.models import (
+    Favorite,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    TimelineEntry,
+)
+from users.models import Subscription, User
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_delete, sender=ShoppingCart)
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Tag)
+def recipe_counts_changed(**kwargs):
+    bump_version(RECIPE_COUNT_VERSION_KEY)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_saved(instance, **kwargs):
+    Recipe.objects.filter(pk=instance.pk).update_search_vector()
+
+
+@receiver(post_save, sender=Ingredient)
+def ingredient_saved(instance, created, **kwargs):
+    if not created:
+        recipes = Recipe.objects.filter(ingredients=instance)
+        recipes.update_search_vector()
+        recipes.touch()
+        invalidate_tags(
+            RECIPE_LIST_CACHE_TAG,
+            *(
+                RECIPE_CACHE_TAG.format(pk)
+                for pk in recipes.values_list("pk", flat=True)
+            ),
+        )
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def recipe_tags_changed(instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        recipes = Recipe.objects.filter(pk=instance.pk)
+    elif pk_set:
+        recipes = Recipe.objects.filter(pk__in=pk_set)
+    else:
+        recipes = Recipe.objects.with_any_tag([instance.slug])
+    recipes.update_tag_slugs(touch=True)
+    if reverse:
+        invalidate_tags(
+            RECIPE_LIST_CACHE_TAG, TAG_CACHE_TAG.format(instance.pk))
+    else:
+        invalidate_tags(
+            RECIPE_LIST_CACHE_TAG, RECIPE_CACHE_TAG.format(instance.pk))
+
+
+@receiver(post_save, sender=Tag)
+def tag_saved(instance, created, **kwargs):
+    if not created:
+        Recipe.objects.filter(tags=instance).update_tag_slugs(touch=True)
+
+
+@receiver(pre_delete, sender=Tag)
+def tag_deleting(instance, **kwargs):
+    Recipe.objects.filter(tags=instance).touch()
+
+
+@receiver(pre_delete, sender=Ingredient)
+def ingredient_deleting(instance, **kwargs):
+    Recipe.objects.filter(ingredients=instance).touch()
+
+
+@receiver(post_delete, sender=Tag)
+def tag_deleted(instance, **kwargs):
+    Recipe.objects.with_any_tag([instance.slug]).update_tag_slugs()
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def recipe_changed(instance, **kwargs):
+    invalidate_tags(
+        RECIPE_LIST_CACHE_TAG, RECIPE_CACHE_TAG.format(instance.pk))
+
+
+@receiver(post_save, sender=RecipeIngredient)
+@receiver(post_delete, sender=RecipeIngredient)
+def recipe_ingredient_changed(instance, **kwargs):
+    invalidate_tags(RECIPE_CACHE_TAG.format(instance.recipe_id))
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def tag_changed(instance, **kwargs):
+    invalidate_tags(RECIPE_LIST_CACHE_TAG, TAG_CACHE_TAG.format(instance.pk))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(instance, **kwargs):
+    invalidate_tags(AUTHOR_CACHE_TAG.format(instance.pk))
+
+
+@receiver(post_save, sender=User)
+def author_saved(instance, created, update_fields, **kwargs):
+    if not created and update_fields != frozenset(["last_login"]):
+        Recipe.objects.filter(author=instance).touch()
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_delete, sender=ShoppingCart)
+@receiver(post_save, sender=Subscription)
+@receiver(post_delete, sender=Subscription)
+def user_recipe_state_changed(instance, **kwargs):
+    bump_version(USER_RECIPE_STATE_VERSION_KEY.format(instance.user_id))
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+def user_recipe_saved(sender, instance, created, **kwargs):
+    if created:
+        Recipe.objects.filter(pk=instance.recipe_id).shift_counter(
+            sender.counter_field, 1)
+        invalidate_tags(
+            *sender.counter_cache_tags,
+            RECIPE_CACHE_TAG.format(instance.recipe_id),
+        )
+
+
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=ShoppingCart)
+def user_recipe_deleted(sender, instance, **kwargs):
+    Recipe.objects.filter(pk=instance.recipe_id).shift_counter(
+        sender.counter_field, -1)
+    invalidate_tags(
+        *sender.counter_cache_tags,
+        RECIPE_CACHE_TAG.format(instance.recipe_id),
+    )
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_created(instance, created, **kwargs):
+    if created:
+        shift_counter(
+            User.objects.filter(pk=instance.author_id), "recipes_count", 1)
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(instance, **kwargs):
+    shift_counter(
+        User.objects.filter(pk=instance.author_id), "recipes_count", -1)
+
+
+@receiver(post_save, sender=Subscription)
+def subscription_saved(instance, created, **kwargs):
+    if created:
+        shift_counter(
+            User.objects.filter(pk=instance.subscription_id),
+            "subscribers_count",
+            1,
+        )
+        TimelineEntry.objects.backfill(
+            instance.user_id, instance.subscription_id)
+
+
+@receiver(post_delete, sender=Subscription)
+def subscription_deleted(instance, **kwargs):
+    shift_counter(
+        User.objects.filter(pk=instance.subscription_id),
+        "subscribers_count",
+        -1,
+    )
+    TimelineEntry.objects.prune(instance.user_id, instance.subscription_id)
@@ -0,0 +1,83 @@
+from django.conf import settings
+
+from recipes.models import RecipeIngredient
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:
+    np = sparse = None
+
+METRICS = ("jaccard", "cosine")
+
+
+class IngredientMatrix:
+    def __init__(self, metric="jaccard"):
+        if np is None:
+            raise RuntimeError("numpy and scipy are required.")
+        if metric not in METRICS:
+            raise ValueError(f"Unknown similarity metric: {metric}.")
+        self.metric = metric
+        pairs = RecipeIngredient.objects.order_by().values_list(
+            "recipe_id", "ingredients_id")
+        values = np.fromiter(
+            (value for pair in pairs.iterator() for value in pair),
+            dtype=np.int64,
+        ).reshape(-1, 2)
+        self.ids, rows = np.unique(values[:, 0], return_inverse=True)
+        _, columns = np.unique(values[:, 1], return_inverse=True)
+        matrix = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.float32), (rows, columns)),
+            shape=(len(self.ids), columns.max() + 1 if len(columns) else 0),
+        )
+        matrix.sum_duplicates()
+        matrix.data[:] = 1
+        self.matrix = matrix
+        self.transposed = matrix.T.tocsr()
+        self.sizes = np.asarray(matrix.sum(axis=1)).ravel()
+        self.work = matrix @ np.asarray(matrix.sum(axis=0)).ravel()
+
+    def positions(self, recipe_ids):
+        return np.flatnonzero(np.isin(
+            self.ids, np.fromiter(recipe_ids, dtype=np.int64)))
+
+    def chunks(self, rows=None, limit=None):
+        rows = np.arange(len(self.ids)) if rows is None else rows
+        limit = limit or settings.SIMILAR_RECIPES_CHUNK_PAIRS
+        cumulative = np.cumsum(self.work[rows])
+        start = 0
+        while start < len(rows):
+            offset = cumulative[start - 1] if start else 0
+            end = max(
+                int(np.searchsorted(
+                    cumulative, offset + limit, side="right")),
+                start + 1,
+            )
+            yield rows[start:end]
+            start = end
+
+    def scores(self, rows):
+        product = (self.matrix[rows] @ self.transposed).tocoo()
+        sources = rows[product.row]
+        common = product.data
+        if self.metric == "jaccard":
+            scores = common / (
+                self.sizes[sources] + self.sizes[product.col] - common)
+        else:
+            scores = common / np.sqrt(
+                self.sizes[sources] * self.sizes[product.col])
+        mask = sources != product.col
+        return (
+            self.ids[sources[mask]],
+            self.ids[product.col[mask]],
+            scores[mask],
+        )
+
+
+def top_k(sources, targets, scores, k):
+    order = np.lexsort((targets, -scores, sources))
+    sources, targets, scores = (
+        sources[order], targets[order], scores[order])
+    rank = np.arange(len(sources)) - np.searchsorted(sources, sources)
+    keep = rank < k
+    return sources[keep], targets[keep], scores[keep]
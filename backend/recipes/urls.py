@@ -1,12 +1,24 @@
 from django.urls import include, path
 from rest_framework import routers
 
-from api.views import RecipeViewSet, favorite_view, shopping_cart_view
+from api.views import (
+    RecipeViewSet,
+    favorite_batch_view,
+    favorite_view,
+    shopping_cart_batch_view,
+    shopping_cart_view,
+)
 
 router = routers.DefaultRouter()
 router.register("", RecipeViewSet, basename="recipes")
 
 urlpatterns = [
+    path("favorite/", favorite_batch_view, name="favorite-batch"),
+    path(
+        "shopping_cart/",
+        shopping_cart_batch_view,
+        name="shopping-cart-batch",
+    ),
     path("", include(router.urls)),
     path("<int:id>/favorite/", favorite_view, name="favorite"),
     path("<int:id>/shopping_cart/", shopping_cart_view, name="shopping_cart"),
@@ -0,0 +1,73 @@
+from unittest import skipUnless
+
+from django.db import connection, connections, transaction
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from core.constants import CATALOG_CHANGE_LOCK_ID
+from core.models import CatalogChange, Ingredient, Tag
+
+CATALOG_URL = "/api/catalog/"
+
+
+class CatalogSyncTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.tag = Tag.objects.create(name="Завтрак", slug="breakfast")
+        cls.salt = Ingredient.objects.create(
+            name="соль", measurement_unit="г")
+        cls.sugar = Ingredient.objects.create(
+            name="сахар", measurement_unit="г")
+
+    def get_catalog(self, **params):
+        response = self.client.get(CATALOG_URL, params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_full_snapshot(self):
+        data = self.get_catalog()
+        self.assertEqual(data["full"], {"tags": True, "ingredients": True})
+        self.assertEqual(len(data["tags"]), 1)
+        self.assertEqual(len(data["ingredients"]), 2)
+
+    def test_delta(self):
+        version = self.get_catalog()["version"]
+        self.salt.measurement_unit = "кг"
+        self.salt.save()
+        sugar_id = self.sugar.id
+        self.sugar.delete()
+        data = self.get_catalog(since=version)
+        self.assertGreater(data["version"], version)
+        self.assertEqual(data["full"], {"tags": False, "ingredients": False})
+        self.assertEqual(data["tags"], [])
+        self.assertEqual(
+            [item["measurement_unit"] for item in data["ingredients"]],
+            ["кг"],
+        )
+        self.assertEqual(data["deleted"]["ingredients"], [sugar_id])
+
+        data = self.get_catalog(since=data["version"])
+        self.assertEqual(data["ingredients"], [])
+        self.assertEqual(data["deleted"]["ingredients"], [])
+
+    @override_settings(COMPRESSION_MIN_SIZE=0)
+    def test_compressed(self):
+        response = self.client.get(CATALOG_URL, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+
+    @skipUnless(
+        connection.vendor == "postgresql", "Advisory locks need PostgreSQL.")
+    def test_changes_commit_in_version_order(self):
+        other = connections.create_connection("default")
+        try:
+            with other.cursor() as cursor:
+                with transaction.atomic():
+                    CatalogChange.objects.record(
+                        CatalogChange.INGREDIENT, self.salt.id)
+                    cursor.execute(
+                        "SELECT pg_try_advisory_xact_lock(%s)",
+                        [CATALOG_CHANGE_LOCK_ID],
+                    )
+                    self.assertFalse(cursor.fetchone()[0])
+        finally:
+            other.close()
@@ -0,0 +1,35 @@
+from django.core.checks import run_checks
+from django.test import SimpleTestCase, override_settings
+
+LOCMEM = {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+FILEBASED = {
+    "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+    "LOCATION": "/tmp/foodgram-cache",
+}
+
+
+class SharedCacheCheckTest(SimpleTestCase):
+    def warnings(self):
+        return [
+            message.msg for message in run_checks()
+            if message.id == "core.W001"
+        ]
+
+    @override_settings(WEB_CONCURRENCY=1)
+    def test_single_worker(self):
+        self.assertEqual(self.warnings(), [])
+
+    @override_settings(
+        WEB_CONCURRENCY=3,
+        CACHES={"default": LOCMEM, "responses": LOCMEM},
+    )
+    def test_per_process_caches_with_workers(self):
+        self.assertEqual(len(self.warnings()), 2)
+
+    @override_settings(
+        WEB_CONCURRENCY=3,
+        CACHES={"default": FILEBASED, "responses": LOCMEM},
+        RESPONSE_CACHE_ALIAS=None,
+    )
+    def test_shared_caches(self):
+        self.assertEqual(self.warnings(), [])
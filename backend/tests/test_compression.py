@@ -0,0 +1,80 @@
+import gzip
+import json
+from unittest import skipIf
+
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+
+from api.renderers import FastJSONRenderer
+from core import middleware
+from core.models import Ingredient
+from core.search import ingredient_index
+
+INGREDIENTS_URL = "/api/ingredients/"
+
+
+class FastJSONRendererTest(APITestCase):
+    def test_matches_json_renderer(self):
+        data = {
+            "name": "Щи ",
+            "amount": 1.5,
+            "items": [{"id": 1, "slug": None}],
+            "flag": True,
+        }
+        self.assertEqual(
+            json.loads(FastJSONRenderer().render(data)),
+            json.loads(JSONRenderer().render(data)),
+        )
+        self.assertNotIn(b"\xe2\x80\xa8", FastJSONRenderer().render(data))
+
+
+@override_settings(COMPRESSION_MIN_SIZE=1024, COMPRESSION_CACHE_MIN_SIZE=0)
+class CompressionMiddlewareTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Ingredient.objects.bulk_create(
+            Ingredient(name=f"Ингредиент {i}", measurement_unit="г")
+            for i in range(100)
+        )
+
+    def setUp(self):
+        cache.clear()
+        ingredient_index.rebuild()
+
+    def get(self, encoding, **params):
+        return self.client.get(
+            INGREDIENTS_URL, params, HTTP_ACCEPT_ENCODING=encoding)
+
+    def test_gzip(self):
+        plain = self.get("")
+        self.assertFalse(plain.has_header("Content-Encoding"))
+        self.assertIn("Accept-Encoding", plain["Vary"])
+        response = self.get("gzip, deflate")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+
+    @skipIf(middleware.brotli is None, "Brotli is not installed")
+    def test_brotli_preferred(self):
+        plain = self.get("")
+        response = self.get("gzip, br")
+        self.assertEqual(response["Content-Encoding"], "br")
+        self.assertEqual(
+            middleware.brotli.decompress(response.content), plain.content)
+        response = self.get("gzip, br;q=0.5")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+
+    def test_small_response_untouched(self):
+        response = self.get("gzip", name="Ингредиент 1")
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+    def test_compressed_body_cached(self):
+        plain = self.get("")
+        key = "compressed:gzip:{}".format(
+            middleware.hashlib.blake2b(
+                plain.content, digest_size=16).hexdigest()
+        )
+        self.assertIsNone(cache.get(key))
+        response = self.get("gzip")
+        self.assertEqual(cache.get(key), response.content)
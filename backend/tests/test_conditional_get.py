@@ -0,0 +1,90 @@
+from django.test import override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from core.models import Ingredient, Tag
+from recipes.models import Favorite, Recipe, RecipeIngredient
+from users.models import User
+
+RECIPES_URL = "/api/recipes/"
+TAGS_URL = "/api/tags/"
+INGREDIENTS_URL = "/api/ingredients/"
+
+
+@override_settings(RESPONSE_CACHE_ALIAS=None)
+class ConditionalGetTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username="author", email="author@example.com", password="pass"
+        )
+        cls.token = Token.objects.create(user=cls.author)
+        cls.tag = Tag.objects.create(name="Обед", slug="lunch")
+        cls.salt = Ingredient.objects.create(
+            name="соль", measurement_unit="г")
+        cls.recipe = Recipe.objects.create(
+            author=cls.author, name="Суп", text="Варить", cooking_time=5)
+        cls.recipe.tags.set([cls.tag])
+        RecipeIngredient.objects.create(
+            recipe=cls.recipe, ingredients=cls.salt, amount=5)
+        cls.detail_url = f"{RECIPES_URL}{cls.recipe.id}/"
+
+    def etag(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response["ETag"]
+
+    def assert_not_modified(self, url, queries=1):
+        etag = self.etag(url)
+        with self.assertNumQueries(queries):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        return etag
+
+    def test_not_modified(self):
+        self.assert_not_modified(RECIPES_URL)
+        self.assert_not_modified(self.detail_url)
+        self.assert_not_modified(TAGS_URL)
+        self.assert_not_modified(f"{TAGS_URL}{self.tag.id}/")
+        self.assert_not_modified(INGREDIENTS_URL, queries=0)
+
+    def test_if_modified_since(self):
+        response = self.client.get(self.detail_url)
+        response = self.client.get(
+            self.detail_url,
+            HTTP_IF_MODIFIED_SINCE=response["Last-Modified"],
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_validators_follow_related_changes(self):
+        for change in (
+            lambda: self.salt.save(),
+            lambda: self.tag.save(),
+            lambda: self.recipe.tags.clear(),
+            lambda: self.author.save(),
+        ):
+            before = [self.etag(self.detail_url), self.etag(RECIPES_URL)]
+            change()
+            self.assertNotEqual(
+                [self.etag(self.detail_url), self.etag(RECIPES_URL)], before)
+
+    def test_deleted_recipe_changes_list(self):
+        other = Recipe.objects.create(
+            author=self.author, name="Каша", text="Варить", cooking_time=5)
+        etag = self.etag(RECIPES_URL)
+        other.delete()
+        self.assertNotEqual(self.etag(RECIPES_URL), etag)
+
+    def test_user_state_changes_validator(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+        response = self.client.get(self.detail_url)
+        self.assertFalse(response.has_header("Last-Modified"))
+        etag = response["ETag"]
+        Favorite.objects.create(user=self.author, recipe=self.recipe)
+        self.assertNotEqual(self.etag(self.detail_url), etag)
+
+    def test_unknown_recipe(self):
+        response = self.client.get(f"{RECIPES_URL}0/")
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.has_header("ETag"))
@@ -0,0 +1,153 @@
+from io import StringIO
+
+from django.core.management import call_command
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient, APITestCase
+
+from core.models import Ingredient, Tag
+from recipes.models import Favorite, Recipe
+from users.models import Subscription, User
+
+RECIPES_URL = "/api/recipes/"
+
+
+class CounterTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username="author", email="author@example.com", password="pass"
+        )
+        cls.reader = User.objects.create_user(
+            username="reader", email="reader@example.com", password="pass"
+        )
+        cls.author_token = Token.objects.create(user=cls.author)
+        cls.token = Token.objects.create(user=cls.reader)
+        cls.tag = Tag.objects.create(name="Обед", slug="lunch")
+        cls.salt = Ingredient.objects.create(
+            name="соль", measurement_unit="г")
+        cls.recipes = [
+            Recipe.objects.create(
+                author=cls.author, name=f"Рецепт {i}", text="Текст",
+                cooking_time=5,
+            )
+            for i in range(2)
+        ]
+
+    def setUp(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def counters(self, recipe):
+        response = APIClient().get(f"{RECIPES_URL}{recipe.id}/")
+        return (
+            response.data["favorites_count"],
+            response.data["shopping_cart_count"],
+        )
+
+    def test_favorite_and_cart_counters(self):
+        recipe = self.recipes[0]
+        self.assertEqual(self.counters(recipe), (0, 0))
+        url = f"{RECIPES_URL}{recipe.id}/favorite/"
+        self.client.post(url)
+        self.client.post(url)
+        self.client.post(f"{RECIPES_URL}{recipe.id}/shopping_cart/")
+        self.assertEqual(self.counters(recipe), (1, 1))
+
+        self.client.delete(url)
+        self.client.delete(url)
+        self.assertEqual(self.counters(recipe), (0, 1))
+
+        ids = [item.id for item in self.recipes]
+        self.client.post(f"{RECIPES_URL}favorite/", {"recipes": ids},
+                         format="json")
+        self.assertEqual(
+            list(Recipe.objects.order_by("pk").values_list(
+                "favorites_count", flat=True)),
+            [1, 1],
+        )
+
+    def test_author_counters(self):
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.recipes_count, 2)
+        self.client.post(f"/api/users/{self.author.id}/subscribe/")
+        response = self.client.get("/api/users/subscriptions/")
+        item = response.data["results"][0]
+        self.assertEqual(item["recipes_count"], 2)
+        self.assertEqual(item["subscribers_count"], 1)
+
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Token {self.author_token.key}")
+        response = self.client.post(RECIPES_URL, {
+            "name": "Суп",
+            "text": "Варить",
+            "cooking_time": 5,
+            "image": None,
+            "ingredients": [{"id": self.salt.id, "amount": 1}],
+            "tags": [self.tag.id],
+        }, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.client.delete(f"{RECIPES_URL}{self.recipes[0].id}/")
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.recipes_count, 2)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+        self.client.delete(f"/api/users/{self.author.id}/subscribe/")
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.subscribers_count, 0)
+
+    def test_full_saves_keep_concurrent_counters(self):
+        recipe = Recipe.objects.defer("search_vector").get(
+            pk=self.recipes[0].pk)
+        author = User.objects.get(pk=self.author.pk)
+        self.client.post(f"{RECIPES_URL}{recipe.id}/favorite/")
+        Recipe.objects.filter(pk=recipe.pk).update(trending_score=5)
+        Subscription.objects.create(user=self.reader, subscription=author)
+
+        recipe.name = "Новое название"
+        recipe.save()
+        author.first_name = "Иван"
+        author.save()
+
+        recipe = Recipe.objects.get(pk=recipe.pk)
+        self.assertEqual(recipe.name, "Новое название")
+        self.assertEqual(
+            (recipe.favorites_count, recipe.trending_score), (1, 5))
+        author.refresh_from_db()
+        self.assertEqual(author.first_name, "Иван")
+        self.assertEqual(
+            (author.recipes_count, author.subscribers_count), (2, 1))
+
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Token {self.author_token.key}")
+        response = self.client.patch(
+            f"{RECIPES_URL}{recipe.id}/",
+            {
+                "name": "Суп",
+                "ingredients": [{"id": self.salt.id, "amount": 5}],
+                "tags": [self.tag.id],
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["favorites_count"], 1)
+        response = self.client.delete("/api/users/me/avatar/")
+        self.assertEqual(response.status_code, 204)
+        author.refresh_from_db()
+        self.assertEqual(author.subscribers_count, 1)
+
+    def test_reconcile(self):
+        Favorite.objects.create(user=self.reader, recipe=self.recipes[0])
+        Recipe.objects.update(favorites_count=7)
+        User.objects.update(recipes_count=0, subscribers_count=3)
+        output = StringIO()
+        call_command("reconcile_counters", batch_size=1, stdout=output)
+        self.assertEqual(
+            list(Recipe.objects.order_by("pk").values_list(
+                "favorites_count", flat=True)),
+            [1, 0],
+        )
+        self.author.refresh_from_db()
+        self.assertEqual(
+            (self.author.recipes_count, self.author.subscribers_count),
+            (2, 0),
+        )
+        self.assertIn("fixed 2", output.getvalue())
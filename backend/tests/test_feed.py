@@ -0,0 +1,95 @@
+from django.test import override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from core.models import Ingredient, Tag
+from recipes.models import Recipe, TimelineEntry
+from users.models import Subscription, User
+
+FEED_URL = "/api/recipes/feed/"
+
+
+@override_settings(FEED_FANOUT_THRESHOLD=1, FEED_BATCH_SIZE=2)
+class FeedTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader, cls.author, cls.star, cls.fan = (
+            User.objects.create_user(
+                username=name, email=f"{name}@example.com", password="pass")
+            for name in ("reader", "author", "star", "fan")
+        )
+        cls.tag = Tag.objects.create(name="Обед", slug="lunch")
+        cls.flour = Ingredient.objects.create(
+            name="мука", measurement_unit="г")
+        Subscription.objects.create(user=cls.fan, subscription=cls.star)
+
+    def login(self, user):
+        token, _ = Token.objects.get_or_create(user=user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+
+    def publish(self, author, name):
+        self.login(author)
+        response = self.client.post("/api/recipes/", {
+            "name": name,
+            "text": "Текст",
+            "cooking_time": 10,
+            "image": None,
+            "ingredients": [{"id": self.flour.id, "amount": 100}],
+            "tags": [self.tag.id],
+        }, format="json")
+        self.assertEqual(response.status_code, 201)
+        return response.data["id"]
+
+    def subscribe(self, author, method="post"):
+        self.login(self.reader)
+        response = getattr(self.client, method)(
+            f"/api/users/{author.id}/subscribe/")
+        self.assertIn(response.status_code, (201, 204))
+
+    def feed_ids(self, limit=10):
+        self.login(self.reader)
+        ids, url, params = [], FEED_URL, {"limit": limit}
+        while url:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            ids += [item["id"] for item in response.data["results"]]
+            url, params = response.data["next"], None
+        return ids
+
+    def test_fan_out_on_write(self):
+        self.subscribe(self.author)
+        recipe_id = self.publish(self.author, "Суп")
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.reader, recipe_id=recipe_id).exists())
+        self.assertEqual(self.feed_ids(), [recipe_id])
+
+    def test_subscription_backfills_and_prunes(self):
+        recipe_ids = [self.publish(self.author, f"Суп {i}") for i in range(3)]
+        self.subscribe(self.author)
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.reader).count(), 3)
+        self.assertEqual(self.feed_ids(limit=2), recipe_ids[::-1])
+
+        self.subscribe(self.author, "delete")
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertEqual(self.feed_ids(), [])
+
+    def test_popular_authors_are_merged_on_read(self):
+        self.subscribe(self.author)
+        self.subscribe(self.star)
+        published = [
+            self.publish(author, f"Рецепт {i}")
+            for i, author in enumerate(
+                (self.star, self.author, self.star, self.author))
+        ]
+        self.assertFalse(TimelineEntry.objects.filter(
+            author=self.star).exists())
+        self.assertEqual(self.feed_ids(limit=1), published[::-1])
+
+        Subscription.objects.filter(user=self.fan).delete()
+        self.assertEqual(self.feed_ids(limit=3), published[::-1])
+        Recipe.objects.filter(pk=published[0]).delete()
+        self.assertEqual(self.feed_ids(), published[:0:-1])
+
+    def test_requires_authentication(self):
+        self.assertEqual(self.client.get(FEED_URL).status_code, 401)
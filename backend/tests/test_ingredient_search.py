@@ -0,0 +1,65 @@
+from unittest import mock
+
+from rest_framework.test import APITestCase
+
+from core.models import Ingredient
+from core.search import ingredient_index
+
+INGREDIENTS_URL = "/api/ingredients/"
+
+
+class IngredientSearchTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for name in ("мука", "сахар", "сахарная пудра", "тростниковый сахар"):
+            Ingredient.objects.create(name=name, measurement_unit="г")
+
+    def setUp(self):
+        ingredient_index.rebuild()
+
+    def search(self, **params):
+        response = self.client.get(INGREDIENTS_URL, params)
+        self.assertEqual(response.status_code, 200)
+        return [item["name"] for item in response.data]
+
+    def test_ranking(self):
+        with self.assertNumQueries(0):
+            names = self.search(name="Сахар")
+        self.assertEqual(
+            names, ["сахар", "сахарная пудра", "тростниковый сахар"])
+
+    def test_limit(self):
+        self.assertEqual(self.search(name="сах", limit=1), ["сахар"])
+        response = self.client.get(INGREDIENTS_URL, {"limit": 0})
+        self.assertEqual(response.status_code, 400)
+
+    def test_substring_matches(self):
+        self.assertEqual(self.search(name="пуд"), ["сахарная пудра"])
+        self.assertEqual(
+            self.search(name="ахар"),
+            ["сахар", "сахарная пудра", "тростниковый сахар"],
+        )
+        self.assertEqual(self.search(name="ук"), ["мука"])
+        self.assertEqual(self.search(name="хм"), [])
+
+    def test_rebuilds_after_change(self):
+        Ingredient.objects.create(name="сахарин", measurement_unit="г")
+        with mock.patch.object(
+            ingredient_index, "schedule_rebuild"
+        ) as schedule_rebuild:
+            self.assertNotIn("сахарин", self.search(name="сахар"))
+        schedule_rebuild.assert_called_once()
+        ingredient_index.rebuild()
+        self.assertIn("сахарин", self.search(name="сахар"))
+        Ingredient.objects.filter(name="сахарин").get().delete()
+        ingredient_index.rebuild()
+        self.assertNotIn("сахарин", self.search(name="сахар"))
+
+    def test_cold_index_uses_database(self):
+        ingredient_index.entries = None
+        with mock.patch.object(
+            ingredient_index, "schedule_rebuild"
+        ) as schedule_rebuild:
+            names = self.search(name="сахар")
+        schedule_rebuild.assert_called_once()
+        self.assertEqual(names, ["сахар", "сахарная пудра"])
@@ -0,0 +1,157 @@
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from core.management.commands import load_ingredients
+from core.models import CatalogChange, Ingredient
+from core.search import get_index_version
+from recipes.models import Recipe, RecipeIngredient
+from users.models import User
+
+DATA_DIR = settings.BASE_DIR.parent / "data"
+CATALOG_SIZE = 2186
+COPY_MODES = ((), ("--no-copy",)) if connection.vendor == "postgresql" else (
+    ("--no-copy",),)
+
+
+class LoadIngredientsTest(APITestCase):
+    def load(self, name, *args):
+        call_command(
+            "load_ingredients", str(DATA_DIR / name), *args, stdout=StringIO())
+
+    def test_shipped_catalogs_load_idempotently(self):
+        for mode in COPY_MODES:
+            for name in ("ingredients.csv", "ingredients.json"):
+                with self.subTest(mode=mode, name=name):
+                    changes = CatalogChange.objects.count()
+                    version = get_index_version()
+                    self.load(name, *mode)
+                    self.assertEqual(Ingredient.objects.count(), CATALOG_SIZE)
+                    self.assertEqual(
+                        CatalogChange.objects.count(), changes + 1)
+                    self.assertNotEqual(get_index_version(), version)
+
+                    Ingredient.objects.filter(
+                        name="абрикосовый сок").update(measurement_unit="л")
+                    self.load(name, *mode)
+                    self.assertEqual(Ingredient.objects.count(), CATALOG_SIZE)
+                    self.assertEqual(
+                        Ingredient.objects.get(
+                            name="абрикосовый сок").measurement_unit,
+                        "мл",
+                    )
+                    self.assertEqual(
+                        CatalogChange.objects.filter(
+                            model=CatalogChange.INGREDIENT).count(),
+                        changes + 2,
+                    )
+                    Ingredient.objects.all().delete()
+
+    def test_json_buffer_refills_across_chunks(self):
+        with mock.patch.object(load_ingredients, "CHUNK_SIZE", 37):
+            self.load("ingredients.json", "--batch-size", "100")
+        self.assertEqual(Ingredient.objects.count(), CATALOG_SIZE)
+        self.assertEqual(
+            Ingredient.objects.get(name="абрикосовое пюре").measurement_unit,
+            "г",
+        )
+
+    def test_malformed_json_rejected(self):
+        for content, message in (
+            ('{"name": "соль"}', "must be an array"),
+            ('[{"name": "соль", "measurement_unit": "г"}, {"na', "end"),
+        ):
+            with tempfile.TemporaryDirectory() as directory:
+                path = Path(directory) / "catalog.json"
+                path.write_text(content, encoding="utf-8")
+                with self.subTest(content=content), self.assertRaisesMessage(
+                    CommandError, message
+                ):
+                    call_command(
+                        "load_ingredients", str(path), stdout=StringIO())
+        self.assertFalse(Ingredient.objects.exists())
+
+    def test_malformed_rows_skipped(self):
+        for name, content, skipped in (
+            (
+                "catalog.csv",
+                "соль,г\nперец\n\n,мл\n\"сахар\",г\nмука,\n",
+                ["line 2", "line 4", "line 6"],
+            ),
+            (
+                "catalog.json",
+                '[{"name": "соль", "measurement_unit": "г"}, '
+                '{"name": "перец"}, "мука", '
+                '{"name": "сахар", "measurement_unit": "г"}]',
+                ["item 2", "item 3"],
+            ),
+        ):
+            for mode in COPY_MODES:
+                with self.subTest(name=name, mode=mode):
+                    with tempfile.TemporaryDirectory() as directory:
+                        path = Path(directory) / name
+                        path.write_text(content, encoding="utf-8")
+                        errors = StringIO()
+                        call_command(
+                            "load_ingredients", str(path), *mode,
+                            stdout=StringIO(), stderr=errors)
+                    self.assertEqual(
+                        sorted(Ingredient.objects.values_list(
+                            "name", flat=True)),
+                        ["сахар", "соль"],
+                    )
+                    self.assertEqual(errors.getvalue().splitlines(), [
+                        f"Skipped malformed {location}."
+                        for location in skipped
+                    ])
+                    Ingredient.objects.all().delete()
+
+    def test_unit_change_touches_recipes(self):
+        for mode in COPY_MODES:
+            with self.subTest(mode=mode):
+                ingredient = Ingredient.objects.create(
+                    name="абрикосовое варенье", measurement_unit="кг")
+                author = User.objects.create_user(
+                    username="author", email="author@example.com",
+                    password="pass",
+                )
+                recipe = Recipe.objects.create(
+                    author=author, name="Пирог", text="Текст",
+                    cooking_time=5,
+                )
+                RecipeIngredient.objects.create(
+                    recipe=recipe, ingredients=ingredient, amount=100)
+                stale = timezone.now() - timedelta(days=1)
+                Ingredient.objects.update(updated_at=stale)
+                Recipe.objects.update(updated_at=stale)
+                url = f"/api/recipes/{recipe.id}/"
+                self.assertEqual(
+                    self.client.get(url).data["ingredients"][0][
+                        "measurement_unit"],
+                    "кг",
+                )
+
+                self.load("ingredients.csv", *mode)
+                ingredient.refresh_from_db()
+                recipe.refresh_from_db()
+                self.assertEqual(ingredient.measurement_unit, "г")
+                self.assertGreater(ingredient.updated_at, stale)
+                self.assertGreater(recipe.updated_at, stale)
+                self.assertFalse(Ingredient.objects.filter(
+                    updated_at__isnull=True).exists())
+                self.assertEqual(
+                    self.client.get(url).data["ingredients"][0][
+                        "measurement_unit"],
+                    "г",
+                )
+                Recipe.objects.all().delete()
+                User.objects.all().delete()
+                Ingredient.objects.all().delete()
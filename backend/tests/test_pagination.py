@@ -0,0 +1,97 @@
+import json
+from base64 import urlsafe_b64encode
+
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from recipes.models import Recipe
+from users.models import User
+
+RECIPES_URL = "/api/recipes/"
+
+
+class KeysetPaginationTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(
+            username="author", email="author@example.com", password="pass"
+        )
+        for i in range(7):
+            Recipe.objects.create(
+                author=author, name=f"Рецепт {i}", text="Текст",
+                cooking_time=i % 3 + 1,
+            )
+
+    def walk(self, params):
+        ids, url = [], RECIPES_URL
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn("count", response.data)
+            self.assertFalse(any(
+                "COUNT(" in query["sql"] for query in queries.captured_queries
+            ))
+            ids += [item["id"] for item in response.data["results"]]
+            url, params = response.data["next"], None
+        return ids
+
+    def test_walks_all_recipes_in_order(self):
+        ids = self.walk({"pagination": "cursor", "limit": 3})
+        self.assertEqual(
+            ids, list(Recipe.objects.order_by("-id").values_list(
+                "id", flat=True)))
+
+    def test_page_number_contract_kept(self):
+        response = self.client.get(RECIPES_URL, {"page": 2, "limit": 3})
+        self.assertEqual(response.data["count"], 7)
+        self.assertEqual(len(response.data["results"]), 3)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(RECIPES_URL, {"cursor": "garbage"})
+        self.assertEqual(response.status_code, 404)
+
+    def test_tampered_cursor(self):
+        for params, values in (
+            ({}, ["abc"]),
+            ({}, [None]),
+            ({}, [[1]]),
+            ({"ordering": "cooking_time"}, ["abc", 1]),
+            ({"ordering": "popular"}, [{}, 1]),
+        ):
+            cursor = urlsafe_b64encode(json.dumps(values).encode()).decode()
+            with self.subTest(params=params, values=values):
+                response = self.client.get(
+                    RECIPES_URL, {**params, "cursor": cursor})
+                self.assertEqual(response.status_code, 404)
+
+
+@override_settings(RESPONSE_CACHE_ALIAS=None)
+class CachedCountPaginationTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username="author", email="author@example.com", password="pass"
+        )
+        for i in range(3):
+            Recipe.objects.create(
+                author=cls.author, name=f"Рецепт {i}", text="Текст",
+                cooking_time=5,
+            )
+
+    def count_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(RECIPES_URL, {"author": self.author.id})
+        self.assertTrue(response.data["count_exact"])
+        counted = sum(
+            "COUNT(" in query["sql"] for query in queries.captured_queries)
+        return response.data["count"], counted
+
+    def test_count_is_cached_and_invalidated(self):
+        self.assertEqual(self.count_queries(), (3, 1))
+        self.assertEqual(self.count_queries(), (3, 0))
+        Recipe.objects.create(
+            author=self.author, name="Новый", text="Текст", cooking_time=5)
+        self.assertEqual(self.count_queries(), (4, 1))
@@ -0,0 +1,96 @@
+import gzip
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from core.models import Ingredient, Tag
+from recipes.models import Recipe, RecipeIngredient
+from users.models import User
+
+EXPORT_URL = "/api/recipes/export/"
+
+
+class RecipeExportTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            username="admin", email="admin@example.com", password="pass",
+            is_staff=True,
+        )
+        cls.token = Token.objects.create(user=cls.admin)
+        ingredient = Ingredient.objects.create(
+            name="соль", measurement_unit="г")
+        tag = Tag.objects.create(name="Обед", slug="lunch")
+        cls.recipes = []
+        for i in range(5):
+            recipe = Recipe.objects.create(
+                author=cls.admin, name=f"Рецепт {i}", text="Текст",
+                cooking_time=5,
+            )
+            recipe.tags.add(tag)
+            RecipeIngredient.objects.create(
+                recipe=recipe, ingredients=ingredient, amount=i + 1)
+            cls.recipes.append(recipe)
+
+    def setUp(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def export(self, **params):
+        response = self.client.get(EXPORT_URL, params)
+        self.assertEqual(response.status_code, 200)
+        body = b"".join(response.streaming_content)
+        if response.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        return [json.loads(line) for line in body.splitlines()]
+
+    def test_exports_everything_in_id_order(self):
+        records = self.export()
+        self.assertEqual(
+            [record["id"] for record in records],
+            [recipe.id for recipe in self.recipes],
+        )
+        self.assertEqual(records[2]["ingredients"][0]["amount"], 3)
+        self.assertEqual(records[2]["tags"][0]["slug"], "lunch")
+        self.assertEqual(records[2]["author"]["username"], "admin")
+
+    def test_resumes_after_since_id(self):
+        records = self.export(since_id=self.recipes[2].id)
+        self.assertEqual(
+            [record["id"] for record in records],
+            [recipe.id for recipe in self.recipes[3:]],
+        )
+
+    def test_gzip(self):
+        response = self.client.get(EXPORT_URL, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        body = gzip.decompress(b"".join(response.streaming_content))
+        self.assertEqual(len(body.splitlines()), 5)
+
+    def test_admin_only(self):
+        user = User.objects.create_user(
+            username="user", email="user@example.com", password="pass")
+        self.client.force_authenticate(user)
+        self.assertEqual(self.client.get(EXPORT_URL).status_code, 403)
+
+    def test_command_resumes_into_same_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "recipes.ndjson.gz")
+            call_command(
+                "export_recipes", output=path, gzip=True, chunk_size=2,
+                since_id=0, stderr=StringIO(),
+            )
+            call_command(
+                "export_recipes", output=path, gzip=True,
+                since_id=self.recipes[3].id, stderr=StringIO(),
+            )
+            with gzip.open(path) as file:
+                ids = [json.loads(line)["id"] for line in file]
+        self.assertEqual(
+            ids,
+            [recipe.id for recipe in self.recipes] + [self.recipes[4].id],
+        )
@@ -0,0 +1,155 @@
+from django.db import connection
+from django.db.models import Exists, OuterRef
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from core.models import Tag
+from recipes.models import Favorite, Recipe, ShoppingCart
+from users.models import User
+
+RECIPES_URL = "/api/recipes/"
+
+
+class RecipeFilterTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(
+            username="reader", email="reader@example.com", password="pass"
+        )
+        cls.token = Token.objects.create(user=cls.reader)
+        cls.breakfast = Tag.objects.create(name="Завтрак", slug="breakfast")
+        cls.lunch = Tag.objects.create(name="Обед", slug="lunch")
+        cls.dinner = Tag.objects.create(name="Ужин", slug="dinner")
+        cls.recipes = []
+        for i, tags in enumerate((
+            [cls.breakfast],
+            [cls.breakfast, cls.lunch],
+            [cls.lunch],
+            [cls.dinner],
+        )):
+            recipe = Recipe.objects.create(
+                author=cls.reader, name=f"Рецепт {i}", text="Текст",
+                cooking_time=(i + 1) * 10,
+            )
+            recipe.tags.set(tags)
+            cls.recipes.append(recipe)
+        Favorite.objects.create(user=cls.reader, recipe=cls.recipes[1])
+        ShoppingCart.objects.create(user=cls.reader, recipe=cls.recipes[3])
+
+    def get_ids(self, params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(RECIPES_URL, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(any(
+            "DISTINCT" in query["sql"] for query in queries.captured_queries
+        ))
+        return sorted(item["id"] for item in response.data["results"])
+
+    def ids(self, *indexes):
+        return sorted(self.recipes[index].id for index in indexes)
+
+    def test_tags_match_any(self):
+        self.assertEqual(
+            self.get_ids({"tags": ["breakfast", "lunch"]}),
+            self.ids(0, 1, 2),
+        )
+
+    def test_tag_condition_in_subqueries(self):
+        other = User.objects.create_user(
+            username="other", email="other@example.com", password="pass")
+        Recipe.objects.create(
+            author=other, name="Без тегов", text="Текст", cooking_time=5)
+        authors = User.objects.filter(Exists(Recipe.objects.filter(
+            author=OuterRef("pk")).with_any_tag(["dinner"])))
+        self.assertEqual(list(authors), [self.reader])
+        nested = Recipe.objects.filter(pk__in=Recipe.objects.with_any_tag(
+            ["lunch"]).values("pk")).values_list("pk", flat=True)
+        self.assertEqual(sorted(nested), self.ids(1, 2))
+
+    def test_tag_changes_are_tracked(self):
+        self.recipes[3].tags.add(self.lunch)
+        self.assertEqual(self.get_ids({"tags": "lunch"}), self.ids(1, 2, 3))
+        self.lunch.recipes.remove(self.recipes[1])
+        self.assertEqual(self.get_ids({"tags": "lunch"}), self.ids(2, 3))
+
+    def test_unknown_tag_rejected(self):
+        response = self.client.get(RECIPES_URL, {"tags": "unknown"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_new_tag_becomes_a_choice(self):
+        self.get_ids({"tags": "breakfast"})
+        Tag.objects.create(name="Десерт", slug="dessert")
+        self.assertEqual(self.get_ids({"tags": "dessert"}), [])
+
+    def test_tag_choices_are_cached(self):
+        self.get_ids({"tags": "breakfast"})
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(RECIPES_URL, {"tags": "breakfast"})
+        self.assertFalse(any(
+            query["sql"].startswith('SELECT "core_tag"."slug" FROM')
+            for query in queries.captured_queries
+        ))
+
+    def test_favorite_and_cart_filters(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+        self.assertEqual(self.get_ids({"is_favorited": 1}), self.ids(1))
+        self.assertEqual(
+            self.get_ids({"is_in_shopping_cart": 1}), self.ids(3))
+
+    def test_cooking_time_range(self):
+        self.assertEqual(
+            self.get_ids({"cooking_time_min": 15, "cooking_time_max": 30}),
+            self.ids(1, 2),
+        )
+
+    def get_facets(self, params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(RECIPES_URL, {**params, "facets": 1})
+        self.assertEqual(response.status_code, 200)
+        aggregates = [
+            query for query in queries.captured_queries
+            if '"tag_0"' in query["sql"]
+        ]
+        return response.data["facets"], len(aggregates)
+
+    def test_facets_exclude_their_own_filter(self):
+        facets, queries = self.get_facets(
+            {"tags": "lunch", "cooking_time_max": 30})
+        self.assertEqual(queries, 1)
+        self.assertEqual(
+            facets["tags"], {"breakfast": 2, "dinner": 0, "lunch": 2})
+        self.assertEqual(
+            [bucket["count"] for bucket in facets["cooking_time"]],
+            [0, 2, 0, 0],
+        )
+        self.assertEqual(
+            facets["cooking_time"][-1], {"min": 61, "max": None, "count": 0})
+
+    def test_facets_are_cached_per_signature(self):
+        params = {"cooking_time_min": 20}
+        self.assertEqual(self.get_facets(params)[1], 1)
+        self.assertEqual(self.get_facets({**params, "limit": 2})[1], 0)
+        self.assertEqual(
+            self.get_facets({"cooking_time_min": 30})[0]["tags"]["lunch"], 1)
+
+        self.recipes[3].tags.add(self.lunch)
+        facets, queries = self.get_facets({**params, "limit": 3})
+        self.assertEqual(queries, 1)
+        self.assertEqual(facets["tags"]["lunch"], 3)
+
+    def test_facets_follow_user_filters(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+        facets, _ = self.get_facets({"is_favorited": 1})
+        self.assertEqual(
+            facets["tags"], {"breakfast": 1, "dinner": 0, "lunch": 1})
+        facets, _ = self.get_facets({"is_in_shopping_cart": 1})
+        self.assertEqual(
+            facets["tags"], {"breakfast": 0, "dinner": 1, "lunch": 0})
+
+    def test_facets_with_search(self):
+        facets, _ = self.get_facets({"search": "Рецепт", "tags": "dinner"})
+        self.assertEqual(
+            [bucket["count"] for bucket in facets["cooking_time"]],
+            [0, 0, 1, 0],
+        )
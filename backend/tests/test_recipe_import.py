@@ -0,0 +1,96 @@
+import json
+from unittest import mock
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from api import imports
+from core.models import Ingredient, Tag
+from recipes.models import Recipe, RecipeIngredient
+from users.models import User
+
+IMPORT_URL = "/api/recipes/import/"
+
+
+class RecipeImportTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username="editor", email="editor@example.com", password="pass"
+        )
+        cls.token = Token.objects.create(user=cls.user)
+        cls.ingredients = [
+            Ingredient.objects.create(
+                name=f"Ингредиент {i}", measurement_unit="г")
+            for i in range(3)
+        ]
+        cls.tag = Tag.objects.create(name="Обед", slug="lunch")
+
+    def setUp(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def recipe(self, name, ingredient_ids=None):
+        return {
+            "name": name,
+            "text": "Текст",
+            "cooking_time": 10,
+            "image": None,
+            "ingredients": [
+                {"id": pk, "amount": 5}
+                for pk in ingredient_ids
+                or [ingredient.id for ingredient in self.ingredients]
+            ],
+            "tags": [self.tag.id],
+        }
+
+    def post(self, lines):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                IMPORT_URL,
+                data="\n".join(lines).encode(),
+                content_type="application/x-ndjson",
+            )
+            body = b"".join(response.streaming_content)
+        self.assertEqual(response.status_code, 200)
+        return [json.loads(line) for line in body.splitlines()], queries
+
+    def test_results_per_line(self):
+        missing = self.ingredients[-1].id + 1
+        results, _ = self.post([
+            json.dumps(self.recipe("Суп")),
+            "{broken",
+            "",
+            json.dumps(self.recipe("Рагу", [missing])),
+            json.dumps(self.recipe("Каша")),
+        ])
+        self.assertEqual([result["line"] for result in results], [1, 2, 4, 5])
+        self.assertIn("id", results[0])
+        self.assertIn("errors", results[1])
+        self.assertIn("ingredients", results[2]["errors"])
+        recipe = Recipe.objects.get(pk=results[3]["id"])
+        self.assertEqual(recipe.author, self.user)
+        self.assertEqual(list(recipe.tags.all()), [self.tag])
+        self.assertEqual(
+            RecipeIngredient.objects.filter(recipe=recipe).count(), 3)
+        self.assertEqual(Recipe.objects.count(), 2)
+
+    def test_queries_per_chunk(self):
+        lines = [json.dumps(self.recipe(f"Рецепт {i}")) for i in range(30)]
+        results, queries = self.post(lines)
+        self.assertEqual(len(results), 30)
+        if connection.features.can_return_rows_from_bulk_insert:
+            self.assertLessEqual(len(queries), 12)
+
+    def test_chunks(self):
+        with mock.patch.object(imports, "IMPORT_CHUNK_SIZE", 2):
+            results, _ = self.post(
+                [json.dumps(self.recipe(f"Рецепт {i}")) for i in range(5)])
+        self.assertEqual(len({result["id"] for result in results}), 5)
+
+    def test_requires_authentication(self):
+        self.client.credentials()
+        response = self.client.post(
+            IMPORT_URL, data=b"{}", content_type="application/x-ndjson")
+        self.assertEqual(response.status_code, 401)
@@ -0,0 +1,103 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from recipes.models import Favorite, Recipe, ShoppingCart
+from users.models import User
+
+RECIPES_URL = "/api/recipes/"
+
+
+class RecipeOrderingTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(
+            username="author", email="author@example.com", password="pass"
+        )
+        cls.readers = [
+            User.objects.create_user(
+                username=f"reader{i}", email=f"reader{i}@example.com",
+                password="pass",
+            )
+            for i in range(3)
+        ]
+        cls.token = Token.objects.create(user=cls.readers[0])
+        cls.recipes = [
+            Recipe.objects.create(
+                author=author, name=f"Рецепт {i}", text="Текст",
+                cooking_time=cooking_time,
+            )
+            for i, cooking_time in enumerate((30, 10, 20, 10))
+        ]
+        old, fresh, other = cls.recipes[:3]
+        for reader in cls.readers:
+            Favorite.objects.create(user=reader, recipe=old)
+        Favorite.objects.create(user=cls.readers[0], recipe=fresh)
+        ShoppingCart.objects.create(user=cls.readers[1], recipe=fresh)
+        ShoppingCart.objects.create(user=cls.readers[2], recipe=other)
+        Favorite.objects.filter(recipe=old).update(
+            created_at=timezone.now() - timedelta(days=30))
+
+    def ids(self, **params):
+        response = self.client.get(RECIPES_URL, params)
+        self.assertEqual(response.status_code, 200)
+        return [item["id"] for item in response.data["results"]]
+
+    def expected(self, *indexes):
+        return [self.recipes[index].id for index in indexes]
+
+    def update_trending(self, *args):
+        output = StringIO()
+        call_command("update_trending", *args, stdout=output)
+        return output.getvalue()
+
+    def test_static_orderings(self):
+        self.assertEqual(
+            self.ids(ordering="newest"), self.expected(3, 2, 1, 0))
+        self.assertEqual(
+            self.ids(ordering="popular"), self.expected(0, 1, 3, 2))
+        self.assertEqual(
+            self.ids(ordering="cooking_time"), self.expected(3, 1, 2, 0))
+
+    def test_trending_uses_recent_engagement(self):
+        self.update_trending()
+        self.assertEqual(
+            self.ids(ordering="trending"), self.expected(1, 2, 3, 0))
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+        for recipe in (self.recipes[2], self.recipes[3]):
+            self.client.post(f"{RECIPES_URL}{recipe.id}/favorite/")
+        self.client.delete(f"{RECIPES_URL}{self.recipes[1].id}/favorite/")
+        output = self.update_trending()
+        self.assertIn("updated 3 scores", output)
+        self.assertEqual(
+            list(Recipe.objects.order_by("pk").values_list(
+                "trending_score", flat=True)),
+            [0, 1, 3, 2],
+        )
+
+    def test_scores_expire(self):
+        self.update_trending()
+        Favorite.objects.filter(recipe=self.recipes[1]).update(
+            created_at=timezone.now() - timedelta(days=8))
+        self.update_trending("--full")
+        self.assertEqual(
+            Recipe.objects.get(pk=self.recipes[1].pk).trending_score, 1)
+
+    def test_cursor_walk(self):
+        self.update_trending()
+        ids, url, params = [], RECIPES_URL, {
+            "ordering": "trending", "pagination": "cursor", "limit": 1}
+        while url:
+            response = self.client.get(url, params)
+            ids += [item["id"] for item in response.data["results"]]
+            url, params = response.data["next"], None
+        self.assertEqual(ids, self.expected(1, 2, 3, 0))
+
+    def test_unknown_ordering(self):
+        response = self.client.get(RECIPES_URL, {"ordering": "name"})
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,112 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from core.models import Ingredient, Tag
+from recipes.models import Favorite, Recipe, RecipeIngredient, ShoppingCart
+from users.models import Subscription, User
+
+RECIPES_URL = "/api/recipes/"
+LIST_QUERIES_ANONYMOUS = 6
+LIST_QUERIES_AUTHENTICATED = 8
+DETAIL_QUERIES_ANONYMOUS = 4
+DETAIL_QUERIES_AUTHENTICATED = 6
+
+
+class RecipeQueryCountTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(
+            username="reader", email="reader@example.com", password="pass"
+        )
+        cls.token = Token.objects.create(user=cls.reader)
+        tags = [
+            Tag.objects.create(name=f"Тег {i}", slug=f"tag-{i}")
+            for i in range(3)
+        ]
+        ingredients = [
+            Ingredient.objects.create(
+                name=f"Ингредиент {i}", measurement_unit="г")
+            for i in range(5)
+        ]
+        for i in range(25):
+            author = User.objects.create_user(
+                username=f"author{i}",
+                email=f"author{i}@example.com",
+                password="pass",
+            )
+            recipe = Recipe.objects.create(
+                author=author,
+                name=f"Рецепт {i}",
+                text="Описание",
+                cooking_time=10,
+            )
+            recipe.tags.set(tags)
+            RecipeIngredient.objects.bulk_create(
+                RecipeIngredient(
+                    recipe=recipe, ingredients=ingredient, amount=i + 1
+                )
+                for ingredient in ingredients
+            )
+            if i % 2:
+                Favorite.objects.create(user=cls.reader, recipe=recipe)
+                Subscription.objects.create(
+                    user=cls.reader, subscription=author)
+            if i % 3:
+                ShoppingCart.objects.create(user=cls.reader, recipe=recipe)
+        cls.recipe = recipe
+
+    def authenticate(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def get_counted(self, url, data=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, data)
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def assert_constant_list(self, expected):
+        for limit in (1, 10, 25):
+            with self.subTest(limit=limit):
+                response, queries = self.get_counted(
+                    RECIPES_URL, {"limit": limit})
+                self.assertEqual(len(response.data["results"]), limit)
+                self.assertLessEqual(queries, expected)
+
+    def test_list_anonymous(self):
+        self.assert_constant_list(LIST_QUERIES_ANONYMOUS)
+
+    def test_list_authenticated(self):
+        self.authenticate()
+        self.assert_constant_list(LIST_QUERIES_AUTHENTICATED)
+
+    def test_detail_anonymous(self):
+        _, queries = self.get_counted(f"{RECIPES_URL}{self.recipe.id}/")
+        self.assertLessEqual(queries, DETAIL_QUERIES_ANONYMOUS)
+
+    def test_detail_authenticated(self):
+        self.authenticate()
+        _, queries = self.get_counted(f"{RECIPES_URL}{self.recipe.id}/")
+        self.assertLessEqual(queries, DETAIL_QUERIES_AUTHENTICATED)
+
+    def test_flags_come_from_annotations(self):
+        self.authenticate()
+        response = self.client.get(RECIPES_URL, {"limit": 25})
+        recipes = {recipe.id: recipe for recipe in Recipe.objects.all()}
+        for item in response.data["results"]:
+            recipe = recipes[item["id"]]
+            self.assertEqual(
+                item["is_favorited"],
+                recipe.favorited_by.filter(user=self.reader).exists(),
+            )
+            self.assertEqual(
+                item["is_in_shopping_cart"],
+                recipe.in_shopping_carts.filter(user=self.reader).exists(),
+            )
+            self.assertEqual(
+                item["author"]["is_subscribed"],
+                recipe.author.subscribed_to.filter(user=self.reader).exists(),
+            )
+            self.assertEqual(len(item["ingredients"]), 5)
+            self.assertEqual(len(item["tags"]), 3)
@@ -0,0 +1,86 @@
+from unittest import mock
+
+from django.test import override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from api.views import RecipeViewSet
+from core.models import Ingredient, Tag
+from recipes.models import Favorite, Recipe, RecipeIngredient, ShoppingCart
+from users.models import Subscription, User
+
+RECIPES_URL = "/api/recipes/"
+
+
+@override_settings(RESPONSE_CACHE_ALIAS=None)
+class RecipeReaderTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(
+            username="reader", email="reader@example.com", password="pass"
+        )
+        cls.token = Token.objects.create(user=cls.reader)
+        tags = [
+            Tag.objects.create(name=name, slug=f"tag-{i}")
+            for i, name in enumerate(("Ужин", "Завтрак", "Обед"))
+        ]
+        ingredients = [
+            Ingredient.objects.create(
+                name=f"Ингредиент {i}", measurement_unit="г")
+            for i in range(4)
+        ]
+        for i in range(12):
+            author = User.objects.create_user(
+                username=f"author{i}",
+                email=f"author{i}@example.com",
+                password="pass",
+                first_name="Имя",
+                last_name="Фамилия",
+                avatar=f"avatar/{i}.png" if i % 2 else None,
+            )
+            recipe = Recipe.objects.create(
+                author=author,
+                name=f"Суп {i}",
+                text="Варить \"долго\"",
+                cooking_time=i + 1,
+                image=f"recipes/images/{i}.png" if i % 3 else None,
+            )
+            recipe.tags.set(tags[:i % 3 + 1])
+            for ingredient in reversed(ingredients[:i % 4 + 1]):
+                RecipeIngredient.objects.create(
+                    recipe=recipe, ingredients=ingredient, amount=i + 1)
+            if i % 2:
+                Favorite.objects.create(user=cls.reader, recipe=recipe)
+            if i % 3:
+                ShoppingCart.objects.create(user=cls.reader, recipe=recipe)
+            if i % 4:
+                Subscription.objects.create(
+                    user=cls.reader, subscription=author)
+
+    def assert_identical(self, params):
+        with mock.patch.object(RecipeViewSet, "fast_read", False):
+            expected = self.client.get(RECIPES_URL, params)
+        actual = self.client.get(RECIPES_URL, params)
+        self.assertEqual(actual.status_code, 200)
+        self.assertEqual(actual.content, expected.content)
+
+    def check_params(self):
+        for params in (
+            {},
+            {"limit": 5, "page": 2},
+            {"tags": ["tag-1", "tag-2"]},
+            {"search": "Суп"},
+            {"pagination": "cursor", "limit": 4},
+            {"is_favorited": 1},
+            {"ordering": "popular", "pagination": "cursor", "limit": 3},
+            {"ordering": "cooking_time"},
+        ):
+            with self.subTest(params=params):
+                self.assert_identical(params)
+
+    def test_anonymous_output_is_identical(self):
+        self.check_params()
+
+    def test_authenticated_output_is_identical(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+        self.check_params()
@@ -0,0 +1,49 @@
+from rest_framework.test import APITestCase
+
+from core.models import Ingredient
+from recipes.models import Recipe, RecipeIngredient
+from users.models import User
+
+RECIPES_URL = "/api/recipes/"
+
+
+class RecipeSearchTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(
+            username="author", email="author@example.com", password="pass"
+        )
+        cls.beet = Ingredient.objects.create(
+            name="свекла", measurement_unit="г")
+        cls.cabbage = Ingredient.objects.create(
+            name="капуста", measurement_unit="г")
+
+        def create(name, text, ingredient):
+            recipe = Recipe.objects.create(
+                author=author, name=name, text=text, cooking_time=5)
+            RecipeIngredient.objects.create(
+                recipe=recipe, ingredients=ingredient, amount=100)
+            recipe.save()
+            return recipe
+
+        cls.by_ingredient = create("Винегрет", "Нарезать кубиками", cls.beet)
+        cls.by_text = create("Гарнир", "Тушеная свекла с луком", cls.cabbage)
+        cls.by_name = create("Салат свекла", "Смешать", cls.cabbage)
+        cls.other = create("Щи", "Сварить", cls.cabbage)
+
+    def search(self, query):
+        response = self.client.get(RECIPES_URL, {"search": query})
+        self.assertEqual(response.status_code, 200)
+        return [item["id"] for item in response.data["results"]]
+
+    def test_ranked_by_field_weight(self):
+        self.assertEqual(
+            self.search("свекла"),
+            [self.by_name.id, self.by_text.id, self.by_ingredient.id],
+        )
+
+    def test_follows_ingredient_rename(self):
+        self.assertNotIn(self.other.id, self.search("брюква"))
+        self.cabbage.name = "брюква"
+        self.cabbage.save()
+        self.assertIn(self.other.id, self.search("брюква"))
@@ -0,0 +1,98 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from core.models import Ingredient, Tag
+from recipes.models import Recipe, RecipeIngredient
+from users.models import User
+
+RECIPES_URL = "/api/recipes/"
+INGREDIENT_COUNT = 40
+WRITE_QUERIES = 26
+
+
+class RecipeWriteTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username="author", email="author@example.com", password="pass"
+        )
+        cls.token = Token.objects.create(user=cls.author)
+        cls.ingredients = [
+            Ingredient.objects.create(
+                name=f"Ингредиент {i}", measurement_unit="г")
+            for i in range(INGREDIENT_COUNT + 1)
+        ]
+        cls.tags = [
+            Tag.objects.create(name=f"Тег {i}", slug=f"tag-{i}")
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def payload(self, ingredients, tags):
+        return {
+            "name": "Рагу",
+            "text": "Тушить",
+            "cooking_time": 30,
+            "image": None,
+            "ingredients": [
+                {"id": ingredient.id, "amount": amount}
+                for ingredient, amount in ingredients
+            ],
+            "tags": [tag.id for tag in tags],
+        }
+
+    def send(self, method, url, data):
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, method)(url, data, format="json")
+        return response, len(queries)
+
+    def test_queries_do_not_grow_with_ingredients(self):
+        lines = [(ingredient, 10) for ingredient in self.ingredients[:-1]]
+        response, queries = self.send(
+            "post", RECIPES_URL, self.payload(lines, self.tags[:2]))
+        self.assertEqual(response.status_code, 201)
+        self.assertLessEqual(queries, WRITE_QUERIES)
+
+        recipe = Recipe.objects.get(pk=response.data["id"])
+        before = dict(RecipeIngredient.objects.filter(
+            recipe=recipe).values_list("ingredients_id", "pk"))
+        lines[0] = (lines[0][0], 20)
+        lines[1] = (self.ingredients[-1], 5)
+        response, queries = self.send(
+            "patch",
+            f"{RECIPES_URL}{recipe.id}/",
+            self.payload(lines, self.tags[1:]),
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(queries, WRITE_QUERIES)
+
+        after = dict(RecipeIngredient.objects.filter(
+            recipe=recipe).values_list("ingredients_id", "pk"))
+        self.assertNotIn(self.ingredients[1].id, after)
+        self.assertEqual(
+            after[self.ingredients[0].id], before[self.ingredients[0].id])
+        self.assertEqual(
+            len(response.data["ingredients"]), INGREDIENT_COUNT)
+        self.assertEqual(
+            {tag["id"] for tag in response.data["tags"]},
+            {tag.id for tag in self.tags[1:]},
+        )
+
+    def test_unknown_ids_rejected(self):
+        payload = self.payload([(self.ingredients[0], 1)], self.tags[:1])
+        payload["ingredients"].append(
+            {"id": self.ingredients[-1].id + 1, "amount": 1})
+        response, _ = self.send("post", RECIPES_URL, payload)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("ingredients", response.data)
+
+        payload = self.payload([(self.ingredients[0], 1)], self.tags[:1])
+        payload["tags"].append(self.tags[-1].id + 1)
+        response, _ = self.send("post", RECIPES_URL, payload)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("tags", response.data)
+        self.assertFalse(Recipe.objects.exists())
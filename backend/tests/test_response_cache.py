@@ -0,0 +1,134 @@
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from core.models import Ingredient, Tag
+from recipes.models import Favorite, Recipe, RecipeIngredient
+from users.models import User
+
+RECIPES_URL = "/api/recipes/"
+
+
+class AnonymousResponseCacheTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username="author", email="author@example.com", password="pass"
+        )
+        cls.token = Token.objects.create(user=cls.author)
+        cls.tag = Tag.objects.create(name="Обед", slug="lunch")
+        cls.salt = Ingredient.objects.create(
+            name="соль", measurement_unit="г")
+        cls.recipe = Recipe.objects.create(
+            author=cls.author, name="Суп", text="Варить", cooking_time=5)
+        cls.recipe.tags.set([cls.tag])
+        cls.line = RecipeIngredient.objects.create(
+            recipe=cls.recipe, ingredients=cls.salt, amount=5)
+        cls.detail_url = f"{RECIPES_URL}{cls.recipe.id}/"
+
+    def setUp(self):
+        caches["responses"].clear()
+
+    def get(self, url, params=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def assert_cached(self, url, params=None):
+        first, _ = self.get(url, params)
+        second, queries = self.get(url, params)
+        self.assertEqual(queries, 0)
+        self.assertEqual(second.content, first.content)
+        return first
+
+    def test_query_string_is_normalized(self):
+        self.assert_cached(f"{RECIPES_URL}?limit=5&tags=lunch")
+        _, queries = self.get(f"{RECIPES_URL}?tags=lunch&limit=5")
+        self.assertEqual(queries, 0)
+        _, queries = self.get(f"{RECIPES_URL}?tags=lunch&limit=6")
+        self.assertGreater(queries, 0)
+
+    def test_authenticated_requests_bypass_cache(self):
+        self.assert_cached(self.detail_url)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+        _, queries = self.get(self.detail_url)
+        self.assertGreater(queries, 0)
+
+    def test_evicted_by_dependencies(self):
+        for change in (
+            lambda: self.recipe.save(),
+            lambda: self.line.save(),
+            lambda: self.tag.save(),
+            lambda: self.author.save(),
+            lambda: self.salt.save(),
+        ):
+            self.assert_cached(RECIPES_URL)
+            self.assert_cached(self.detail_url)
+            change()
+            for url in (RECIPES_URL, self.detail_url):
+                _, queries = self.get(url)
+                self.assertGreater(queries, 0)
+
+    def test_unrelated_recipe_keeps_detail(self):
+        self.assert_cached(self.detail_url)
+        Recipe.objects.create(
+            author=self.author, name="Каша", text="Варить", cooking_time=5)
+        _, queries = self.get(self.detail_url)
+        self.assertEqual(queries, 0)
+        response, queries = self.get(RECIPES_URL)
+        self.assertGreater(queries, 0)
+        self.assertEqual(response.data["count"], 2)
+
+    def test_changes_are_visible(self):
+        self.assert_cached(self.detail_url)
+        self.author.first_name = "Иван"
+        self.author.save()
+        response, _ = self.get(self.detail_url)
+        self.assertEqual(response.data["author"]["first_name"], "Иван")
+
+    def test_not_modified_from_cache(self):
+        first = self.assert_cached(self.detail_url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                self.detail_url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(len(queries), 0)
+
+    def test_popular_pages_follow_favorites(self):
+        newer = [
+            Recipe.objects.create(
+                author=self.author, name=f"Рецепт {i}", text="Текст",
+                cooking_time=5,
+            )
+            for i in range(4)
+        ]
+        reader = User.objects.create_user(
+            username="reader", email="reader@example.com", password="pass")
+        popular = {"ordering": "popular", "limit": 2}
+        newest = {"limit": 2}
+
+        for favorite in (
+            lambda: self.client.post(f"{self.detail_url}favorite/"),
+            lambda: Favorite.objects.create(user=reader, recipe=newer[0]),
+        ):
+            self.assert_cached(RECIPES_URL, popular)
+            self.assert_cached(RECIPES_URL, newest)
+            self.client.credentials(
+                HTTP_AUTHORIZATION=f"Token {self.token.key}")
+            favorite()
+            self.client.credentials()
+            response, queries = self.get(RECIPES_URL, popular)
+            self.assertGreater(queries, 0)
+            self.assertEqual(
+                response.data["results"][0]["favorites_count"], 1)
+            _, queries = self.get(RECIPES_URL, newest)
+            self.assertEqual(queries, 0)
+
+        response, _ = self.get(RECIPES_URL, popular)
+        self.assertEqual(
+            [item["id"] for item in response.json()["results"]],
+            [newer[0].id, self.recipe.id],
+        )
@@ -0,0 +1,198 @@
+import json
+import os
+import re
+import struct
+import tempfile
+import zlib
+from io import StringIO
+from pathlib import Path
+from unittest import skipUnless
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from core.models import Ingredient, Tag
+from recipes.models import (
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    ShoppingListItem,
+)
+from users.models import User
+
+DOWNLOAD_URL = "/api/recipes/download_shopping_cart/"
+
+
+class ShoppingListExportTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username="cook", email="cook@example.com", password="pass"
+        )
+        cls.token = Token.objects.create(user=cls.user)
+        flour = Ingredient.objects.create(name="мука", measurement_unit="г")
+        milk = Ingredient.objects.create(name="молоко", measurement_unit="мл")
+        for amount in (100, 250):
+            recipe = Recipe.objects.create(
+                author=cls.user, name="Блины", text="Жарить", cooking_time=5
+            )
+            RecipeIngredient.objects.create(
+                recipe=recipe, ingredients=flour, amount=amount)
+            RecipeIngredient.objects.create(
+                recipe=recipe, ingredients=milk, amount=amount * 2)
+            ShoppingCart.objects.create(user=cls.user, recipe=recipe)
+        ShoppingListItem.objects.rebuild()
+
+    def setUp(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def download(self, export_format=None):
+        params = {"format": export_format} if export_format else {}
+        response = self.client.get(DOWNLOAD_URL, params)
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content)
+
+    def test_txt_is_default(self):
+        self.assertEqual(
+            self.download().decode(), "молоко: 700мл\nмука: 350г")
+
+    def test_csv(self):
+        self.assertEqual(
+            self.download("csv").decode().splitlines(),
+            ["name,measurement_unit,amount", "молоко,мл,700", "мука,г,350"],
+        )
+
+    def test_json(self):
+        self.assertEqual(json.loads(self.download("json")), [
+            {"name": "молоко", "measurement_unit": "мл", "amount": 700},
+            {"name": "мука", "measurement_unit": "г", "amount": 350},
+        ])
+
+    @skipUnless(
+        os.path.exists(settings.SHOPPING_LIST_PDF_FONT),
+        "PDF font is not installed",
+    )
+    def test_pdf(self):
+        content = self.download("pdf")
+        self.assertTrue(content.startswith(b"%PDF-"))
+        self.assertTrue(content.rstrip().endswith(b"%%EOF"))
+        font_size = os.path.getsize(settings.SHOPPING_LIST_PDF_FONT)
+        self.assertLess(len(content), font_size / 10)
+        length, length1 = map(int, re.search(
+            rb"<< /Length (\d+) /Length1 (\d+) /Filter /FlateDecode >>"
+            rb"\nstream\n",
+            content,
+        ).groups())
+        start = content.index(b"stream\n", content.index(b"/Length1")) + 7
+        font = zlib.decompress(content[start:start + length])
+        self.assertEqual(len(font), length1)
+        self.assertTrue(font.startswith(b"\x00\x01\x00\x00"))
+
+    def assert_json_error(self, response, status_code):
+        self.assertEqual(response.status_code, status_code)
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertIn("detail", json.loads(response.content))
+
+    @override_settings(SHOPPING_LIST_PDF_FONT="/nonexistent/font.ttf")
+    def test_pdf_without_font(self):
+        self.assert_json_error(
+            self.client.get(DOWNLOAD_URL, {"format": "pdf"}), 406)
+
+    @skipUnless(
+        os.path.exists(settings.SHOPPING_LIST_PDF_FONT),
+        "PDF font is not installed",
+    )
+    def test_pdf_with_unsupported_cmap(self):
+        data = bytearray(Path(settings.SHOPPING_LIST_PDF_FONT).read_bytes())
+        (count,) = struct.unpack_from(">H", data, 4)
+        for index in range(count):
+            tag, _, cmap, _ = struct.unpack_from(
+                ">4sIII", data, 12 + index * 16)
+            if tag == b"cmap":
+                break
+        (subtables,) = struct.unpack_from(">H", data, cmap + 2)
+        for index in range(subtables):
+            (offset,) = struct.unpack_from(">I", data, cmap + 8 + index * 8)
+            struct.pack_into(">H", data, cmap + offset, 6)
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "font.ttf"
+            path.write_bytes(data)
+            with override_settings(SHOPPING_LIST_PDF_FONT=str(path)):
+                self.assert_json_error(
+                    self.client.get(DOWNLOAD_URL, {"format": "pdf"}), 406)
+
+    def test_unknown_format(self):
+        response = self.client.get(DOWNLOAD_URL, {"format": "xls"})
+        self.assertEqual(response.status_code, 404)
+
+    def test_requires_authentication(self):
+        self.client.credentials()
+        for export_format in ("txt", "csv", "pdf"):
+            with self.subTest(export_format=export_format):
+                self.assert_json_error(self.client.get(
+                    DOWNLOAD_URL, {"format": export_format}), 401)
+
+
+class ShoppingListAggregateTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username="cook", email="cook@example.com", password="pass"
+        )
+        cls.token = Token.objects.create(user=cls.user)
+        cls.flour = Ingredient.objects.create(
+            name="мука", measurement_unit="г")
+        cls.eggs = Ingredient.objects.create(
+            name="яйца", measurement_unit="шт")
+        cls.recipe = Recipe.objects.create(
+            author=cls.user, name="Блины", text="Жарить", cooking_time=5
+        )
+        RecipeIngredient.objects.create(
+            recipe=cls.recipe, ingredients=cls.flour, amount=200)
+        cls.tag = Tag.objects.create(name="Завтрак", slug="breakfast")
+        cls.recipe.tags.add(cls.tag)
+
+    def setUp(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+        self.cart_url = f"/api/recipes/{self.recipe.id}/shopping_cart/"
+
+    def amounts(self):
+        return dict(ShoppingListItem.objects.filter(
+            user=self.user).values_list("ingredient__name", "amount"))
+
+    def test_cart_add_and_remove(self):
+        self.client.post(self.cart_url)
+        self.assertEqual(self.amounts(), {"мука": 200})
+        self.client.delete(self.cart_url)
+        self.assertEqual(self.amounts(), {})
+
+    def test_recipe_edit_updates_carts(self):
+        self.client.post(self.cart_url)
+        response = self.client.patch(
+            f"/api/recipes/{self.recipe.id}/",
+            {
+                "ingredients": [
+                    {"id": self.flour.id, "amount": 150},
+                    {"id": self.eggs.id, "amount": 2},
+                ],
+                "tags": [self.tag.id],
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.amounts(), {"мука": 150, "яйца": 2})
+
+    def test_recipe_delete_updates_carts(self):
+        self.client.post(self.cart_url)
+        self.client.delete(f"/api/recipes/{self.recipe.id}/")
+        self.assertEqual(self.amounts(), {})
+
+    def test_reconcile_reports_drift(self):
+        ShoppingCart.objects.create(user=self.user, recipe=self.recipe)
+        out = StringIO()
+        call_command("reconcile_shopping_lists", stdout=out)
+        self.assertIn("1 missing", out.getvalue())
+        self.assertEqual(self.amounts(), {"мука": 200})
@@ -0,0 +1,136 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import skipIf
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from core.models import Ingredient
+from recipes.models import (
+    Recipe,
+    RecipeIngredient,
+    SimilarityCheckpoint,
+    SimilarRecipe,
+)
+from recipes.similarity import np
+from users.models import User
+
+RECIPES_URL = "/api/recipes/"
+
+
+@skipIf(np is None, "numpy and scipy are not installed")
+@override_settings(SIMILAR_RECIPES_TOP_K=1, SIMILAR_RECIPES_CHUNK_PAIRS=1)
+class SimilarRecipesTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(
+            username="author", email="author@example.com", password="pass"
+        )
+        cls.ingredients = [
+            Ingredient.objects.create(name=name, measurement_unit="г")
+            for name in ("мука", "яйца", "молоко", "сахар", "соль")
+        ]
+        cls.recipes = []
+        for i, indexes in enumerate(((0, 1, 2), (0, 1, 2, 3), (0, 1), (4,))):
+            recipe = Recipe.objects.create(
+                author=author, name=f"Рецепт {i}", text="Текст",
+                cooking_time=5,
+            )
+            RecipeIngredient.objects.bulk_create(
+                RecipeIngredient(
+                    recipe=recipe,
+                    ingredients=cls.ingredients[index],
+                    amount=100,
+                )
+                for index in indexes
+            )
+            cls.recipes.append(recipe)
+        cls.empty = Recipe.objects.create(
+            author=author, name="Без ингредиентов", text="Текст",
+            cooking_time=5,
+        )
+
+    def update(self, *args):
+        output = StringIO()
+        call_command("update_similar_recipes", *args, stdout=output)
+        return output.getvalue()
+
+    def similar(self, recipe):
+        return dict(SimilarRecipe.objects.filter(
+            recipe=recipe).values_list("similar_id", "score"))
+
+    def test_full_run(self):
+        self.assertIn("for 4 recipes", self.update())
+        first, second, third, fourth = self.recipes
+        self.assertEqual(self.similar(first), {second.id: 0.75})
+        self.assertEqual(self.similar(second), {first.id: 0.75})
+        self.assertAlmostEqual(self.similar(third)[first.id], 2 / 3)
+        self.assertEqual(self.similar(fourth), {})
+
+    @override_settings(SIMILAR_RECIPES_METRIC="cosine")
+    def test_cosine(self):
+        self.update("--full")
+        self.assertAlmostEqual(
+            self.similar(self.recipes[0])[self.recipes[1].id], 3 / 12 ** 0.5)
+
+    def test_incremental_run(self):
+        self.update()
+        Recipe.objects.update(
+            updated_at=timezone.now() - timedelta(hours=1))
+        SimilarityCheckpoint.objects.update(
+            computed_at=timezone.now() - timedelta(minutes=30))
+        first, second, third, fourth = self.recipes
+        RecipeIngredient.objects.filter(recipe=fourth).delete()
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(recipe=fourth, ingredients=ingredient, amount=1)
+            for ingredient in self.ingredients[:3]
+        )
+        fourth.save()
+
+        self.assertIn("for 1 recipes", self.update())
+        self.assertEqual(self.similar(fourth), {first.id: 1.0})
+        self.assertEqual(self.similar(first), {fourth.id: 1.0})
+        self.assertEqual(self.similar(second), {first.id: 0.75})
+        self.assertAlmostEqual(self.similar(third)[first.id], 2 / 3)
+
+    def test_incremental_run_refills_neighbours(self):
+        self.update()
+        Recipe.objects.update(
+            updated_at=timezone.now() - timedelta(hours=1))
+        SimilarityCheckpoint.objects.update(
+            computed_at=timezone.now() - timedelta(minutes=30))
+        first, second, third, fourth = self.recipes
+        RecipeIngredient.objects.filter(recipe=second).delete()
+        RecipeIngredient.objects.create(
+            recipe=second, ingredients=self.ingredients[4], amount=1)
+        second.save()
+
+        self.assertIn("for 2 recipes", self.update())
+        self.assertAlmostEqual(self.similar(first)[third.id], 2 / 3)
+        self.assertEqual(self.similar(second), {fourth.id: 1.0})
+        self.assertEqual(self.similar(fourth), {second.id: 1.0})
+        self.assertAlmostEqual(self.similar(third)[first.id], 2 / 3)
+
+    def test_endpoint(self):
+        self.update()
+        url = f"{RECIPES_URL}{self.recipes[0].id}/similar/"
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(
+            [item["id"] for item in response.data], [self.recipes[1].id])
+        self.assertEqual(set(response.data[0]), {
+            "id", "name", "image", "cooking_time"})
+
+        response = self.client.get(f"{RECIPES_URL}{self.empty.id}/similar/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, [])
+        response = self.client.get(f"{RECIPES_URL}0/similar/")
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(f"{RECIPES_URL}abc/similar/")
+        self.assertEqual(response.status_code, 404)
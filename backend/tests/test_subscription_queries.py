@@ -0,0 +1,97 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from recipes.models import Recipe
+from users.models import Subscription, User
+
+SUBSCRIPTIONS_URL = "/api/users/subscriptions/"
+LIST_QUERIES = 4
+
+
+class SubscriptionListTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(
+            username="reader", email="reader@example.com", password="pass"
+        )
+        cls.token = Token.objects.create(user=cls.reader)
+        for i in range(12):
+            author = User.objects.create_user(
+                username=f"author{i:02}",
+                email=f"author{i}@example.com",
+                password="pass",
+            )
+            Subscription.objects.create(user=cls.reader, subscription=author)
+            for j in range(i % 5):
+                Recipe.objects.create(
+                    author=author,
+                    name=f"Рецепт {j}",
+                    text="Описание",
+                    cooking_time=10,
+                )
+
+    def setUp(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def get_counted(self, data):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(SUBSCRIPTIONS_URL, data)
+        return response, len(queries)
+
+    def test_constant_queries(self):
+        for limit in (1, 6, 12):
+            with self.subTest(limit=limit):
+                response, queries = self.get_counted(
+                    {"limit": limit, "recipes_limit": 2})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.data["results"]), limit)
+                self.assertLessEqual(queries, LIST_QUERIES)
+
+    def test_recipes_limit_and_count(self):
+        response = self.client.get(
+            SUBSCRIPTIONS_URL, {"limit": 12, "recipes_limit": 2})
+        for item in response.data["results"]:
+            author = User.objects.get(pk=item["id"])
+            expected = list(
+                author.recipes.values_list("id", flat=True)[:2])
+            self.assertEqual(
+                [recipe["id"] for recipe in item["recipes"]], expected)
+            self.assertEqual(item["recipes_count"], author.recipes.count())
+            self.assertTrue(item["is_subscribed"])
+
+    def test_zero_recipes_limit(self):
+        response = self.client.get(
+            SUBSCRIPTIONS_URL, {"limit": 12, "recipes_limit": 0})
+        self.assertEqual(response.status_code, 200)
+        for item in response.data["results"]:
+            self.assertEqual(item["recipes"], [])
+        author = User.objects.get(username="author04")
+        response = self.client.post(
+            f"/api/users/{author.id}/subscribe/?recipes_limit=0")
+        self.assertEqual(response.status_code, 400)
+        Subscription.objects.filter(subscription=author).delete()
+        response = self.client.post(
+            f"/api/users/{author.id}/subscribe/?recipes_limit=0")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["recipes"], [])
+        self.assertEqual(response.data["recipes_count"], 4)
+
+    def test_invalid_recipes_limit(self):
+        for value in ("abc", "-1"):
+            with self.subTest(value=value):
+                response = self.client.get(
+                    SUBSCRIPTIONS_URL, {"recipes_limit": value})
+                self.assertEqual(response.status_code, 400)
+
+    def test_cursor_pagination(self):
+        usernames, url, params = [], SUBSCRIPTIONS_URL, {
+            "pagination": "cursor", "limit": 5}
+        while url:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            usernames += [item["username"] for item in response.data[
+                "results"]]
+            url, params = response.data["next"], None
+        self.assertEqual(usernames, [f"author{i:02}" for i in range(12)])
@@ -0,0 +1,52 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from users.models import Subscription, User
+
+USERS_URL = "/api/users/"
+LIST_QUERIES_STAFF = 4
+
+
+class UserListQueryCountTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(
+            username="reader", email="reader@example.com", password="pass",
+            is_staff=True,
+        )
+        cls.token = Token.objects.create(user=cls.reader)
+        for i in range(20):
+            author = User.objects.create_user(
+                username=f"author{i:02}",
+                email=f"author{i}@example.com",
+                password="pass",
+            )
+            if i % 2:
+                Subscription.objects.create(
+                    user=cls.reader, subscription=author)
+
+    def assert_constant_list(self, expected):
+        for limit in (1, 10, 21):
+            with self.subTest(limit=limit):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(USERS_URL, {"limit": limit})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.data["results"]), limit)
+                self.assertLessEqual(len(queries), expected)
+
+    def test_list_hidden_from_anonymous(self):
+        response = self.client.get(USERS_URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["results"], [])
+
+    def test_list_staff(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+        self.assert_constant_list(LIST_QUERIES_STAFF)
+        response = self.client.get(USERS_URL, {"limit": 21})
+        followed = set(
+            self.reader.subscriber.values_list("subscription_id", flat=True)
+        )
+        for item in response.data["results"]:
+            self.assertEqual(item["is_subscribed"], item["id"] in followed)
@@ -0,0 +1,96 @@
+from django.db import IntegrityError, connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from core.models import Ingredient
+from recipes.models import (
+    Favorite,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    ShoppingListItem,
+)
+from users.models import User
+
+FAVORITE_BATCH_URL = "/api/recipes/favorite/"
+CART_BATCH_URL = "/api/recipes/shopping_cart/"
+ADD_QUERIES = 3 if connection.vendor == "postgresql" else 6
+
+
+class UserRecipeTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username="cook", email="cook@example.com", password="pass"
+        )
+        cls.token = Token.objects.create(user=cls.user)
+        cls.flour = Ingredient.objects.create(
+            name="мука", measurement_unit="г")
+        cls.recipes = []
+        for i in range(3):
+            recipe = Recipe.objects.create(
+                author=cls.user, name=f"Рецепт {i}", text="Текст",
+                cooking_time=5,
+            )
+            RecipeIngredient.objects.create(
+                recipe=recipe, ingredients=cls.flour, amount=100)
+            cls.recipes.append(recipe)
+        cls.ids = [recipe.id for recipe in cls.recipes]
+
+    def setUp(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def test_add_twice(self):
+        url = f"/api/recipes/{self.ids[0]}/favorite/"
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(url)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["id"], self.ids[0])
+        self.assertLessEqual(len(queries), ADD_QUERIES)
+        self.assertEqual(self.client.post(url).status_code, 400)
+        self.assertEqual(Favorite.objects.filter(user=self.user).count(), 1)
+
+    def test_remove_twice(self):
+        url = f"/api/recipes/{self.ids[0]}/favorite/"
+        self.client.post(url)
+        self.assertEqual(self.client.delete(url).status_code, 204)
+        self.assertEqual(self.client.delete(url).status_code, 400)
+        self.assertEqual(
+            self.client.delete("/api/recipes/0/favorite/").status_code, 404)
+
+    def test_constraint(self):
+        Favorite.objects.create(user=self.user, recipe=self.recipes[0])
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Favorite.objects.create(user=self.user, recipe=self.recipes[0])
+
+    def test_batch_is_idempotent(self):
+        self.client.post(f"/api/recipes/{self.ids[0]}/shopping_cart/")
+        response = self.client.post(
+            CART_BATCH_URL, {"recipes": self.ids}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(response.data["added"]), self.ids[1:])
+        self.assertEqual(
+            ShoppingListItem.objects.get(user=self.user).amount, 300)
+
+        response = self.client.delete(
+            CART_BATCH_URL, {"recipes": self.ids[:2]}, format="json")
+        self.assertEqual(sorted(response.data["removed"]), self.ids[:2])
+        self.assertEqual(
+            ShoppingListItem.objects.get(user=self.user).amount, 100)
+        self.assertEqual(
+            list(ShoppingCart.objects.values_list("recipe_id", flat=True)),
+            self.ids[2:],
+        )
+
+    def test_batch_rejects_unknown_recipes(self):
+        response = self.client.post(
+            FAVORITE_BATCH_URL, {"recipes": [self.ids[0], 0]}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Favorite.objects.exists())
+
+    def test_batch_requires_authentication(self):
+        self.client.credentials()
+        response = self.client.post(
+            FAVORITE_BATCH_URL, {"recipes": self.ids}, format="json")
+        self.assertEqual(response.status_code, 401)
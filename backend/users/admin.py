@@ -13,6 +13,8 @@ class UserAdmin(BaseUserAdmin):
         "first_name",
         "last_name",
         "avatar",
+        "recipes_count",
+        "subscribers_count",
         "is_staff",
     )
     search_fields = ("username", "email", "first_name", "last_name")
@@ -4,9 +4,10 @@ from django.contrib.auth.models import AbstractUser
 from django.db import models
 
 from core.constants import TITLE_STR_MAX_LENGTH
+from core.counters import CounterFieldsMixin
 
 
-class User(AbstractUser):
+class User(CounterFieldsMixin, AbstractUser):
     avatar = models.ImageField(
         upload_to="avatar/",
         blank=True,
@@ -14,6 +15,12 @@ class User(AbstractUser):
         verbose_name="Аватар",
     )
     email = models.EmailField(unique=True)
+    recipes_count = models.PositiveIntegerField(
+        verbose_name="Рецептов", default=0, editable=False)
+    subscribers_count = models.PositiveIntegerField(
+        verbose_name="Подписчиков", default=0, editable=False)
+
+    counter_fields = ("recipes_count", "subscribers_count")
 
     class Meta(AbstractUser.Meta):
         ordering = ["username"]